@@ -0,0 +1,284 @@
+"""Local stand-in for the Reddit, ArXiv, YouTube and Medium APIs used by the benchmarks.
+
+Serves stored payloads with configurable latency, jitter and error rate so
+ResearchTools can be exercised without touching the internet:
+
+    uv run python benchmarks/mock_server.py --port 8765 --latency 120 --jitter 40
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from email.utils import formatdate
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+class MockUpstream:
+    """
+    Threaded HTTP server replaying Reddit JSON, ArXiv Atom, YouTube Data API
+    and Medium RSS payloads.
+
+    Routes:
+        /r/<subreddit>/search.json  Reddit search (honours ``limit`` and ``after``)
+        /api/query                  ArXiv query API (honours ``start`` and ``max_results``)
+        /youtube/v3/search          YouTube search.list (honours ``maxResults`` and ``pageToken``)
+        /youtube/v3/videos          YouTube videos.list (honours ``id``)
+        /feed/tag/<tag>             Medium tag feed
+
+    Stored items are repeated to fill ``total_results`` so that paginated
+    fetching can be exercised across many pages. Every route sends ETag and
+    Last-Modified headers, answers matching conditional requests with 304
+    Not Modified, and gzips bodies for clients that accept it (unless
+    ``compress`` is off).
+
+    Can be used as a context manager; the server runs in a background
+    thread and ``base_url`` points at it.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        total_results: int = 1000,
+        fixtures_dir: Path = FIXTURES_DIR,
+        seed: Optional[int] = None,
+        compress: bool = True,
+    ):
+        """
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            latency: Base response delay in seconds
+            jitter: Maximum extra random delay in seconds
+            error_rate: Fraction of requests answered with 503
+            total_results: Number of results each search reports in total
+            fixtures_dir: Directory holding reddit_search.json, arxiv_query.xml,
+                youtube_search.json, youtube_videos.json and medium_feed.xml
+            seed: Seed for the latency/error random generator
+            compress: Gzip response bodies when the client sends Accept-Encoding: gzip
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.total_results = total_results
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.compress = compress
+        self.requests = 0
+        self.not_modified = 0
+        # Body bytes written to the wire, after compression
+        self.bytes_sent = 0
+        # Payloads never change while the server runs
+        self.last_modified = formatdate(time.time(), usegmt=True)
+
+        self.reddit_payload = json.loads((fixtures_dir / "reddit_search.json").read_text(encoding="utf-8"))
+        # Split the feed so pages can be assembled from any range of entries
+        arxiv_payload = (fixtures_dir / "arxiv_query.xml").read_bytes()
+        self.arxiv_entries = re.findall(rb"<entry>.*?</entry>", arxiv_payload, re.DOTALL)
+        self.arxiv_head = arxiv_payload[:arxiv_payload.index(b"<entry>")]
+        self.arxiv_tail = arxiv_payload[arxiv_payload.rindex(b"</entry>") + len(b"</entry>"):]
+        self.youtube_payload = json.loads((fixtures_dir / "youtube_search.json").read_text(encoding="utf-8"))
+        self.youtube_stats = {
+            video["id"]: video
+            for video in json.loads((fixtures_dir / "youtube_videos.json").read_text(encoding="utf-8"))["items"]
+        }
+        self.medium_feed = (fixtures_dir / "medium_feed.xml").read_bytes()
+
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; avoid delayed-ACK stalls on keep-alive
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                with upstream.random_lock:
+                    upstream.requests += 1
+                    delay = upstream.latency + upstream.random.uniform(0, upstream.jitter)
+                    fail = upstream.random.random() < upstream.error_rate
+                time.sleep(delay)
+
+                if fail:
+                    self._send(503, b"upstream unavailable", "text/plain", {"Retry-After": "1"})
+                    return
+
+                url = urlparse(self.path)
+                params = parse_qs(url.query)
+                if url.path.endswith("/search.json"):
+                    limit = int(params.get("limit", ["25"])[0])
+                    after = params.get("after", [""])[0]
+                    offset = int(after[len("t3_page"):]) if after.startswith("t3_page") else 0
+                    self._send_conditional(upstream.reddit_page(offset, limit), "application/json")
+                elif url.path == "/api/query":
+                    start = int(params.get("start", ["0"])[0])
+                    max_results = int(params.get("max_results", ["10"])[0])
+                    self._send_conditional(upstream.arxiv_page(start, max_results), "application/atom+xml; charset=utf-8")
+                elif url.path == "/youtube/v3/search":
+                    max_results = int(params.get("maxResults", ["5"])[0])
+                    token = params.get("pageToken", [""])[0]
+                    offset = int(token[len("page"):]) if token.startswith("page") else 0
+                    self._send_conditional(upstream.youtube_page(offset, max_results), "application/json")
+                elif url.path == "/youtube/v3/videos":
+                    ids = params.get("id", [""])[0].split(",")
+                    self._send_conditional(upstream.youtube_videos(ids), "application/json")
+                elif url.path.startswith("/feed/tag/"):
+                    self._send_conditional(upstream.medium_feed, "text/xml; charset=UTF-8")
+                else:
+                    self._send(404, b"not found", "text/plain")
+
+            def _send_conditional(self, body, content_type):
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                validators = {"ETag": etag, "Last-Modified": upstream.last_modified}
+                # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+                if_none_match = self.headers.get("If-None-Match")
+                if if_none_match is not None:
+                    unchanged = if_none_match == etag
+                else:
+                    unchanged = self.headers.get("If-Modified-Since") == upstream.last_modified
+                if unchanged:
+                    with upstream.random_lock:
+                        upstream.not_modified += 1
+                    self._send(304, b"", content_type, validators)
+                else:
+                    self._send(200, body, content_type, validators)
+
+            def _send(self, status, body, content_type, headers=None):
+                headers = dict(headers or {})
+                if body and upstream.compress and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, compresslevel=6)
+                    headers["Content-Encoding"] = "gzip"
+                with upstream.random_lock:
+                    upstream.bytes_sent += len(body)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def _window(self, items, offset: int, count: int):
+        """Take ``count`` stored items from ``offset``, repeating them up to total_results."""
+        count = max(0, min(count, self.total_results - offset))
+        return [items[(offset + i) % len(items)] for i in range(count)]
+
+    def reddit_page(self, offset: int, limit: int) -> bytes:
+        """Render one Reddit search page, with an ``after`` cursor while results remain."""
+        children = self._window(self.reddit_payload["data"]["children"], offset, limit)
+        end = offset + len(children)
+        payload = dict(self.reddit_payload)
+        payload["data"] = dict(
+            payload["data"],
+            children=children,
+            after=f"t3_page{end}" if end < self.total_results else None,
+        )
+        return json.dumps(payload).encode("utf-8")
+
+    def arxiv_page(self, start: int, max_results: int) -> bytes:
+        """Render one ArXiv Atom page starting at ``start``."""
+        entries = self._window(self.arxiv_entries, start, max_results)
+        return self.arxiv_head + b"\n  ".join(entries) + self.arxiv_tail
+
+    def youtube_page(self, offset: int, max_results: int) -> bytes:
+        """Render one YouTube search.list page, with a ``nextPageToken`` while results remain."""
+        items = []
+        for index, item in enumerate(self._window(self.youtube_payload["items"], offset, max_results)):
+            # Repeated items get distinct IDs of the form <stored id>.<position>
+            video_id = f"{item['id']['videoId']}.{offset + index}"
+            items.append(dict(item, id=dict(item["id"], videoId=video_id)))
+        end = offset + len(items)
+        payload = dict(self.youtube_payload, items=items)
+        payload["nextPageToken"] = f"page{end}" if end < self.total_results else None
+        return json.dumps(payload).encode("utf-8")
+
+    def youtube_videos(self, ids) -> bytes:
+        """Render a YouTube videos.list response for the requested IDs."""
+        items = []
+        for video_id in ids:
+            stored = self.youtube_stats.get(video_id.split(".")[0])
+            if stored is not None:
+                items.append(dict(stored, id=video_id))
+        return json.dumps({"kind": "youtube#videoListResponse", "items": items}).encode("utf-8")
+
+    def start(self) -> "MockUpstream":
+        """Start serving in a background thread."""
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server and wait for the thread to exit."""
+        self.server.shutdown()
+        self.server.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self) -> "MockUpstream":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reddit / ArXiv / YouTube / Medium のモックサーバー")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="基本遅延（ミリ秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="ランダムに加算する遅延の上限（ミリ秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503 を返す割合（0〜1）")
+    parser.add_argument("--total-results", type=int, default=1000, help="検索ごとの総件数（ページングの上限）")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR, help="ペイロードのディレクトリ")
+    parser.add_argument("--no-compress", action="store_true", help="gzip 圧縮せずに応答する")
+    args = parser.parse_args()
+
+    upstream = MockUpstream(
+        host=args.host,
+        port=args.port,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        total_results=args.total_results,
+        fixtures_dir=args.fixtures,
+        compress=not args.no_compress,
+    )
+    print(f"🧪 モックサーバー起動: {upstream.base_url}（Ctrl+C で終了）")
+    try:
+        upstream.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        upstream.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
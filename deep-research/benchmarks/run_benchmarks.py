@@ -0,0 +1,323 @@
+"""Offline latency and throughput benchmarks for ResearchTools and research_query_sources.
+
+Every scenario runs against the local mock server, so results are
+reproducible and need no network access:
+
+    uv run python benchmarks/run_benchmarks.py --latency 100 --jitter 50 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+from deep_research.cache import ValidatorStore
+from deep_research.context import build_context_async
+from deep_research.executor import PostProcessor
+from deep_research.main import research_query_sources
+from deep_research.records import SourceResult
+from deep_research.serve import ResearchServer
+from deep_research.tools import ResearchTools
+
+from mock_server import FIXTURES_DIR, MockUpstream
+
+
+SCENARIOS = ["single", "fanout", "batch", "monitor", "serve", "startup", "deep", "postprocess"]
+# "deep" and "postprocess" page through many results per request, so they only run when asked for
+DEFAULT_SCENARIOS = ["single", "fanout", "batch", "monitor", "serve", "startup"]
+
+# Cold-start budget of the CLI (p95 of the startup scenario, milliseconds)
+DEFAULT_STARTUP_BUDGET_MS = 500.0
+
+# What every CLI invocation does before any work: import the entry point and build its parser.
+# Exits with 1 if that pulled in the Claude SDK, which must only load on first use.
+STARTUP_PROBE = """
+import sys
+from deep_research.main import build_parser
+build_parser().format_help()
+sys.exit("claude_agent_sdk" in sys.modules)
+"""
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def measure(
+    operation: Callable[[int], Awaitable[Dict[str, Any]]],
+    requests: int,
+    concurrency: int,
+) -> Dict[str, Any]:
+    """
+    Run an operation repeatedly and collect latency statistics.
+
+    Args:
+        operation: Coroutine function taking the request index
+        requests: Total number of operations
+        concurrency: Number of operations in flight at once
+
+    Returns:
+        Latency percentiles (milliseconds), throughput and error count
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def run(index: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            result = await operation(index)
+            latencies.append(time.perf_counter() - started)
+            results = result.values() if isinstance(result, dict) else [result]
+            errors += sum(1 for item in results if item.error)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "qps": round(requests / elapsed, 2),
+    }
+
+
+async def run_scenario(name: str, upstream: MockUpstream, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Run one benchmark scenario against the mock server.
+
+    Scenarios:
+        single  one Reddit search at a time
+        fanout  research_query_sources over Reddit and ArXiv, one query at a time
+        batch   research_query_sources at ``--concurrency`` queries in flight
+        monitor research_query_sources repeating one topic, revalidating with
+                conditional requests (compare its KiB/op with fanout)
+        serve   SSE clients of ``deep-research serve`` (without analysis) at
+                ``--concurrency`` in flight, asking about ``--serve-topics`` topics,
+                so concurrent identical queries are coalesced (compare its KiB/op with batch)
+        startup (see run_startup; does not use the mock server)
+        deep    iter_reddit and iter_arxiv collecting ``--deep-items`` results each
+        postprocess  deep collection followed by ranking the results into a prompt
+                context, at ``--concurrency`` queries in flight on ``--workers`` processes
+
+    Args:
+        name: Scenario name
+        upstream: Running mock server
+        args: Parsed command-line arguments
+
+    Returns:
+        Scenario statistics, including the response bytes the server sent per operation
+    """
+    base_url = upstream.base_url
+    executor = PostProcessor(args.workers)
+    state_dir = tempfile.TemporaryDirectory()
+    validators = ValidatorStore(Path(state_dir.name) / "validators.sqlite3") if name == "monitor" else None
+    tools = ResearchTools(
+        cache=None,
+        per_host_limit=args.concurrency,
+        reddit_base_url=base_url,
+        arxiv_api_url=f"{base_url}/api/query",
+        youtube_api_url=f"{base_url}/youtube/v3",
+        medium_feed_url=f"{base_url}/feed",
+        executor=executor,
+        validators=validators,
+    )
+    server = None
+    async with tools:
+        if name == "serve":
+            server = ResearchServer(
+                tools, analyze=False, max_active=args.concurrency, max_queue=args.requests
+            )
+            await server.start("127.0.0.1", 0)
+            client = httpx.AsyncClient(base_url=server.base_url, timeout=60)
+
+            async def operation(i):
+                params = {"q": f"quantum computing {i % args.serve_topics}", "sources": "reddit,arxiv"}
+                last_event = None
+                async with client.stream("GET", "/research", params=params) as response:
+                    if response.status_code != 200:
+                        return SourceResult(source=name, error=f"HTTP {response.status_code}")
+                    async for line in response.aiter_lines():
+                        if line.startswith("event: "):
+                            last_event = line[len("event: "):]
+                return SourceResult(source=name, error=None if last_event == "done" else f"stream ended with {last_event}")
+            concurrency = args.concurrency
+        elif name in ("deep", "postprocess"):
+            async def operation(i):
+                query = f"quantum computing {i}"
+                reddit = [post async for post in tools.iter_reddit(query, max_items=args.deep_items)]
+                arxiv = [paper async for paper in tools.iter_arxiv(query, max_items=args.deep_items)]
+                if name == "postprocess":
+                    research_data = {
+                        "reddit": SourceResult(source="Reddit", query=query, results=reddit),
+                        "arxiv": SourceResult(source="ArXiv", query=query, results=arxiv),
+                    }
+                    await build_context_async(query, research_data, executor=executor)
+                return SourceResult(source=name, results=reddit + arxiv)
+            concurrency = 1 if name == "deep" else args.concurrency
+        elif name == "single":
+            operation = lambda i: tools.search_reddit(f"quantum computing {i}")
+            concurrency = 1
+        elif name == "monitor":
+            operation = lambda i: research_query_sources("quantum computing", tools=tools)
+            concurrency = 1
+        else:
+            operation = lambda i: research_query_sources(f"quantum computing {i}", tools=tools)
+            concurrency = 1 if name == "fanout" else args.concurrency
+
+        try:
+            # Warm up the connection pool (and worker processes) so startup costs are not measured
+            await operation(-1)
+            bytes_before = upstream.bytes_sent
+            stats = await measure(operation, args.requests, concurrency)
+            kib_per_op = (upstream.bytes_sent - bytes_before) / 1024 / args.requests
+            result = {"scenario": name, **stats, "kib_per_op": round(kib_per_op, 2)}
+            if server is not None:
+                result["coalesced"] = server.stats["coalesced"]
+            return result
+        finally:
+            if server is not None:
+                await client.aclose()
+                await server.close()
+            executor.close()
+            if validators is not None:
+                validators.close()
+            state_dir.cleanup()
+
+
+async def run_startup(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Measure the cold start of the CLI in fresh interpreters.
+
+    Runs are sequential so they do not compete for cores. A run that
+    imports the Claude SDK during startup counts as an error.
+
+    Args:
+        args: Parsed command-line arguments
+
+    Returns:
+        Scenario statistics
+    """
+
+    async def operation(i):
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", STARTUP_PROBE,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await process.communicate()
+        error = None
+        if process.returncode == 1:
+            error = "claude_agent_sdk imported at startup"
+        elif process.returncode:
+            error = stderr.decode("utf-8", "replace").strip()[-200:]
+        return SourceResult(source="startup", error=error)
+
+    stats = await measure(operation, args.startup_runs, 1)
+    return {"scenario": "startup", **stats, "kib_per_op": 0.0}
+
+
+async def run_benchmarks(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    upstream = MockUpstream(
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        total_results=max(1000, args.deep_items),
+        fixtures_dir=args.fixtures,
+        seed=args.seed,
+        compress=not args.no_compress,
+    )
+    with upstream:
+        return [
+            await (run_startup(args) if name == "startup" else run_scenario(name, upstream, args))
+            for name in args.scenarios
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ResearchTools のオフラインベンチマーク")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=DEFAULT_SCENARIOS)
+    parser.add_argument("--requests", type=int, default=200, help="シナリオごとのリクエスト数")
+    parser.add_argument("--concurrency", type=int, default=16, help="batch シナリオの同時実行数")
+    parser.add_argument("--startup-runs", type=int, default=10, help="startup シナリオで CLI を起動する回数")
+    parser.add_argument("--serve-topics", type=int, default=4, help="serve シナリオで問い合わせる異なるトピックの数")
+    parser.add_argument("--deep-items", type=int, default=1000, help="deep / postprocess シナリオでソースごとに集める件数")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="postprocess シナリオのワーカープロセス数（デフォルト: CPUコア数。0 でイベントループ上で実行）",
+    )
+    parser.add_argument("--latency", type=float, default=50.0, help="モックサーバーの基本遅延（ミリ秒）")
+    parser.add_argument("--jitter", type=float, default=25.0, help="ランダムに加算する遅延の上限（ミリ秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503 を返す割合（0〜1）")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR, help="ペイロードのディレクトリ")
+    parser.add_argument("--no-compress", action="store_true", help="モックサーバーの gzip 圧縮を無効にする")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, default=None, help="結果を JSON で書き出すファイル")
+    parser.add_argument(
+        "--max-p95",
+        type=float,
+        default=None,
+        help="いずれかのシナリオの p95（ミリ秒）がこの値を超えたら終了コード 1 で終了する",
+    )
+    parser.add_argument(
+        "--max-startup-ms",
+        type=float,
+        default=DEFAULT_STARTUP_BUDGET_MS,
+        help=(
+            "startup シナリオの p95（ミリ秒）がこの値を超えるか、起動時に Claude SDK が読み込まれたら"
+            f"終了コード 1 で終了する（デフォルト: {DEFAULT_STARTUP_BUDGET_MS:g}、0 で無効）"
+        ),
+    )
+    args = parser.parse_args()
+
+    # Per-source error messages are already counted in the results; keep the report readable
+    with redirect_stdout(StringIO()):
+        results = asyncio.run(run_benchmarks(args))
+
+    print(
+        f"{'scenario':<8} {'reqs':>6} {'conc':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+        f"{'qps':>9} {'errors':>7} {'KiB/op':>8}"
+    )
+    for r in results:
+        print(
+            f"{r['scenario']:<8} {r['requests']:>6} {r['concurrency']:>5} {r['p50_ms']:>9.2f} "
+            f"{r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['qps']:>9.2f} {r['errors']:>7} {r['kib_per_op']:>8.2f}"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    startup = next((r for r in results if r["scenario"] == "startup"), None)
+    if startup is not None and args.max_startup_ms:
+        if startup["errors"]:
+            print("❌ 起動時に claude_agent_sdk が読み込まれているか、CLI の起動に失敗しました")
+            sys.exit(1)
+        if startup["p95_ms"] > args.max_startup_ms:
+            print(f"❌ 起動時間の p95 が {args.max_startup_ms:g}ms を超えました: {startup['p95_ms']:.1f}ms")
+            sys.exit(1)
+
+    if args.max_p95 is not None:
+        slow = [r["scenario"] for r in results if r["scenario"] != "startup" and r["p95_ms"] > args.max_p95]
+        if slow:
+            print(f"❌ p95 が {args.max_p95}ms を超えました: {', '.join(slow)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,9 +20,9 @@ async def main():
     print("Results:")
     for source, data in results.items():
         print(f"\n{source.upper()}:")
-        print(f"  Total results: {data.get('total_results', 0)}")
-        if 'error' in data:
-            print(f"  Error: {data['error']}")
+        print(f"  Total results: {data.total_results}")
+        if data.error:
+            print(f"  Error: {data.error}")
 
     # Example 2: Use the agent to analyze and synthesize
     print("\n\n🤖 Example 2: AI Analysis")
@@ -1,7 +1,7 @@
 """Simple example of using the research tools directly."""
 
 import asyncio
-import json
+from deep_research.records import dumps
 from deep_research.tools import ResearchTools
 
 
@@ -18,7 +18,7 @@ async def main():
             subreddit="artificial",
             limit=5
         )
-        print(json.dumps(reddit_results, ensure_ascii=False, indent=2))
+        print(dumps(reddit_results, indent=True))
 
         print("\n" + "=" * 60)
         print("🔍 Searching ArXiv for 'machine learning'...")
@@ -27,7 +27,7 @@ async def main():
             query="machine learning",
             max_results=5
         )
-        print(json.dumps(arxiv_results, ensure_ascii=False, indent=2))
+        print(dumps(arxiv_results, indent=True))
 
     finally:
         await tools.close()
@@ -1,3 +1,8 @@
 """Deep Research Agent - Multi-source research agent powered by Claude."""
 
+import time
+
+# Reference point of the --startup-timing report
+IMPORT_STARTED = time.perf_counter()
+
 __version__ = "0.1.0"
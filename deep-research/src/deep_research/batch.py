@@ -0,0 +1,370 @@
+"""Batch research mode: run many queries from a JSONL file with bounded concurrency."""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set
+
+from .context import DEFAULT_TOKEN_BUDGET
+from .executor import configure_default_executor, get_default_executor
+from .main import (
+    add_llm_cache_arguments,
+    add_map_reduce_arguments,
+    add_plan_arguments,
+    add_profile_arguments,
+    add_worker_arguments,
+    analyze_with_claude,
+    create_analysis_session,
+    create_research_tools,
+    create_translation_session,
+    research_query_sources,
+)
+from . import metrics
+from .planner import research_planned
+from .records import dumps
+from .session import SessionPool
+from .tools import ResearchTools
+
+
+DEFAULT_CONCURRENCY = 4
+
+# Warm translation sessions shared by the workers; translations are short and memoized
+DEFAULT_TRANSLATION_SESSIONS = 2
+
+
+def read_queries(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Stream query records from a JSONL file.
+
+    Each line is either a JSON object with a ``query`` field (and optional
+    ``id`` and ``sources``) or a bare JSON string. Blank lines are skipped,
+    and malformed lines are reported and skipped so one bad line does not
+    stop the run. Records without an ``id`` are identified by their line number.
+
+    Args:
+        path: Input JSONL file
+
+    Yields:
+        Dictionaries with ``id``, ``query`` and ``sources`` keys
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                print(f"⚠️  {path}:{line_number} を読み飛ばします（JSON として読めません: {e}）")
+                continue
+            if isinstance(record, str):
+                record = {"query": record}
+            if not isinstance(record, dict) or not isinstance(record.get("query"), str):
+                print(f"⚠️  {path}:{line_number} を読み飛ばします（query がありません）")
+                continue
+            yield {
+                "id": str(record.get("id", f"line-{line_number}")),
+                "query": record["query"],
+                "sources": record.get("sources"),
+            }
+
+
+def load_checkpoint(path: Path) -> Set[str]:
+    """
+    Collect the ids of the queries already completed in an output file.
+
+    The output file doubles as the checkpoint: every finished query is
+    appended as one line, so a rerun after a crash skips those ids. Lines
+    recording an ``error`` do not count, so failed queries are retried
+    (their new result is appended after the failed one). A truncated last
+    line (from a crash mid-write) is ignored and rerun.
+
+    Args:
+        path: Output JSONL file
+
+    Returns:
+        Set of completed query ids
+    """
+    done = set()
+    if not path.exists():
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                if "error" not in record:
+                    done.add(str(record["id"]))
+            except (ValueError, KeyError, TypeError):
+                continue
+    return done
+
+
+def _serialize(result: Dict[str, Any]) -> str:
+    """Encode one output line (run in a worker process for large results)."""
+    return dumps(result) + "\n"
+
+
+async def _process(
+    record: Dict[str, Any],
+    tools: ResearchTools,
+    analysts: Optional[SessionPool],
+    translators: SessionPool,
+    token_budget: Optional[int],
+    map_reduce: bool = False,
+    max_results: Optional[int] = None,
+    use_llm_cache: bool = True,
+    plan: bool = False,
+) -> Dict[str, Any]:
+    """Research (and, given an analysis pool, analyze) a single query record."""
+    started = time.perf_counter()
+    output = {"id": record["id"], "query": record["query"]}
+    with metrics.stage("query"):
+        try:
+            if plan:
+                research_data = await research_planned(
+                    record["query"],
+                    sources=record["sources"],
+                    tools=tools,
+                    translator=translators,
+                    max_results=max_results,
+                    use_llm_cache=use_llm_cache,
+                )
+            else:
+                research_data = await research_query_sources(
+                    record["query"],
+                    sources=record["sources"],
+                    tools=tools,
+                    translator=translators,
+                    max_results=max_results,
+                )
+            output["results"] = research_data
+            if analysts is not None:
+                # Each query gets a fresh conversation on a warm session
+                async with analysts.acquire() as session:
+                    output["analysis"] = await analyze_with_claude(
+                        record["query"],
+                        research_data,
+                        echo=False,
+                        token_budget=token_budget,
+                        session=session,
+                        map_reduce=map_reduce,
+                        cache=tools.cache,
+                        use_llm_cache=use_llm_cache,
+                    )
+        except Exception as e:
+            output["error"] = str(e)
+    output["elapsed"] = round(time.perf_counter() - started, 3)
+    return output
+
+
+async def run_batch(
+    input_path: Path,
+    output_path: Path,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    analyze: bool = False,
+    use_cache: bool = True,
+    refresh: bool = False,
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+    use_corpus: bool = True,
+    map_reduce: bool = False,
+    max_results: Optional[int] = None,
+    use_llm_cache: bool = True,
+    plan: bool = False,
+) -> Dict[str, int]:
+    """
+    Run every query in a JSONL file and append results to a JSONL file.
+
+    Queries are read lazily and handed to a fixed pool of workers through
+    a bounded queue, so memory stays flat for arbitrarily large inputs.
+    Results are written and flushed as each query finishes; queries whose
+    ids are already present in the output file are skipped, which makes a
+    rerun resume where a crashed run stopped.
+
+    Claude sessions are pooled for the whole run: up to ``concurrency``
+    analysis sessions and a couple of translation sessions are started on
+    first use and reused by every later query.
+
+    Args:
+        input_path: JSONL file of queries
+        output_path: JSONL file receiving one result per query
+        concurrency: Number of queries processed at the same time
+        analyze: Also run the Claude analysis for each query
+        use_cache: Serve repeated searches from the response cache
+        refresh: Ignore cached responses and refetch
+        token_budget: Approximate token budget for the collected data in each prompt
+        use_corpus: Write fetched items to the local research corpus
+        map_reduce: Analyze every collected item with map-reduce summarization
+        max_results: Items to request from each source (None for the defaults)
+        use_llm_cache: Replay the report of an identical analysis from the completion cache
+        plan: Expand each query into LLM-planned sub-searches run concurrently
+
+    Returns:
+        Counts of completed, failed and skipped queries
+    """
+    done = load_checkpoint(output_path)
+    stats = {"completed": 0, "failed": 0, "skipped": 0}
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    # Make sure a truncated last line from a crashed run does not swallow the next record
+    if output_path.exists() and output_path.stat().st_size > 0:
+        with open(output_path, "rb") as f:
+            f.seek(-1, 2)
+            needs_newline = f.read(1) != b"\n"
+    else:
+        needs_newline = False
+
+    analysts = SessionPool(concurrency, create_analysis_session) if analyze else None
+    translators = SessionPool(min(concurrency, DEFAULT_TRANSLATION_SESSIONS), create_translation_session)
+
+    async with create_research_tools(
+        use_cache=use_cache, refresh=refresh, use_corpus=use_corpus
+    ) as tools, translators:
+        with open(output_path, "a", encoding="utf-8") as out:
+            if needs_newline:
+                out.write("\n")
+
+            async def worker():
+                while True:
+                    record = await queue.get()
+                    if record is None:
+                        return
+                    result = await _process(
+                        record,
+                        tools,
+                        analysts,
+                        translators,
+                        token_budget,
+                        map_reduce,
+                        max_results,
+                        use_llm_cache,
+                        plan,
+                    )
+                    size = sum(len(data.results) for data in result.get("results", {}).values())
+                    out.write(await tools.executor.run(_serialize, result, size=size))
+                    out.flush()
+                    if "error" in result:
+                        stats["failed"] += 1
+                        print(f"❌ {record['id']}: {result['error']}")
+                    else:
+                        stats["completed"] += 1
+                        print(f"✅ {record['id']} ({result['elapsed']:.1f}s)")
+
+            workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+
+            async def put(item: Optional[Dict[str, Any]]) -> None:
+                # Wait for queue space, but fail fast instead of blocking forever once a worker crashed
+                putter = asyncio.ensure_future(queue.put(item))
+                while not putter.done():
+                    running = [task for task in workers if not task.done()]
+                    await asyncio.wait([putter, *running], return_when=asyncio.FIRST_COMPLETED)
+                    for task in workers:
+                        if task.done() and not task.cancelled() and task.exception() is not None:
+                            putter.cancel()
+                            raise task.exception()
+
+            try:
+                for record in read_queries(input_path):
+                    if record["id"] in done:
+                        stats["skipped"] += 1
+                        continue
+                    await put(record)
+                for _ in workers:
+                    await put(None)
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+                if analysts is not None:
+                    await analysts.close()
+
+    return stats
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the parser for the ``batch`` subcommand.
+
+    Returns:
+        Configured ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="deep-research batch",
+        description="JSONL ファイルのクエリをまとめてリサーチします",
+    )
+    parser.add_argument("input", type=Path, help="クエリを1行1件で記述した JSONL ファイル")
+    parser.add_argument(
+        "-o", "--output",
+        type=Path,
+        default=None,
+        help="結果の出力先 JSONL（デフォルト: <input>.results.jsonl）。既存の結果はスキップして再開します",
+    )
+    parser.add_argument(
+        "-c", "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"同時に処理するクエリ数（デフォルト: {DEFAULT_CONCURRENCY}）",
+    )
+    parser.add_argument("--analyze", action="store_true", help="各クエリについて Claude による分析も実行する")
+    parser.add_argument("--no-cache", action="store_true", help="レスポンスキャッシュを使用しない")
+    parser.add_argument("--refresh", action="store_true", help="キャッシュを無視して再取得する")
+    parser.add_argument("--no-corpus", action="store_true", help="取得した結果をローカルコーパスに保存しない")
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=DEFAULT_TOKEN_BUDGET,
+        help=f"プロンプトに含める収集データのおおよそのトークン上限（デフォルト: {DEFAULT_TOKEN_BUDGET}）",
+    )
+    add_map_reduce_arguments(parser)
+    add_plan_arguments(parser)
+    add_llm_cache_arguments(parser)
+    add_worker_arguments(parser)
+    add_profile_arguments(parser)
+    return parser
+
+
+def main(argv: Optional[list[str]] = None):
+    """
+    Entry point for ``deep-research batch``.
+
+    Args:
+        argv: Arguments following the subcommand name
+    """
+    args = build_parser().parse_args(argv)
+    output_path = args.output or args.input.with_suffix(".results.jsonl")
+    if args.profile or args.profile_output:
+        metrics.enable_profiling()
+    if args.workers is not None:
+        configure_default_executor(args.workers)
+
+    print(f"📦 バッチ実行: {args.input} → {output_path}（同時実行数: {args.concurrency}）")
+    started = time.perf_counter()
+    try:
+        stats = asyncio.run(
+            run_batch(
+                args.input,
+                output_path,
+                concurrency=args.concurrency,
+                analyze=args.analyze,
+                use_cache=not args.no_cache,
+                refresh=args.refresh,
+                token_budget=args.token_budget,
+                use_corpus=not args.no_corpus,
+                map_reduce=args.map_reduce,
+                max_results=args.max_results,
+                use_llm_cache=not args.no_llm_cache,
+                plan=args.plan,
+            )
+        )
+    finally:
+        get_default_executor().close()
+    elapsed = time.perf_counter() - started
+    print(
+        f"\n🏁 完了: {stats['completed']} 件成功、{stats['failed']} 件失敗、"
+        f"{stats['skipped']} 件スキップ（{elapsed:.1f}秒）"
+    )
+    if metrics.get_profiler().enabled:
+        processed = stats["completed"] + stats["failed"]
+        print(f"📈 スループット: {processed / elapsed:.2f} クエリ/秒")
+        metrics.report(args.profile_output)
@@ -0,0 +1,517 @@
+"""Response cache for research tool searches (in-memory LRU over SQLite), HTTP validator store and Claude reply cache."""
+
+import dataclasses
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .records import dumps, loads
+
+
+def default_cache_dir() -> Path:
+    """
+    Directory of the on-disk stores, unless a path is given explicitly.
+
+    Read on every call rather than at import time, so DEEP_RESEARCH_CACHE_DIR
+    set in the .env file (loaded when the CLI starts) takes effect.
+
+    Returns:
+        DEEP_RESEARCH_CACHE_DIR, or ~/.cache/deep-research when it is not set
+    """
+    return Path(os.getenv("DEEP_RESEARCH_CACHE_DIR", "~/.cache/deep-research")).expanduser()
+
+# Time-to-live per source, in seconds
+DEFAULT_TTLS = {
+    "reddit": 60 * 60,  # Discussions move quickly
+    "arxiv": 24 * 60 * 60,  # New submissions are published daily
+    "youtube": 6 * 60 * 60,  # Search quota is expensive; view counts can lag a little
+    "medium": 60 * 60,  # Tag feeds list the latest stories
+    "translation": 30 * 24 * 60 * 60,  # Translations do not go stale
+    "summary": 30 * 24 * 60 * 60,  # Map-reduce chunk summaries are keyed by their exact input
+}
+DEFAULT_TTL = 60 * 60
+
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Size budget of the response bodies kept for answering 304 Not Modified
+DEFAULT_VALIDATOR_BYTES = 32 * 1024 * 1024
+
+# Size budget and lifetime of cached Claude replies
+DEFAULT_COMPLETION_BYTES = 64 * 1024 * 1024
+DEFAULT_COMPLETION_TTL = 30 * 24 * 60 * 60
+
+# ETag, Last-Modified and decoded body of the last complete response for a URL
+Validators = Tuple[Optional[str], Optional[str], bytes]
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query so trivially different spellings share a cache entry.
+
+    Args:
+        query: Raw query text
+
+    Returns:
+        NFKC-normalized, case-folded query with collapsed whitespace
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+def make_cache_key(source: str, query: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Build a stable cache key from the source, query and request parameters.
+
+    Args:
+        source: Source identifier (e.g. "reddit")
+        query: Search query
+        params: Additional parameters that change the result
+
+    Returns:
+        Hex digest identifying the request
+    """
+    payload = json.dumps(
+        [source, normalize_query(query), params or {}],
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryLRU:
+    """Bounded in-memory LRU mapping keys to (expires_at, value) pairs."""
+
+    def __init__(self, max_entries: int = DEFAULT_MEMORY_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, expires_at: float, value: Any) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class SQLiteStore:
+    """Size-bounded on-disk store that evicts the least recently used entries."""
+
+    def __init__(self, path: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+        )
+        self.conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        row = self.conn.execute(
+            "SELECT expires_at, value FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self.conn.execute(
+            "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+        )
+        self.conn.commit()
+        return row[0], loads(row[1])
+
+    def set(self, key: str, source: str, expires_at: float, value: Any) -> None:
+        text = dumps(value)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+            (key, source, text, len(text.encode("utf-8")), expires_at, time.time()),
+        )
+        self._evict()
+        self.conn.commit()
+
+    def delete(self, key: str) -> None:
+        self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        self.conn.commit()
+
+    def clear(self) -> None:
+        self.conn.execute("DELETE FROM responses")
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones until under budget."""
+        self.conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims = []
+        for key, size in self.conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+
+class ResponseCache:
+    """
+    Two-level cache for search responses.
+
+    Lookups hit a small in-memory LRU first and fall back to the on-disk
+    store, so repeated queries within a process are served from memory and
+    repeated queries across runs are served without touching the network.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttls: Optional[Dict[str, float]] = None,
+        memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        store: Optional[SQLiteStore] = None,
+    ):
+        """
+        Args:
+            path: SQLite file for the on-disk store (default: responses.sqlite3 under default_cache_dir())
+            ttls: Per-source time-to-live overrides in seconds
+            memory_entries: Capacity of the in-memory LRU
+            max_bytes: Size budget of the on-disk store
+            store: Pre-built on-disk store (overrides path and max_bytes)
+        """
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.memory = MemoryLRU(memory_entries)
+        self.store = store or SQLiteStore(
+            path or default_cache_dir() / "responses.sqlite3", max_bytes=max_bytes
+        )
+
+    def ttl_for(self, source: str) -> float:
+        return self.ttls.get(source, DEFAULT_TTL)
+
+    def get(self, source: str, query: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """
+        Look up a cached response.
+
+        Args:
+            source: Source identifier
+            query: Search query
+            params: Request parameters
+
+        Returns:
+            Cached value, or None on a miss or expired entry
+        """
+        key = make_cache_key(source, query, params)
+        now = time.time()
+
+        entry = self.memory.get(key)
+        if entry is None:
+            entry = self.store.get(key)
+            if entry is not None:
+                self.memory.set(key, *entry)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= now:
+            self.memory.delete(key)
+            self.store.delete(key)
+            return None
+        return value
+
+    def set(self, source: str, query: str, params: Optional[Dict[str, Any]], value: Any) -> None:
+        """
+        Store a response.
+
+        Args:
+            source: Source identifier
+            query: Search query
+            params: Request parameters
+            value: JSON-serializable response (records are stored as their JSON form)
+        """
+        key = make_cache_key(source, query, params)
+        expires_at = time.time() + self.ttl_for(source)
+        self.memory.set(key, expires_at, value)
+        self.store.set(key, source, expires_at, value)
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        self.memory.clear()
+        self.store.clear()
+
+    def close(self) -> None:
+        """Close the on-disk store."""
+        self.store.close()
+
+
+class ValidatorStore:
+    """
+    Size-bounded on-disk store of HTTP validators for conditional requests.
+
+    For every request URL (query parameters included) it keeps the ETag
+    and Last-Modified of the last complete response along with the decoded
+    body, so the next request can be sent with If-None-Match /
+    If-Modified-Since and a 304 answered from disk. Unlike ResponseCache
+    entries, validators never expire: the server decides whether the
+    stored body is still current. Least recently used bodies are evicted
+    once ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_bytes: int = DEFAULT_VALIDATOR_BYTES):
+        """
+        Args:
+            path: SQLite file (default: validators.sqlite3 under default_cache_dir())
+            max_bytes: Size budget of the stored bodies
+        """
+        self.path = Path(path or default_cache_dir() / "validators.sqlite3")
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS validators (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS validators_accessed ON validators (accessed_at)"
+        )
+        self.conn.commit()
+
+    def get(self, url: str) -> Optional[Validators]:
+        """
+        Look up the validators stored for a URL.
+
+        Args:
+            url: Full request URL including query parameters
+
+        Returns:
+            (etag, last_modified, body), or None if nothing is stored
+        """
+        row = self.conn.execute(
+            "SELECT etag, last_modified, body FROM validators WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        self.conn.execute(
+            "UPDATE validators SET accessed_at = ? WHERE url = ?", (time.time(), url)
+        )
+        self.conn.commit()
+        return row[0], row[1], bytes(row[2])
+
+    def set(self, url: str, etag: Optional[str], last_modified: Optional[str], body: bytes) -> None:
+        """
+        Store the validators and body of a complete response.
+
+        Args:
+            url: Full request URL including query parameters
+            etag: ETag response header
+            last_modified: Last-Modified response header
+            body: Decoded response body
+        """
+        self.conn.execute(
+            "INSERT OR REPLACE INTO validators VALUES (?, ?, ?, ?, ?, ?)",
+            (url, etag, last_modified, body, len(body), time.time()),
+        )
+        self._evict()
+        self.conn.commit()
+
+    def clear(self) -> None:
+        self.conn.execute("DELETE FROM validators")
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _evict(self) -> None:
+        """Drop least recently used bodies until under budget."""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM validators").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims = []
+        for url, size in self.conn.execute(
+            "SELECT url, size FROM validators ORDER BY accessed_at"
+        ):
+            victims.append((url,))
+            excess -= size
+            if excess <= 0:
+                break
+        self.conn.executemany("DELETE FROM validators WHERE url = ?", victims)
+
+
+def options_fingerprint(options: Any) -> Dict[str, Any]:
+    """
+    Reduce an options dataclass (e.g. ClaudeAgentOptions) to its JSON-serializable settings.
+
+    Callables, streams and other values without a stable JSON form are
+    skipped; they do not change what the model is asked.
+
+    Args:
+        options: Dataclass instance
+
+    Returns:
+        Field values keyed by field name
+    """
+    values = {}
+    for f in dataclasses.fields(options):
+        value = getattr(options, f.name)
+        if isinstance(value, Path):
+            value = str(value)
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            continue
+        values[f.name] = value
+    return values
+
+
+class CompletionCache:
+    """
+    Content-addressed cache of Claude replies.
+
+    A reply is keyed by a hash of the exact prompt and the options it was
+    sent with, so re-analyzing the same research data (a rerun, a demo, the
+    same topic in another mode) is answered from disk instead of paying the
+    full model latency again. The streamed text blocks are stored in order
+    so a hit can be replayed the way it was first printed. Entries live in
+    their own size-bounded store and the least recently used are evicted.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_bytes: int = DEFAULT_COMPLETION_BYTES,
+        ttl: float = DEFAULT_COMPLETION_TTL,
+    ):
+        """
+        Args:
+            path: SQLite file (default: completions.sqlite3 under default_cache_dir())
+            max_bytes: Size budget of the stored replies
+            ttl: Seconds a reply is kept
+        """
+        self.responses = ResponseCache(
+            path=path or default_cache_dir() / "completions.sqlite3",
+            ttls={"completion": ttl},
+            max_bytes=max_bytes,
+        )
+
+    @staticmethod
+    def _params(prompt: str, options: Any) -> Dict[str, Any]:
+        # The prompt goes into the hashed params, not the query, so it is not case-folded
+        return {"prompt": prompt, "options": options_fingerprint(options)}
+
+    def get(self, prompt: str, options: Any) -> Optional[List[str]]:
+        """
+        Look up the reply to a prompt.
+
+        Args:
+            prompt: Full prompt text
+            options: ClaudeAgentOptions the prompt is sent with
+
+        Returns:
+            Text blocks of the stored reply, or None on a miss
+        """
+        return self.responses.get("completion", "", self._params(prompt, options))
+
+    def set(self, prompt: str, options: Any, blocks: List[str]) -> None:
+        """
+        Store the reply to a prompt.
+
+        Args:
+            prompt: Full prompt text
+            options: ClaudeAgentOptions the prompt was sent with
+            blocks: Text blocks of the reply, in the order they were streamed
+        """
+        self.responses.set("completion", "", self._params(prompt, options), blocks)
+
+    def clear(self) -> None:
+        """Remove every cached reply."""
+        self.responses.clear()
+
+    def close(self) -> None:
+        """Close the on-disk store."""
+        self.responses.close()
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_validators: Optional[ValidatorStore] = None
+_default_completions: Optional[CompletionCache] = None
+
+
+def get_default_cache() -> ResponseCache:
+    """
+    Get the process-wide response cache, creating it on first use.
+
+    Returns:
+        Shared ResponseCache instance
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResponseCache()
+    return _default_cache
+
+
+def get_default_validators() -> ValidatorStore:
+    """
+    Get the process-wide validator store, creating it on first use.
+
+    Returns:
+        Shared ValidatorStore instance
+    """
+    global _default_validators
+    if _default_validators is None:
+        _default_validators = ValidatorStore()
+    return _default_validators
+
+
+def get_default_completions() -> CompletionCache:
+    """
+    Get the process-wide Claude reply cache, creating it on first use.
+
+    Returns:
+        Shared CompletionCache instance
+    """
+    global _default_completions
+    if _default_completions is None:
+        _default_completions = CompletionCache()
+    return _default_completions
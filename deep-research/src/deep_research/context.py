@@ -0,0 +1,217 @@
+"""Compact, token-budgeted rendering of research results for LLM prompts."""
+
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .executor import PostProcessor, get_default_executor
+from .ranking import DEFAULT_TOP_K, ResultIndex
+from .records import ResearchItem, SourceResult, to_dict
+
+
+# Approximate number of prompt tokens spent on collected data
+DEFAULT_TOKEN_BUDGET = 6000
+
+# Maximum length of the body text (selftext, summary, ...) kept per item
+DEFAULT_SNIPPET_CHARS = 300
+
+# Fields rendered on the item's metadata line, in order, with their labels
+_META_FIELDS = [
+    ("subreddit", "r/{}"),
+    ("channel", "{}"),
+    ("score", "score {}"),
+    ("num_comments", "{} comments"),
+    ("view_count", "{} views"),
+    ("published", "{}"),
+    ("authors", "{}"),
+    ("primary_category", "{}"),
+]
+
+# Fields holding the item's body text, in order of preference
+_BODY_FIELDS = ["summary", "selftext", "description"]
+
+
+@dataclass
+class ResearchContext:
+    """Rendered prompt context together with its size accounting."""
+
+    text: str
+    estimated_tokens: int
+    baseline_tokens: int
+    items_included: int
+    items_dropped: int
+    duplicates_removed: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        """Estimated tokens saved compared to pasting the raw JSON."""
+        return max(0, self.baseline_tokens - self.estimated_tokens)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimate the number of LLM tokens in a text.
+
+    ASCII text averages about four characters per token, while Japanese
+    and other non-ASCII characters are closer to one token each.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def render_item(item: ResearchItem, snippet_chars: int = DEFAULT_SNIPPET_CHARS) -> str:
+    """
+    Render one result item as a compact bullet.
+
+    Args:
+        item: Result item from a ResearchTools search
+        snippet_chars: Maximum length of the body text
+
+    Returns:
+        Bullet text (title and metadata line, followed by an indented snippet)
+    """
+    meta = []
+    for field, template in _META_FIELDS:
+        value = getattr(item, field, None)
+        if not value:
+            continue
+        if field == "published":
+            value = str(value)[:10]
+        elif isinstance(value, list):
+            value = ", ".join(value[:3]) + (" et al." if len(value) > 3 else "")
+        meta.append(template.format(value))
+
+    line = f"- {item.title.strip()}"
+    if meta:
+        line += f" ({'; '.join(meta)})"
+    if item.url:
+        line += f" {item.url}"
+
+    for field in _BODY_FIELDS:
+        body = " ".join(getattr(item, field, "").split())
+        if body:
+            if len(body) > snippet_chars:
+                body = body[:snippet_chars].rstrip() + "…"
+            line += f"\n  {body}"
+            break
+    return line
+
+
+def build_context(
+    user_query: str,
+    research_data: Dict[str, SourceResult],
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+    snippet_chars: int = DEFAULT_SNIPPET_CHARS,
+    top_k: Optional[int] = DEFAULT_TOP_K,
+) -> ResearchContext:
+    """
+    Build the prompt context describing the collected research data.
+
+    Every item goes through a ResultIndex: duplicate URLs and near-identical titles are removed
+    across sources, and the ``top_k`` most relevant, diverse items are kept
+    (scored against the user query and each source's translated query).
+    The survivors are then admitted round-robin across sources, in
+    relevance order, until the token budget is used, so no single source
+    can crowd out the others.
+
+    Args:
+        user_query: The original user query
+        research_data: Results keyed by source, as returned by research_query_sources
+        token_budget: Approximate token budget for the items (None for unlimited)
+        snippet_chars: Maximum length of each item's body text
+        top_k: Number of items kept after ranking (None for all)
+
+    Returns:
+        ResearchContext with the rendered text and token estimates
+    """
+    index = ResultIndex()
+    errors: Dict[str, str] = {}
+    queries = [user_query]
+    total_items = 0
+
+    for source, data in research_data.items():
+        if data.error:
+            errors[source] = data.error
+        if data.query:
+            queries.append(data.query)
+        for item in data.results:
+            total_items += 1
+            index.add(source, item)
+
+    candidates: Dict[str, List[str]] = {source: [] for source in research_data}
+    for entry in index.top_k(queries, top_k):
+        candidates[entry.source].append(render_item(entry.item, snippet_chars))
+
+    # Round-robin admission across sources until the budget is exhausted
+    admitted: Dict[str, List[str]] = {source: [] for source in research_data}
+    used = 0
+    depth = 0
+    while any(depth < len(items) for items in candidates.values()):
+        for source, items in candidates.items():
+            if depth >= len(items):
+                continue
+            cost = estimate_tokens(items[depth]) + 1
+            if token_budget is not None and used + cost > token_budget:
+                continue
+            admitted[source].append(items[depth])
+            used += cost
+        depth += 1
+
+    sections = []
+    for source in research_data:
+        header = f"## {source.upper()}"
+        if admitted[source]:
+            sections.append(header + "\n" + "\n".join(admitted[source]))
+        elif source in errors:
+            sections.append(f"{header}\n(取得失敗: {errors[source]})")
+        else:
+            sections.append(f"{header}\n(該当なし)")
+
+    text = f"ユーザーのクエリ: {user_query}\n\n収集したデータ:\n\n" + "\n\n".join(sections) + "\n"
+
+    baseline = f"ユーザーのクエリ: {user_query}\n\n収集したデータ:\n\n"
+    for source, data in research_data.items():
+        baseline += f"\n## {source.upper()} からの結果:\n"
+        baseline += json.dumps(to_dict(data), ensure_ascii=False, indent=2) + "\n"
+
+    included = sum(len(items) for items in admitted.values())
+    return ResearchContext(
+        text=text,
+        estimated_tokens=estimate_tokens(text),
+        baseline_tokens=estimate_tokens(baseline),
+        items_included=included,
+        items_dropped=total_items - included,
+        duplicates_removed=index.url_duplicates + index.near_duplicates,
+    )
+
+
+async def build_context_async(
+    user_query: str,
+    research_data: Dict[str, SourceResult],
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+    executor: Optional[PostProcessor] = None,
+) -> ResearchContext:
+    """
+    build_context run in a worker process, keeping the event loop free.
+
+    Ranking a large result set takes long enough to stall concurrent
+    fetches; small ones are still built inline.
+
+    Args:
+        user_query: The original user query
+        research_data: Results keyed by source, as returned by research_query_sources
+        token_budget: Approximate token budget for the items (None for unlimited)
+        executor: Process pool to use (default: the process-wide one)
+
+    Returns:
+        ResearchContext with the rendered text and token estimates
+    """
+    executor = executor or get_default_executor()
+    size = sum(len(data.results) for data in research_data.values())
+    return await executor.run(build_context, user_query, research_data, token_budget, size=size)
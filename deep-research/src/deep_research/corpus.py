@@ -0,0 +1,283 @@
+"""Local full-text corpus of every item collected by ResearchTools (SQLite FTS5)."""
+
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .cache import default_cache_dir, make_cache_key, normalize_query
+from .ranking import canonicalize_url, tokenize
+from .records import ResearchItem, dumps, item_from_dict, loads
+
+
+# Text fields indexed for full-text search, besides the title
+_BODY_FIELDS = ["summary", "selftext", "description"]
+
+# Title matches weigh more than body matches in the bm25() ranking
+_TITLE_WEIGHT = 2.0
+_BODY_WEIGHT = 1.0
+
+
+def item_key(item: ResearchItem) -> str:
+    """Identify an item by its canonical URL, falling back to its title."""
+    return canonicalize_url(item.url) or "title:" + normalize_query(item.title)
+
+
+def _index_text(text: str) -> str:
+    """
+    Pre-tokenize text for FTS5.
+
+    FTS5's unicode61 tokenizer does not segment Japanese, so text is stored
+    as the ranking module's terms (words and CJK bigrams) joined by spaces.
+    """
+    return " ".join(tokenize(text))
+
+
+# An item prepared for writing: (key, JSON data, indexed title, indexed body)
+PreparedItem = Tuple[str, str, str, str]
+
+
+def prepare_items(items: List[ResearchItem]) -> List[Optional[PreparedItem]]:
+    """
+    Compute the rows ``upsert`` writes for each item.
+
+    This is the CPU-heavy part of indexing (URL canonicalization,
+    tokenization and JSON encoding) and touches no database, so it can run
+    in a worker process.
+
+    Args:
+        items: Result items from a ResearchTools search
+
+    Returns:
+        One prepared row per item, None for items without a URL or title
+    """
+    prepared: List[Optional[PreparedItem]] = []
+    for item in items:
+        key = item_key(item)
+        if key == "title:":
+            prepared.append(None)
+            continue
+        body = " ".join(getattr(item, field, "") for field in _BODY_FIELDS)
+        prepared.append((key, dumps(item), _index_text(item.title), _index_text(body)))
+    return prepared
+
+
+def _match_expression(query: str) -> Optional[str]:
+    """Build an FTS5 query requiring every term of the query."""
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms)
+
+
+class ResearchCorpus:
+    """
+    Persistent full-text index of fetched Reddit posts, ArXiv entries, etc.
+
+    Items are upserted by canonical URL, so refetching a topic refreshes
+    existing rows instead of duplicating them. Each network search is also
+    recorded, which lets callers tell whether a query was already fetched
+    recently (and can be answered locally) or is a gap.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Args:
+            path: SQLite file holding the corpus (default: corpus.sqlite3 under default_cache_dir())
+        """
+        self.path = Path(path or default_cache_dir() / "corpus.sqlite3")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS items (
+                id INTEGER PRIMARY KEY,
+                key TEXT NOT NULL UNIQUE,
+                source TEXT NOT NULL,
+                data TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS items_source ON items (source);
+            CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5 (
+                title, body, tokenize = 'unicode61'
+            );
+            CREATE TABLE IF NOT EXISTS searches (
+                key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                query TEXT NOT NULL,
+                item_keys TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            """
+        )
+        self.conn.commit()
+
+    def upsert(
+        self,
+        source: str,
+        items: Iterable[ResearchItem],
+        prepared: Optional[List[Optional[PreparedItem]]] = None,
+    ) -> int:
+        """
+        Insert new items and refresh existing ones.
+
+        Args:
+            source: Source identifier (e.g. "reddit")
+            items: Result items from a ResearchTools search
+            prepared: The items' rows from prepare_items, if already computed
+
+        Returns:
+            Number of items written
+        """
+        if prepared is None:
+            prepared = prepare_items(list(items))
+        now = time.time()
+        written = 0
+        for row in prepared:
+            if row is None:
+                continue
+            key, data, title, body = row
+            row = self.conn.execute(
+                """
+                INSERT INTO items (key, source, data, first_seen, fetched_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET data = excluded.data, fetched_at = excluded.fetched_at
+                RETURNING id
+                """,
+                (key, source, data, now, now),
+            ).fetchone()
+            self.conn.execute("DELETE FROM items_fts WHERE rowid = ?", (row[0],))
+            self.conn.execute(
+                "INSERT INTO items_fts (rowid, title, body) VALUES (?, ?, ?)",
+                (row[0], title, body),
+            )
+            written += 1
+        self.conn.commit()
+        return written
+
+    def record_search(
+        self,
+        source: str,
+        query: str,
+        items: List[ResearchItem],
+        prepared: Optional[List[Optional[PreparedItem]]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Store the results of a network search and remember that it ran.
+
+        Args:
+            source: Source identifier
+            query: Query sent to the source
+            items: Items the source returned
+            prepared: The items' rows from prepare_items, if already computed
+            params: Request parameters of the search (see tools.search_params)
+        """
+        if prepared is None:
+            prepared = prepare_items(items)
+        self.upsert(source, items, prepared)
+        keys = [row[0] for row in prepared if row is not None]
+        self.conn.execute(
+            "INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?, ?)",
+            (
+                make_cache_key(source, query, params),
+                source,
+                normalize_query(query),
+                dumps(keys),
+                time.time(),
+            ),
+        )
+        self.conn.commit()
+
+    def last_search(
+        self, source: str, query: str, params: Optional[Dict[str, Any]] = None
+    ) -> Optional[Tuple[float, List[ResearchItem]]]:
+        """
+        Look up the last network search for a query.
+
+        Args:
+            source: Source identifier
+            query: Query sent to the source
+            params: Request parameters of the search (see tools.search_params)
+
+        Returns:
+            (fetch time, items in the order the source returned them), or None if never fetched
+        """
+        row = self.conn.execute(
+            "SELECT item_keys, fetched_at FROM searches WHERE key = ?",
+            (make_cache_key(source, query, params),),
+        ).fetchone()
+        if row is None:
+            return None
+        keys = loads(row[0])
+        stored = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for key, data in self.conn.execute(
+                f"SELECT key, data FROM items WHERE key IN ({placeholders})", chunk
+            ):
+                stored[key] = item_from_dict(source, loads(data))
+        return row[1], [stored[key] for key in keys if key in stored]
+
+    def search(self, query: str, source: Optional[str] = None, limit: int = 10) -> List[ResearchItem]:
+        """
+        Full-text search over the stored items, best matches first.
+
+        Every query term must occur in the title or body; matches are ranked
+        by BM25 with title hits weighted higher.
+
+        Args:
+            query: Search query
+            source: Restrict to one source (None for all)
+            limit: Maximum number of items
+
+        Returns:
+            Stored items
+        """
+        expression = _match_expression(query)
+        if expression is None:
+            return []
+        sql = """
+            SELECT items.source, items.data
+            FROM items_fts JOIN items ON items.id = items_fts.rowid
+            WHERE items_fts MATCH ?
+        """
+        params: List[Any] = [expression]
+        if source is not None:
+            sql += " AND items.source = ?"
+            params.append(source)
+        sql += f" ORDER BY bm25(items_fts, {_TITLE_WEIGHT}, {_BODY_WEIGHT}) LIMIT ?"
+        params.append(limit)
+        return [
+            item_from_dict(item_source, loads(data))
+            for item_source, data in self.conn.execute(sql, params)
+        ]
+
+    def count(self, source: Optional[str] = None) -> int:
+        if source is None:
+            return self.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM items WHERE source = ?", (source,)
+        ).fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+_default_corpus: Optional[ResearchCorpus] = None
+
+
+def get_default_corpus() -> ResearchCorpus:
+    """
+    Get the process-wide research corpus, creating it on first use.
+
+    Returns:
+        Shared ResearchCorpus instance
+    """
+    global _default_corpus
+    if _default_corpus is None:
+        _default_corpus = ResearchCorpus()
+    return _default_corpus
@@ -0,0 +1,161 @@
+"""Process pool for CPU-bound post-processing of search results, with chunking and backpressure."""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, List, Optional, Sequence, TypeVar
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Items handed to a worker per task; also the size below which a job runs inline
+DEFAULT_CHUNK_SIZE = 500
+
+# Tasks queued per worker before submitters have to wait
+DEFAULT_PENDING_PER_WORKER = 2
+
+
+def default_workers() -> int:
+    """
+    Number of worker processes used when none is configured.
+
+    One per core; a single-core machine runs inline, since workers there
+    would only add pickling and IPC on top of the same CPU time.
+    """
+    cores = os.cpu_count() or 1
+    return cores if cores > 1 else 0
+
+
+class PostProcessor:
+    """
+    Runs CPU-heavy post-processing (tokenizing, ranking, index preparation)
+    off the event loop.
+
+    Work is sent to a ProcessPoolExecutor so that parsing and ranking large
+    result sets neither blocks network I/O nor competes for the GIL, and
+    concurrent queries spread across all cores. The pool is started on
+    first use. At most ``max_pending`` tasks are submitted at a time;
+    further callers wait, which keeps a fast producer from queueing
+    unbounded pickled payloads. Jobs smaller than ``chunk_size`` items run
+    inline, where the round trip to a worker would cost more than the work.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_pending: Optional[int] = None,
+    ):
+        """
+        Args:
+            workers: Worker processes (None for default_workers(), 0 to run everything inline)
+            chunk_size: Items per task handed to a worker
+            max_pending: Tasks in flight before submitters wait
+                (default: DEFAULT_PENDING_PER_WORKER per worker)
+        """
+        self.workers = default_workers() if workers is None else workers
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending or max(1, self.workers) * DEFAULT_PENDING_PER_WORKER
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def inline(self) -> bool:
+        """True when no worker processes are used."""
+        return self.workers <= 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned workers do not inherit the parent's threads, sockets or SQLite handles
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    async def run(self, fn: Callable[..., R], *args: Any, size: Optional[int] = None) -> R:
+        """
+        Run a picklable function in a worker process.
+
+        Args:
+            fn: Module-level function to call
+            *args: Picklable arguments
+            size: Number of items the call processes; calls below ``chunk_size``
+                run inline (None always uses a worker)
+
+        Returns:
+            The function's return value
+        """
+        if self.inline or (size is not None and size < self.chunk_size):
+            return fn(*args)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor(), partial(fn, *args))
+
+    async def map_chunks(
+        self,
+        fn: Callable[[List[T]], List[R]],
+        items: Sequence[T],
+        chunk_size: Optional[int] = None,
+    ) -> List[R]:
+        """
+        Apply a list-to-list function to items in chunks spread over the workers.
+
+        Args:
+            fn: Module-level function mapping a chunk of items to one result per item
+            items: Items to process
+            chunk_size: Items per task (default: the processor's chunk size)
+
+        Returns:
+            Concatenated results, in item order
+        """
+        chunk_size = chunk_size or self.chunk_size
+        if self.inline or len(items) < chunk_size:
+            return fn(list(items))
+        chunks = [list(items[start:start + chunk_size]) for start in range(0, len(items), chunk_size)]
+        parts = await asyncio.gather(*(self.run(fn, chunk) for chunk in chunks))
+        return [result for part in parts for result in part]
+
+    def close(self) -> None:
+        """Stop the worker processes, dropping queued tasks."""
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+_default_executor: Optional[PostProcessor] = None
+
+
+def configure_default_executor(workers: Optional[int] = None) -> PostProcessor:
+    """
+    Replace the process-wide post-processor, e.g. from a ``--workers`` switch.
+
+    Args:
+        workers: Worker processes (None for default_workers(), 0 to run inline)
+
+    Returns:
+        The new shared PostProcessor
+    """
+    global _default_executor
+    if _default_executor is not None:
+        _default_executor.close()
+    _default_executor = PostProcessor(workers)
+    return _default_executor
+
+
+def get_default_executor() -> PostProcessor:
+    """
+    Get the process-wide post-processor, creating it on first use.
+
+    Returns:
+        Shared PostProcessor instance
+    """
+    global _default_executor
+    if _default_executor is None:
+        _default_executor = PostProcessor()
+    return _default_executor
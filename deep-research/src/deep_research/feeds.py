@@ -0,0 +1,189 @@
+"""Incremental parsers for the XML feeds returned by research sources (ArXiv Atom, RSS)."""
+
+import html
+import re
+import xml.etree.ElementTree as ET
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Optional
+
+from .records import ArxivPaper, MediumArticle
+
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+ARXIV_NS = "{http://arxiv.org/schemas/atom}"
+DC_NS = "{http://purl.org/dc/elements/1.1/}"
+CONTENT_NS = "{http://purl.org/rss/1.0/modules/content/}"
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+# Maximum length of summaries kept per entry
+SUMMARY_LENGTH = 500
+
+
+def _text(elem: Optional[ET.Element]) -> str:
+    """Return the element text with runs of whitespace collapsed."""
+    if elem is None or elem.text is None:
+        return ""
+    return " ".join(elem.text.split())
+
+
+def parse_arxiv_entry(entry: ET.Element) -> ArxivPaper:
+    """
+    Extract metadata from an ArXiv Atom ``<entry>`` element.
+
+    Args:
+        entry: Parsed entry element
+
+    Returns:
+        ArxivPaper with title, summary, links, authors and categories
+    """
+    pdf_url = ""
+    for link in entry.iter(ATOM_NS + "link"):
+        if link.get("title") == "pdf":
+            pdf_url = link.get("href", "")
+            break
+
+    primary = entry.find(ARXIV_NS + "primary_category")
+
+    return ArxivPaper(
+        title=_text(entry.find(ATOM_NS + "title")),
+        summary=_text(entry.find(ATOM_NS + "summary"))[:SUMMARY_LENGTH],
+        url=_text(entry.find(ATOM_NS + "id")),
+        pdf_url=pdf_url,
+        published=_text(entry.find(ATOM_NS + "published")),
+        updated=_text(entry.find(ATOM_NS + "updated")),
+        authors=[
+            _text(author.find(ATOM_NS + "name"))
+            for author in entry.iter(ATOM_NS + "author")
+        ],
+        primary_category=primary.get("term", "") if primary is not None else "",
+        categories=[
+            category.get("term", "")
+            for category in entry.iter(ATOM_NS + "category")
+        ],
+    )
+
+
+async def iter_arxiv_entries(
+    chunks: AsyncIterator[bytes],
+    max_entries: Optional[int] = None,
+) -> AsyncIterator[ArxivPaper]:
+    """
+    Parse an ArXiv Atom feed incrementally while it is being downloaded.
+
+    Each entry is yielded as soon as its closing tag arrives and is then
+    detached from the tree, so memory stays bounded regardless of how many
+    entries the feed contains. Parsing stops once ``max_entries`` entries
+    have been produced, leaving the rest of the body unread.
+
+    Args:
+        chunks: Raw response body chunks (e.g. ``response.aiter_bytes()``)
+        max_entries: Stop after this many entries (None for all)
+
+    Yields:
+        Entries as produced by parse_arxiv_entry
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    count = 0
+
+    async for chunk in chunks:
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = elem
+                continue
+            if elem.tag != ATOM_NS + "entry":
+                continue
+
+            entry = parse_arxiv_entry(elem)
+            root.remove(elem)
+            if entry.title and entry.summary:
+                yield entry
+                count += 1
+                if max_entries is not None and count >= max_entries:
+                    return
+
+    parser.close()
+
+
+def _plain_text(markup: str) -> str:
+    """Strip HTML tags and entities, collapsing whitespace."""
+    return " ".join(html.unescape(_TAG_RE.sub(" ", markup)).split())
+
+
+def _rss_date(text: str) -> str:
+    """Convert an RFC 822 ``pubDate`` to ISO 8601, like Atom dates (unparsable dates are kept as is)."""
+    try:
+        return parsedate_to_datetime(text).isoformat()
+    except (TypeError, ValueError):
+        return text
+
+
+def parse_rss_item(item: ET.Element) -> MediumArticle:
+    """
+    Extract metadata from an RSS ``<item>`` element of a Medium feed.
+
+    Args:
+        item: Parsed item element
+
+    Returns:
+        MediumArticle with title, link, author, date, tags and a plain-text summary
+    """
+    content = item.find(CONTENT_NS + "encoded")
+    if content is None:
+        content = item.find("description")
+    body = content.text if content is not None and content.text else ""
+
+    return MediumArticle(
+        title=_text(item.find("title")),
+        url=_text(item.find("link")),
+        author=_text(item.find(DC_NS + "creator")),
+        published=_rss_date(_text(item.find("pubDate"))),
+        categories=[_text(category) for category in item.iter("category")],
+        summary=_plain_text(body)[:SUMMARY_LENGTH],
+    )
+
+
+async def iter_rss_items(
+    chunks: AsyncIterator[bytes],
+    max_items: Optional[int] = None,
+) -> AsyncIterator[MediumArticle]:
+    """
+    Parse an RSS 2.0 feed (such as Medium's tag feeds) incrementally.
+
+    Like iter_arxiv_entries, each ``<item>`` is yielded as soon as it has
+    been read and then dropped from the tree.
+
+    Args:
+        chunks: Raw response body chunks
+        max_items: Stop after this many items (None for all)
+
+    Yields:
+        Items as produced by parse_rss_item
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    channel = None
+    count = 0
+
+    async for chunk in chunks:
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == "start":
+                if elem.tag == "channel":
+                    channel = elem
+                continue
+            if elem.tag != "item":
+                continue
+
+            article = parse_rss_item(elem)
+            if channel is not None:
+                channel.remove(elem)
+            if article.title and article.url:
+                yield article
+                count += 1
+                if max_items is not None and count >= max_items:
+                    return
+
+    parser.close()
@@ -1,17 +1,78 @@
 """Main entry point for the Deep Research Agent."""
 
+import argparse
 import asyncio
+import atexit
+import importlib
 import os
-import json
+import sys
+import time
 import re
-from typing import Optional
-from dotenv import load_dotenv
-from claude_agent_sdk import query as claude_query, ClaudeAgentOptions
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import AsyncIterator, Callable, Optional, Tuple, Union
+from . import IMPORT_STARTED
+from .cache import ResponseCache, get_default_cache, get_default_completions, get_default_validators
+from .context import DEFAULT_TOKEN_BUDGET, build_context_async
+from .corpus import get_default_corpus
+from .executor import configure_default_executor, get_default_executor
+from .mapreduce import analyze_map_reduce
+from . import metrics
+from .records import SourceResult, dumps
+from .scheduler import iter_fan_out
+from .session import AgentSession, SessionPool, claude_query, complete, preload_sdk, sdk
 from .tools import ResearchTools
 
 
-# Load environment variables from .env file
-load_dotenv()
+# Display names used in result payloads, keyed by source identifier
+SOURCE_LABELS = {
+    "reddit": "Reddit",
+    "arxiv": "ArXiv",
+    "youtube": "YouTube",
+    "medium": "Medium",
+}
+
+# Sources searched when none are specified; YouTube is added when an API key is configured
+DEFAULT_SOURCES = ["reddit", "arxiv", "medium"]
+
+# Sources that need an English query; they wait for the translation of Japanese queries
+ENGLISH_ONLY_SOURCES = {"arxiv", "youtube", "medium"}
+
+# Per-source deadline and overall budget for a fan-out, in seconds
+DEFAULT_SOURCE_TIMEOUT = 20.0
+DEFAULT_TOTAL_TIMEOUT = 30.0
+
+# Translations a warm translation session answers before starting a fresh conversation
+TRANSLATION_SESSION_TURNS = 20
+
+# Anything that answers prompts: one warm session or a pool of them
+Translator = Union[AgentSession, SessionPool]
+
+
+@lru_cache(maxsize=None)
+def load_environment() -> None:
+    """
+    Load environment variables from the .env file, once.
+
+    Deferred until the CLI starts or a setting is first read, so importing
+    this module stays cheap.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def default_sources() -> list[str]:
+    """
+    Sources searched when none are specified.
+
+    Returns:
+        DEFAULT_SOURCES, plus YouTube when YOUTUBE_API_KEY is set
+    """
+    load_environment()
+    if os.getenv("YOUTUBE_API_KEY"):
+        return DEFAULT_SOURCES + ["youtube"]
+    return list(DEFAULT_SOURCES)
 
 
 def get_api_key() -> str:
@@ -24,6 +85,7 @@ def get_api_key() -> str:
     Raises:
         ValueError: If API key is not found
     """
+    load_environment()
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
         raise ValueError(
@@ -48,42 +110,84 @@ def is_japanese(text: str) -> bool:
     return bool(japanese_pattern.search(text))
 
 
-async def translate_to_english(text: str) -> str:
+async def translate_to_english(
+    text: str,
+    cache: Optional[ResponseCache] = None,
+    translator: Optional[Translator] = None,
+) -> str:
     """
     Translate Japanese text to English using Claude.
 
+    Translations are memoized in the response cache keyed by the normalized
+    Japanese text, so repeated topics skip the LLM round trip.
+
     Args:
         text: Japanese text to translate
+        cache: Response cache used as the translation memo (None disables it)
+        translator: Warm session (or pool) to ask; when omitted a one-off
+            query starts its own CLI process
 
     Returns:
         English translation
     """
-    try:
-        get_api_key()
-    except ValueError:
-        # If no API key, return original text
-        return text
-
-    prompt = f"""Translate the following Japanese text to English.
+    with metrics.stage("translate") as span:
+        if cache is not None:
+            memo = cache.get("translation", text)
+            if memo is not None:
+                span.add("cache_hits")
+                return memo
+
+        try:
+            get_api_key()
+        except ValueError:
+            # If no API key, return original text
+            return text
+
+        prompt = f"""Translate the following Japanese text to English.
 Only output the English translation, nothing else.
 
 Japanese text: {text}
 
 English translation:"""
 
-    options = ClaudeAgentOptions()
-    translation = ""
+        translation = ""
+        if translator is not None:
+            translation = await translator.ask(prompt)
+        else:
+            claude = sdk()
+            options = claude.ClaudeAgentOptions()
+
+            async for event in claude_query(prompt=prompt, options=options):
+                if isinstance(event, claude.AssistantMessage):
+                    if hasattr(event, 'content'):
+                        for block in event.content:
+                            if isinstance(block, claude.TextBlock):
+                                translation += block.text
+
+        translation = translation.strip()
+        if cache is not None and translation:
+            cache.set("translation", text, None, translation)
+        return translation
+
 
-    from claude_agent_sdk.types import AssistantMessage, TextBlock
+# Report format requested after the collected data
+REPORT_INSTRUCTIONS = """
+上記のデータを分析し、以下の形式で包括的なレポートを作成してください：
+
+1. **概要**: トピックの全体像
+2. **主要な発見**: 各ソースからの重要な洞察
+3. **共通テーマ**: 複数のソースで言及されているパターン
+4. **推奨事項**: さらに調査すべき領域や次のステップ
 
-    async for event in claude_query(prompt=prompt, options=options):
-        if isinstance(event, AssistantMessage):
-            if hasattr(event, 'content'):
-                for block in event.content:
-                    if isinstance(block, TextBlock):
-                        translation += block.text
+日本語で分かりやすく回答してください。
+"""
 
-    return translation.strip()
+# Follow-up turn sent when more sources arrive during a pipelined analysis
+FOLLOW_UP_INSTRUCTIONS = """
+上記は新たに届いたデータです。これまでのレポートを踏まえ、このデータから得られる
+追加の発見、共通テーマの更新、推奨事項の補足を日本語で簡潔に述べてください。
+既に述べた内容の繰り返しは避けてください。
+"""
 
 
 def get_system_prompt() -> str:
@@ -104,8 +208,8 @@ def get_system_prompt() -> str:
    - 各メディアソースから関連情報を収集：
      * Reddit: コミュニティの議論、実体験、トレンド
      * ArXiv: 学術論文、科学的根拠
-     * YouTube: 動画コンテンツ、チュートリアル（実装が必要）
-     * Medium: 記事、専門家の意見（実装が必要）
+     * YouTube: 動画コンテンツ、チュートリアル
+     * Medium: 記事、専門家の意見
 
 2. **分析フェーズ**
    - 収集した情報の信頼性を評価
@@ -122,117 +226,454 @@ def get_system_prompt() -> str:
 """
 
 
-async def research_query_sources(user_query: str, sources: Optional[list[str]] = None) -> dict:
+def create_research_tools(
+    use_cache: bool = True,
+    refresh: bool = False,
+    use_corpus: bool = True,
+) -> ResearchTools:
     """
-    Execute a research query across multiple sources.
+    Create ResearchTools configured from the CLI cache switches.
 
     Args:
-        user_query: The research query
-        sources: List of sources to search (default: all)
+        use_cache: Serve repeated searches from the response cache, and
+            revalidate repeated requests with the stored ETag / Last-Modified
+        refresh: Ignore cached responses and refetch (conditional requests are still sent)
+        use_corpus: Write every fetched item to the local research corpus
 
     Returns:
-        Dictionary containing research results from all sources
+        ResearchTools owning a pooled HTTP client
+    """
+    load_environment()  # YOUTUBE_API_KEY may come from .env
+    return ResearchTools(
+        cache=get_default_cache() if use_cache else None,
+        validators=get_default_validators() if use_cache else None,
+        refresh=refresh,
+        corpus=get_default_corpus() if use_corpus else None,
+    )
+
+
+async def iter_research_sources(
+    user_query: str,
+    sources: Optional[list[str]] = None,
+    source_timeout: Optional[float] = DEFAULT_SOURCE_TIMEOUT,
+    total_timeout: Optional[float] = DEFAULT_TOTAL_TIMEOUT,
+    use_cache: bool = True,
+    refresh: bool = False,
+    tools: Optional[ResearchTools] = None,
+    use_corpus: bool = True,
+    translator: Optional[Translator] = None,
+    max_results: Optional[int] = None,
+    newest_first: bool = False,
+) -> AsyncIterator[Tuple[str, SourceResult]]:
+    """
+    Execute a research query across multiple sources, yielding each source as it finishes.
+
+    All sources are queried concurrently. A source that misses its own
+    deadline, or is still running when the overall budget runs out, is
+    cancelled and reported with an ``error`` entry so the results from the
+    faster sources are still delivered.
+
+    Japanese queries are translated concurrently with the searches: sources
+    that accept the original query start immediately, and only the
+    English-only sources wait for the translation.
+
+    Args:
+        user_query: The research query
+        sources: List of sources to search (default: default_sources())
+        source_timeout: Deadline for each source in seconds (None for no limit)
+        total_timeout: Overall time budget in seconds (None for no limit)
+        use_cache: Serve repeated searches from the response cache
+        refresh: Ignore cached responses and refetch (the cache is still updated)
+        tools: Long-lived ResearchTools to reuse; when omitted a temporary
+            instance is created (honoring use_cache, refresh and use_corpus) and closed afterwards
+        use_corpus: Write fetched items to the local research corpus
+        translator: Warm session (or pool) used to translate Japanese queries
+        max_results: Items to request from each source (None for the tools' defaults)
+        newest_first: Ask Reddit, ArXiv and YouTube for their latest items instead of
+            the most relevant ones (Medium's tag feeds are always newest first)
+
+    Yields:
+        (source, result) tuples in completion order
     """
     if sources is None:
-        sources = ["reddit", "arxiv"]  # Default to implemented sources
+        sources = default_sources()
 
-    tools = ResearchTools()
-    results = {}
+    owns_tools = tools is None
+    if owns_tools:
+        tools = create_research_tools(use_cache=use_cache, refresh=refresh, use_corpus=use_corpus)
 
-    # Detect if query is in Japanese and translate if needed
-    english_query = user_query
-    if is_japanese(user_query):
+    # Detect if query is in Japanese and translate it in the background if needed
+    translation = None
+    if is_japanese(user_query) and ENGLISH_ONLY_SOURCES.intersection(sources):
         print("🌐 日本語クエリを検出しました。英語に翻訳中...")
-        english_query = await translate_to_english(user_query)
-        print(f"   翻訳結果: {english_query}")
+
+        async def translate() -> str:
+            try:
+                english = await translate_to_english(
+                    user_query, cache=tools.cache, translator=translator
+                )
+            except Exception as e:
+                print(f"   翻訳に失敗したため元のクエリを使用します: {e}")
+                return user_query
+            print(f"   翻訳結果: {english}")
+            return english
+
+        translation = asyncio.ensure_future(translate())
+
+    async def english_search(search, *args, **kwargs) -> SourceResult:
+        # Shield the shared translation so one source timing out does not cancel it for the others
+        english_query = await asyncio.shield(translation) if translation else user_query
+        return await search(english_query, *args, **kwargs)
+
+    def source_error(source_name: str, message: str) -> SourceResult:
+        label = SOURCE_LABELS.get(source_name, source_name)
+        print(f"⏱️  {label} の取得を打ち切りました: {message}")
+        return SourceResult(source=label, error=message)
+
+    # Reddit names its result count ``limit``; the other sources use ``max_results``
+    reddit_size = {} if max_results is None else {"limit": max_results}
+    size = {} if max_results is None else {"max_results": max_results}
+    order = {"newest_first": True} if newest_first else {}
 
     try:
-        # Execute searches in parallel for efficiency
-        tasks = []
+        # Execute searches concurrently; each result is handed on as soon as it arrives
+        jobs = {}
         if "reddit" in sources:
             # Reddit supports multiple languages, use original query
-            tasks.append(("reddit", tools.search_reddit(user_query)))
+            jobs["reddit"] = tools.search_reddit(user_query, **reddit_size, **order)
         if "arxiv" in sources:
             # ArXiv requires English query
-            tasks.append(("arxiv", tools.search_arxiv(english_query)))
+            jobs["arxiv"] = english_search(tools.search_arxiv, **size, **order)
         if "youtube" in sources:
             # YouTube works better with English
-            tasks.append(("youtube", tools.search_youtube(english_query)))
+            jobs["youtube"] = english_search(tools.search_youtube, **size, **order)
         if "medium" in sources:
             # Medium works better with English
-            tasks.append(("medium", tools.search_medium(english_query)))
+            jobs["medium"] = english_search(tools.search_medium, **size)
 
-        # Wait for all searches to complete
-        for source_name, task in tasks:
-            results[source_name] = await task
+        with metrics.stage("fetch"):
+            async for source, result in iter_fan_out(
+                jobs,
+                source_timeout=source_timeout,
+                total_timeout=total_timeout,
+                on_error=source_error,
+            ):
+                yield source, result
 
     finally:
-        await tools.close()
+        if translation is not None and not translation.done():
+            translation.cancel()
+        if owns_tools:
+            await tools.close()
+
+
+async def research_query_sources(
+    user_query: str,
+    sources: Optional[list[str]] = None,
+    source_timeout: Optional[float] = DEFAULT_SOURCE_TIMEOUT,
+    total_timeout: Optional[float] = DEFAULT_TOTAL_TIMEOUT,
+    use_cache: bool = True,
+    refresh: bool = False,
+    tools: Optional[ResearchTools] = None,
+    use_corpus: bool = True,
+    translator: Optional[Translator] = None,
+    max_results: Optional[int] = None,
+    newest_first: bool = False,
+) -> dict[str, SourceResult]:
+    """
+    Execute a research query across multiple sources.
 
-    return results
+    Collects everything iter_research_sources yields; total latency is that
+    of the slowest source (bounded by the timeouts).
 
+    Args:
+        user_query: The research query
+        sources: List of sources to search (default: default_sources())
+        source_timeout: Deadline for each source in seconds (None for no limit)
+        total_timeout: Overall time budget in seconds (None for no limit)
+        use_cache: Serve repeated searches from the response cache
+        refresh: Ignore cached responses and refetch (the cache is still updated)
+        tools: Long-lived ResearchTools to reuse; when omitted a temporary
+            instance is created (honoring use_cache, refresh and use_corpus) and closed afterwards
+        use_corpus: Write fetched items to the local research corpus
+        translator: Warm session (or pool) used to translate Japanese queries
+        max_results: Items to request from each source (None for the tools' defaults)
+        newest_first: Ask the sources for their latest items instead of the most relevant ones
 
-async def analyze_with_claude(user_query: str, research_data: dict) -> None:
+    Returns:
+        SourceResult of every source, keyed by source
+    """
+    results = {}
+    async for source, result in iter_research_sources(
+        user_query,
+        sources=sources,
+        source_timeout=source_timeout,
+        total_timeout=total_timeout,
+        use_cache=use_cache,
+        refresh=refresh,
+        tools=tools,
+        use_corpus=use_corpus,
+        translator=translator,
+        max_results=max_results,
+        newest_first=newest_first,
+    ):
+        results[source] = result
+    return {source: results[source] for source in SOURCE_LABELS if source in results}
+
+
+async def analyze_with_claude(
+    user_query: str,
+    research_data: dict[str, SourceResult],
+    echo: bool = True,
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+    session: Optional[AgentSession] = None,
+    instructions: str = REPORT_INSTRUCTIONS,
+    map_reduce: bool = False,
+    cache: Optional[ResponseCache] = None,
+    use_llm_cache: bool = True,
+    on_text: Optional[Callable[[str], None]] = None,
+) -> str:
     """
     Analyze research data using Claude and print results.
 
+    The report of an identical request (same prompt and options) is
+    replayed from the completion cache instead of calling Claude again.
+
     Args:
         user_query: The original user query
-        research_data: Dictionary of research results
+        research_data: SourceResult of each source, keyed by source
+        echo: Stream the report to stdout as it arrives
+        token_budget: Approximate token budget for the collected data in the prompt
+            (None for unlimited)
+        session: Warm analysis session to send the report request to (its
+            system prompt replaces the inline one); when omitted a one-off
+            query starts its own CLI process
+        instructions: What to do with the data, appended after it (default: the full report format)
+        map_reduce: Summarize every item in chunks and report from the summaries
+            instead of truncating the data to the token budget (see analyze_map_reduce)
+        cache: Response cache for map-reduce chunk summaries (None disables caching)
+        use_llm_cache: Replay and store reports in the completion cache
+            (False always calls Claude)
+        on_text: Called with each text block of the report as it arrives
+
+    Returns:
+        The full report text (empty if the analysis was skipped)
     """
     # Verify API key is available
     try:
         get_api_key()
     except ValueError as e:
-        print(f"\n⚠️  AI分析をスキップ: {e}")
-        return
-
-    # Prepare context for Claude
-    context = f"""ユーザーのクエリ: {user_query}
+        if echo:
+            print(f"\n⚠️  AI分析をスキップ: {e}")
+        return ""
+
+    completions = get_default_completions() if use_llm_cache else None
+
+    if map_reduce:
+        return await analyze_map_reduce(
+            user_query,
+            research_data,
+            get_system_prompt(),
+            instructions,
+            echo=echo,
+            token_budget=token_budget,
+            session=session,
+            cache=cache,
+            completions=completions,
+            on_text=on_text,
+        )
 
-収集したデータ:
+    # Prepare a compact, deduplicated and ranked context that fits the token budget
+    context = await build_context_async(user_query, research_data, token_budget=token_budget)
+    if echo:
+        print(
+            f"📉 コンテキスト: 約{context.estimated_tokens} tokens "
+            f"（約{context.tokens_saved} tokens 削減、{context.items_included}件を使用、"
+            f"{context.items_dropped}件を省略、うち重複{context.duplicates_removed}件）\n"
+        )
 
-"""
-    for source, data in research_data.items():
-        context += f"\n## {source.upper()} からの結果:\n"
-        context += json.dumps(data, ensure_ascii=False, indent=2)
-        context += "\n"
+    if session is not None:
+        return await complete(
+            f"{context.text}\n{instructions}",
+            "analyze",
+            echo=echo,
+            session=session,
+            completions=completions,
+            on_text=on_text,
+        )
 
     # Create the full prompt
     prompt = f"""{get_system_prompt()}
 
-{context}
+{context.text}
+{instructions}"""
 
-上記のデータを分析し、以下の形式で包括的なレポートを作成してください：
+    # Query Claude with streaming
+    return await complete(
+        prompt,
+        "analyze",
+        echo=echo,
+        completions=completions,
+        span_attrs={"context_tokens": context.estimated_tokens},
+        on_text=on_text,
+    )
 
-1. **概要**: トピックの全体像
-2. **主要な発見**: 各ソースからの重要な洞察
-3. **共通テーマ**: 複数のソースで言及されているパターン
-4. **推奨事項**: さらに調査すべき領域や次のステップ
 
-日本語で分かりやすく回答してください。
-"""
+def create_analysis_session() -> AgentSession:
+    """
+    Create a persistent Claude session set up as the research analyst.
 
-    # Query Claude with streaming
-    options = ClaudeAgentOptions()
+    Returns:
+        AgentSession whose system prompt is the research agent prompt
+    """
+    return AgentSession(system_prompt=get_system_prompt())
+
+
+def create_translation_session() -> AgentSession:
+    """
+    Create a persistent Claude session used only for query translation.
+
+    Kept apart from the analysis session so translations never end up in
+    the research conversation; its own conversation is reset periodically.
+
+    Returns:
+        AgentSession for translate_to_english
+    """
+    return AgentSession(
+        max_turns=TRANSLATION_SESSION_TURNS,
+        system_prompt="You translate Japanese search queries into concise English.",
+    )
+
+
+def describe_source(data: SourceResult) -> str:
+    """One-line summary of a source result (item count or error)."""
+    if data.error:
+        return f"{data.source}: 取得失敗（{data.error}）"
+    return f"{data.source}: {len(data.results)}件"
+
+
+async def analyze_pipelined(
+    user_query: str,
+    results: AsyncIterator[Tuple[str, SourceResult]],
+    session: AgentSession,
+    expected: list[str],
+    echo: bool = True,
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+) -> Tuple[dict[str, SourceResult], str]:
+    """
+    Analyze research data while it is still being collected.
+
+    The first turn starts as soon as a source with results arrives instead
+    of waiting for the slowest one. Sources that arrive later are sent as
+    follow-up turns in the same session, so Claude extends its report
+    without the earlier data being resent.
+
+    Args:
+        user_query: The original user query
+        results: (source, result) stream, e.g. from iter_research_sources
+        session: Persistent session the turns are sent to
+        expected: Sources the stream will deliver, in display order
+        echo: Stream the report to stdout as it arrives
+        token_budget: Approximate token budget for the collected data of each turn
+
+    Returns:
+        (all collected results keyed by source, full report text)
+    """
+    arrivals: asyncio.Queue = asyncio.Queue()
+
+    async def collect():
+        try:
+            async for source, data in results:
+                await arrivals.put((source, data))
+        finally:
+            await arrivals.put(None)
+
+    collector = asyncio.ensure_future(collect())
+    research_data: dict[str, SourceResult] = {}
+    report = ""
+    batch: dict[str, SourceResult] = {}
+    finished = False
+    try:
+        with metrics.stage("pipeline") as span:
+            started = time.perf_counter()
+            while not finished:
+                # Block for the next arrival, then take everything else that is already here
+                item = await arrivals.get()
+                while True:
+                    if item is None:
+                        finished = True
+                        break
+                    batch[item[0]] = item[1]
+                    if arrivals.empty():
+                        break
+                    item = arrivals.get_nowait()
+
+                # Hold the first turn until some source has actual results
+                has_results = any(data.results for data in batch.values())
+                if not batch or (not report and not has_results and not finished):
+                    continue
+                if report and not has_results:
+                    research_data.update(batch)
+                    batch = {}
+                    continue
+
+                research_data.update(batch)
+                if echo:
+                    print(f"\n📥 {'、'.join(describe_source(data) for data in batch.values())}")
+                context = await build_context_async(user_query, batch, token_budget=token_budget)
+                if not report:
+                    pending = [SOURCE_LABELS.get(s, s) for s in expected if s not in research_data]
+                    note = f"\n（{'、'.join(pending)} の結果は後から追加で送ります）\n" if pending else ""
+                    prompt = f"{context.text}{note}{REPORT_INSTRUCTIONS}"
+                else:
+                    prompt = f"{context.text}{FOLLOW_UP_INSTRUCTIONS}"
+                batch = {}
+
+                if echo:
+                    print("-" * 60)
+                reply = await session.ask(prompt, echo=echo)
+                if not report and reply:
+                    span.set("ttft", round(time.perf_counter() - started, 6))
+                report += reply + "\n"
+                span.add("turns")
+    finally:
+        if not collector.done():
+            collector.cancel()
+        await asyncio.gather(collector, return_exceptions=True)
+
+    ordered = {source: research_data[source] for source in expected if source in research_data}
+    return ordered, report.strip()
+
+
+# Interactive command that asks a follow-up about the current topic without collecting new data
+ASK_COMMAND = "/ask"
 
-    # Import the message types
-    from claude_agent_sdk.types import AssistantMessage, TextBlock
 
-    async for event in claude_query(prompt=prompt, options=options):
-        # Handle AssistantMessage events (contains the response)
-        if isinstance(event, AssistantMessage):
-            if hasattr(event, 'content'):
-                for block in event.content:
-                    if isinstance(block, TextBlock):
-                        print(block.text, end="", flush=True)
+async def run_interactive_session(
+    use_cache: bool = True,
+    refresh: bool = False,
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+    use_corpus: bool = True,
+):
+    """
+    Run an interactive research session with the agent.
 
+    One warm analysis session and one translation session live for the
+    whole loop, so topics after the first skip the CLI startup. Each new
+    topic starts a fresh conversation on the analysis session; ``/ask``
+    questions continue the current one, so Claude answers them from the
+    data it already has instead of the data being resent.
 
-async def run_interactive_session():
-    """Run an interactive research session with the agent."""
+    Args:
+        use_cache: Serve repeated searches from the response cache
+        refresh: Ignore cached responses and refetch
+        token_budget: Approximate token budget for the collected data in the prompt
+        use_corpus: Write fetched items to the local research corpus
+    """
     print("🔬 Deep Research Agent - マルチソースリサーチアシスタント")
     print("=" * 60)
     print("YouTube、Reddit、ArXiv、Mediumから情報を収集・統合します。")
+    print(f"直前のトピックについて追加で質問するには '{ASK_COMMAND} 質問' と入力してください。")
     print("終了するには 'exit' または 'quit' と入力してください。")
     print("=" * 60)
     print()
@@ -250,6 +691,14 @@ async def run_interactive_session():
         print("3. APIキーは https://console.anthropic.com/ で取得できます")
         return
 
+    # One pooled client and warm Claude sessions for the whole loop keep every later topic fast
+    tools = create_research_tools(use_cache=use_cache, refresh=refresh, use_corpus=use_corpus)
+    session = create_analysis_session()
+    translator = create_translation_session()
+    current_topic = None
+    # Load the SDK while the user types the first topic instead of before showing the prompt
+    preload_sdk()
+
     try:
         while True:
             # Get user input
@@ -262,65 +711,359 @@ async def run_interactive_session():
             if not user_query:
                 continue
 
+            if user_query.split(maxsplit=1)[0] == ASK_COMMAND:
+                question = user_query[len(ASK_COMMAND):].strip()
+                if current_topic is None or not question:
+                    print(f"⚠️  先にリサーチトピックを入力し、'{ASK_COMMAND} 質問' の形式で質問してください。")
+                    continue
+                print(f"\n💬 追加の質問（{current_topic}）")
+                print("-" * 60)
+                await session.ask(question, echo=True)
+                print("\n" + "-" * 60)
+                continue
+
             print(f"\n🔍 調査中: {user_query}")
             print("-" * 60)
 
-            # Collect research data
-            print("📊 データ収集中...")
-            research_data = await research_query_sources(user_query)
-
-            print("🤖 分析中...")
-            print("-" * 60)
+            # A new topic starts a new conversation on the same warm client
+            await session.reset()
+            current_topic = user_query
 
-            # Analyze with Claude
-            await analyze_with_claude(user_query, research_data)
+            print("📊 データ収集中（届いたソースから順に分析します）...")
+            await analyze_pipelined(
+                user_query,
+                iter_research_sources(user_query, tools=tools, translator=translator),
+                session,
+                expected=default_sources(),
+                token_budget=token_budget,
+            )
 
             print("\n" + "-" * 60)
 
     except KeyboardInterrupt:
         print("\n\n👋 セッションが中断されました。")
 
+    finally:
+        await asyncio.gather(session.close(), translator.close(), return_exceptions=True)
+        await tools.close()
+
 
-async def run_single_query(user_query: str):
+async def run_single_query(
+    user_query: str,
+    use_cache: bool = True,
+    refresh: bool = False,
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+    use_corpus: bool = True,
+    pipeline: bool = True,
+    dump_raw: Optional[Path] = None,
+    map_reduce: bool = False,
+    max_results: Optional[int] = None,
+    use_llm_cache: bool = True,
+    plan: bool = False,
+):
     """
     Run a single research query and return results.
 
+    By default the analysis is pipelined: Claude starts on the fastest
+    source and later sources are added as follow-up turns.
+
     Args:
         user_query: The research query
+        use_cache: Serve repeated searches from the response cache
+        refresh: Ignore cached responses and refetch
+        token_budget: Approximate token budget for the collected data in the prompt
+        use_corpus: Write fetched items to the local research corpus
+        pipeline: Start analyzing before every source has finished
+        dump_raw: File to write the raw source payloads to as JSON (None to skip)
+        map_reduce: Analyze every collected item with map-reduce summarization
+            (waits for all sources, like pipeline=False)
+        max_results: Items to request from each source (None for the defaults)
+        use_llm_cache: Replay the report of an identical analysis from the completion cache
+        plan: Expand the query into LLM-planned sub-searches run concurrently
     """
     print(f"🔍 調査中: {user_query}\n")
 
-    # Collect research data
-    research_data = await research_query_sources(user_query)
+    if plan:
+        # Imported here: the planner builds on this module
+        from .planner import iter_planned_sources, research_planned
 
-    # Print results
-    for source, data in research_data.items():
-        print(f"\n{'='*60}")
-        print(f"📊 {source.upper()} からの結果")
+        iter_sources = partial(iter_planned_sources, use_llm_cache=use_llm_cache)
+        collect_sources = partial(research_planned, use_llm_cache=use_llm_cache)
+    else:
+        iter_sources, collect_sources = iter_research_sources, research_query_sources
+
+    try:
+        get_api_key()
+        can_pipeline = pipeline and not map_reduce
+    except ValueError:
+        can_pipeline = False  # analyze_with_claude reports the missing key below
+
+    if can_pipeline:
+        print(f"{'='*60}")
+        print("🤖 AI分析（届いたソースから順に分析します）")
         print('='*60)
-        print(json.dumps(data, ensure_ascii=False, indent=2))
+        async with create_analysis_session() as session:
+            research_data, _ = await analyze_pipelined(
+                user_query,
+                iter_sources(
+                    user_query,
+                    use_cache=use_cache,
+                    refresh=refresh,
+                    use_corpus=use_corpus,
+                    max_results=max_results,
+                ),
+                session,
+                expected=default_sources(),
+                token_budget=token_budget,
+            )
+    else:
+        # Collect research data
+        research_data = await collect_sources(
+            user_query,
+            use_cache=use_cache,
+            refresh=refresh,
+            use_corpus=use_corpus,
+            max_results=max_results,
+        )
+        for data in research_data.values():
+            print(f"📊 {describe_source(data)}")
 
-    # Analyze with Claude
-    print(f"\n{'='*60}")
-    print("🤖 AI分析")
-    print('='*60)
+        # Analyze with Claude
+        print(f"\n{'='*60}")
+        print("🤖 AI分析")
+        print('='*60)
 
-    await analyze_with_claude(user_query, research_data)
+        await analyze_with_claude(
+            user_query,
+            research_data,
+            token_budget=token_budget,
+            map_reduce=map_reduce,
+            cache=get_default_cache() if use_cache else None,
+            use_llm_cache=use_llm_cache,
+        )
 
     print("\n")
 
+    if dump_raw is not None:
+        dump_raw.write_text(dumps(research_data, indent=True), encoding="utf-8")
+        print(f"📝 収集した生データを書き出しました: {dump_raw}")
 
-def main():
-    """Main entry point for the CLI."""
-    import sys
 
-    if len(sys.argv) > 1:
-        # Single query mode
-        user_query = " ".join(sys.argv[1:])
-        asyncio.run(run_single_query(user_query))
-    else:
-        # Interactive mode
-        asyncio.run(run_interactive_session())
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the profiling switches shared by every CLI mode.
+
+    Args:
+        parser: Parser to extend
+    """
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="各処理段階の所要時間・転送量・トークン数を計測して表示する",
+    )
+    parser.add_argument(
+        "--profile-output",
+        type=Path,
+        default=None,
+        help="計測結果の書き出し先（.prom/.txt は Prometheus 形式、それ以外は JSON Lines）",
+    )
+    parser.add_argument(
+        "--startup-timing",
+        action="store_true",
+        help="終了時にインポートなど起動処理の所要時間を標準エラーに表示する",
+    )
+
+
+def add_llm_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the completion cache bypass shared by every CLI mode that analyzes.
+
+    Args:
+        parser: Parser to extend
+    """
+    parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="同じ分析の結果を Claude の応答キャッシュから再生せず、毎回 Claude に問い合わせる",
+    )
+
+
+def add_map_reduce_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the switches for analyzing large result sets.
+
+    Args:
+        parser: Parser to extend
+    """
+    parser.add_argument(
+        "--max-results",
+        type=int,
+        default=None,
+        help="ソースごとに取得する件数（デフォルト: 各ソース10件）",
+    )
+    parser.add_argument(
+        "--map-reduce",
+        action="store_true",
+        help="収集した全件をチャンクごとに要約してから統合レポートを作成する（トークン上限で切り捨てない）",
+    )
+
+
+def add_plan_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the switch for LLM-planned query expansion.
+
+    Args:
+        parser: Parser to extend
+    """
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Claude がクエリをサブクエリ・サブレディット・ArXiv カテゴリに展開し、すべての検索を並列に実行する",
+    )
+
+
+def add_worker_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the post-processing worker switch shared by every CLI mode.
+
+    Args:
+        parser: Parser to extend
+    """
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="ランキングや索引作成に使うワーカープロセス数（デフォルト: CPUコア数。シングルコアでは 0、0 でプロセスを使わない）",
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the command-line parser.
+
+    Returns:
+        Configured ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="deep-research",
+        description="複数のメディアソースから情報を収集・統合するリサーチエージェント",
+    )
+    parser.add_argument(
+        "query",
+        nargs="*",
+        help="リサーチトピック（省略すると対話型モード）",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="レスポンスキャッシュを使用しない",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="キャッシュを無視して再取得する（取得結果はキャッシュに保存）",
+    )
+    parser.add_argument(
+        "--no-corpus",
+        action="store_true",
+        help="取得した結果をローカルコーパスに保存しない",
+    )
+    parser.add_argument(
+        "--no-pipeline",
+        action="store_true",
+        help="すべてのソースの取得を待ってから分析する（シングルクエリモード）",
+    )
+    parser.add_argument(
+        "--dump-raw",
+        type=Path,
+        default=None,
+        help="収集した生データを JSON で書き出すファイル（シングルクエリモード）",
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=DEFAULT_TOKEN_BUDGET,
+        help=f"プロンプトに含める収集データのおおよそのトークン上限（デフォルト: {DEFAULT_TOKEN_BUDGET}）",
+    )
+    add_map_reduce_arguments(parser)
+    add_plan_arguments(parser)
+    add_llm_cache_arguments(parser)
+    add_worker_arguments(parser)
+    add_profile_arguments(parser)
+    return parser
+
+
+# Subcommands dispatched on the first CLI argument, mapped to the module implementing them.
+# Each module exposes ``main(argv)``; modules are imported only when their subcommand runs.
+SUBCOMMANDS = {
+    "batch": ".batch",
+    "search": ".search",
+    "serve": ".serve",
+    "watch": ".watch",
+}
+
+
+def main(argv: Optional[list[str]] = None):
+    """
+    Main entry point for the CLI.
+
+    Args:
+        argv: Command-line arguments (default: sys.argv[1:])
+    """
+    entered = time.perf_counter()
+    if argv is None:
+        argv = sys.argv[1:]
+
+    # Checked before dispatching so the report also covers subcommands and --help
+    if "--startup-timing" in argv:
+        atexit.register(metrics.print_startup_report, IMPORT_STARTED, entered)
+    load_environment()
+
+    if argv and argv[0] in SUBCOMMANDS:
+        module = importlib.import_module(SUBCOMMANDS[argv[0]], __package__)
+        module.main(argv[1:])
+        return
+
+    args = build_parser().parse_args(argv)
+    use_cache = not args.no_cache
+    if args.profile or args.profile_output:
+        metrics.enable_profiling()
+    if args.workers is not None:
+        configure_default_executor(args.workers)
+
+    try:
+        if args.query:
+            # Single query mode
+            user_query = " ".join(args.query)
+            asyncio.run(
+                run_single_query(
+                    user_query,
+                    use_cache=use_cache,
+                    refresh=args.refresh,
+                    token_budget=args.token_budget,
+                    use_corpus=not args.no_corpus,
+                    pipeline=not args.no_pipeline,
+                    dump_raw=args.dump_raw,
+                    map_reduce=args.map_reduce,
+                    max_results=args.max_results,
+                    use_llm_cache=not args.no_llm_cache,
+                    plan=args.plan,
+                )
+            )
+        else:
+            # Interactive mode
+            asyncio.run(
+                run_interactive_session(
+                    use_cache=use_cache,
+                    refresh=args.refresh,
+                    token_budget=args.token_budget,
+                    use_corpus=not args.no_corpus,
+                )
+            )
+    finally:
+        get_default_executor().close()
+        if metrics.get_profiler().enabled:
+            metrics.report(args.profile_output)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,278 @@
+"""Map-reduce analysis for result sets too large for a single prompt."""
+
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from .cache import CompletionCache, ResponseCache
+from .context import DEFAULT_SNIPPET_CHARS, DEFAULT_TOKEN_BUDGET, estimate_tokens, render_item
+from .executor import PostProcessor, get_default_executor
+from . import metrics
+from .ranking import ResultIndex
+from .records import SourceResult
+from .session import AgentSession, complete
+
+
+# Approximate size of one map chunk in tokens, and the average number of items per chunk
+DEFAULT_CHUNK_TOKENS = 4000
+DEFAULT_CHUNK_ITEMS = 20
+
+# Map (and intermediate reduce) calls to Claude in flight at once
+DEFAULT_MAP_CONCURRENCY = 4
+
+# Instructions for summarizing one chunk; part of the summary cache key
+MAP_INSTRUCTIONS = """
+上記はクエリについて収集したデータの一部です。最終レポートではなく、後で他の部分の要約と
+統合するための中間メモとして、クエリに関係する重要な事実・主張・数値・意見の傾向を
+日本語の箇条書きで簡潔にまとめてください。各項目には根拠となる項目のタイトルを括弧で添えてください。
+"""
+
+# Instructions for merging several intermediate memos into one
+COMBINE_INSTRUCTIONS = """
+上記は収集データを分割して要約した中間メモです。重複をまとめ、矛盾があれば明記しながら、
+これらを1つの中間メモ（日本語の箇条書き）に統合してください。根拠のタイトルは残してください。
+"""
+
+
+@dataclass
+class MapReduceStats:
+    """Size accounting of one map-reduce analysis."""
+
+    items: int = 0
+    chunks: int = 0
+    cached_chunks: int = 0
+    failed_chunks: int = 0
+    reduce_rounds: int = 0
+
+
+def _digest(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def shard_items(
+    user_query: str,
+    research_data: Dict[str, SourceResult],
+    chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    chunk_items: int = DEFAULT_CHUNK_ITEMS,
+    snippet_chars: int = DEFAULT_SNIPPET_CHARS,
+) -> List[str]:
+    """
+    Split the collected items into chunk texts for the map step.
+
+    Duplicates are removed with a ResultIndex, then the rendered items are
+    ordered by a hash of their text and cut into chunks at content-defined
+    boundaries: a chunk ends after any item whose hash marks a boundary
+    (on average every ``chunk_items`` items) or when it reaches
+    ``chunk_tokens``. Adding or removing items therefore only changes the
+    chunks they fall into, and every other chunk keeps its text, and with
+    it its cached summary, as the result set grows.
+
+    Args:
+        user_query: The original user query
+        research_data: Results keyed by source, as returned by research_query_sources
+        chunk_tokens: Approximate token limit of one chunk
+        chunk_items: Average number of items per chunk
+        snippet_chars: Maximum length of each item's body text
+
+    Returns:
+        Chunk texts, each listing its items under per-source headings
+    """
+    index = ResultIndex()
+    for source, data in research_data.items():
+        index.add_all(source, data.results)
+    queries = [user_query] + [data.query for data in research_data.values() if data.query]
+
+    rendered = []
+    for entry in index.top_k(queries, None):
+        text = render_item(entry.item, snippet_chars)
+        rendered.append((_digest(text), entry.source, text))
+    rendered.sort()
+
+    chunks = []
+    current: Dict[str, List[str]] = {}
+    used = 0
+
+    def flush():
+        nonlocal current, used
+        if current:
+            chunks.append("\n\n".join(
+                f"## {source.upper()}\n" + "\n".join(lines) for source, lines in current.items()
+            ))
+        current, used = {}, 0
+
+    for digest, source, text in rendered:
+        cost = estimate_tokens(text) + 1
+        if current and used + cost > chunk_tokens:
+            flush()
+        current.setdefault(source, []).append(text)
+        used += cost
+        if digest % chunk_items == 0:
+            flush()
+    flush()
+    return chunks
+
+
+async def _summarize_all(
+    user_query: str,
+    texts: List[str],
+    instructions: str,
+    stage: str,
+    cache: Optional[ResponseCache],
+    limit: asyncio.Semaphore,
+    stats: MapReduceStats,
+) -> List[Optional[str]]:
+    """Summarize texts concurrently, reusing cached summaries of identical texts (None where one failed)."""
+
+    async def summarize(text: str) -> Optional[str]:
+        params = {"text": hashlib.sha256((instructions + text).encode("utf-8")).hexdigest()}
+        if cache is not None:
+            cached = cache.get("summary", user_query, params)
+            if cached is not None:
+                stats.cached_chunks += 1
+                metrics.record("cache_hits")
+                return cached
+        async with limit:
+            try:
+                summary = (await complete(
+                    f"ユーザーのクエリ: {user_query}\n\n{text}\n{instructions}", stage
+                )).strip()
+            except Exception as e:
+                print(f"   ⚠️  部分要約に失敗しました: {e}")
+                stats.failed_chunks += 1
+                return None
+        if cache is not None and summary:
+            cache.set("summary", user_query, params, summary)
+        return summary
+
+    return list(await asyncio.gather(*(summarize(text) for text in texts)))
+
+
+def _group(texts: List[str], token_budget: int) -> List[List[str]]:
+    """Pack texts, in order, into groups that fit the token budget (every group but the last has two or more)."""
+    groups: List[List[str]] = []
+    used = 0
+    for text in texts:
+        cost = estimate_tokens(text) + 1
+        if groups and (len(groups[-1]) < 2 or used + cost <= token_budget):
+            groups[-1].append(text)
+            used += cost
+        else:
+            groups.append([text])
+            used = cost
+    return groups
+
+
+async def analyze_map_reduce(
+    user_query: str,
+    research_data: Dict[str, SourceResult],
+    system_prompt: str,
+    instructions: str,
+    echo: bool = True,
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+    session: Optional[AgentSession] = None,
+    cache: Optional[ResponseCache] = None,
+    concurrency: int = DEFAULT_MAP_CONCURRENCY,
+    chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    executor: Optional[PostProcessor] = None,
+    completions: Optional[CompletionCache] = None,
+    on_text: Optional[Callable[[str], None]] = None,
+) -> str:
+    """
+    Analyze a result set of any size by summarizing chunks and reducing the summaries.
+
+    Map: the items are sharded with shard_items and every chunk is
+    summarized by its own Claude call, at most ``concurrency`` at a time.
+    Reduce: while the summaries exceed ``token_budget`` they are merged in
+    groups (again concurrently), then the final report is written from the
+    remaining summaries. Chunk and merge summaries are cached by the hash
+    of their input, so rerunning a topic only pays for the chunks whose
+    items changed and latency stays flat as the result set grows.
+
+    Args:
+        user_query: The original user query
+        research_data: Results keyed by source, as returned by research_query_sources
+        system_prompt: Research agent prompt prepended to the final report request
+            (unused when a session, which carries its own, is given)
+        instructions: Report format appended to the final request
+        echo: Print progress and stream the report to stdout
+        token_budget: Approximate token budget for the summaries in the final prompt
+        session: Warm analysis session for the final report (map calls are one-off queries)
+        cache: Response cache for chunk summaries (None disables caching)
+        concurrency: Map and merge calls in flight at once
+        chunk_tokens: Approximate token limit of one chunk
+        executor: Process pool used for sharding (default: the process-wide one)
+        completions: Reply cache for the final report (None to always call Claude)
+        on_text: Called with each text block of the final report as it arrives
+
+    Returns:
+        The full report text
+    """
+    stats = MapReduceStats(items=sum(len(data.results) for data in research_data.values()))
+    budget = token_budget or DEFAULT_TOKEN_BUDGET
+    executor = executor or get_default_executor()
+    limit = asyncio.Semaphore(concurrency)
+
+    with metrics.stage("map_reduce") as span:
+        chunks = await executor.run(
+            shard_items, user_query, research_data, chunk_tokens, size=stats.items
+        )
+        stats.chunks = len(chunks)
+        if echo:
+            print(f"🧩 {stats.items}件を{stats.chunks}チャンクに分割して要約中（同時{concurrency}件）...")
+
+        summaries = [
+            summary
+            for summary in await _summarize_all(
+                user_query, chunks, MAP_INSTRUCTIONS, "map", cache, limit, stats
+            )
+            if summary
+        ]
+        if not summaries and chunks:
+            raise RuntimeError("すべての部分要約に失敗しました")
+
+        while len(summaries) > 1 and estimate_tokens("\n\n".join(summaries)) > budget:
+            stats.reduce_rounds += 1
+            groups = _group(summaries, budget)
+            pending = [group for group in groups if len(group) > 1]
+            merged = await _summarize_all(
+                user_query,
+                ["\n\n---\n\n".join(group) for group in pending],
+                COMBINE_INSTRUCTIONS,
+                "reduce",
+                cache,
+                limit,
+                stats,
+            )
+            if not any(merged):
+                raise RuntimeError("部分要約の統合に失敗しました")
+            # Each group becomes its merge; one whose merge failed carries its members into the next round
+            results = iter(merged)
+            summaries = []
+            for group in groups:
+                summary = next(results) if len(group) > 1 else None
+                summaries.extend([summary] if summary else group)
+
+        span.add("chunks", stats.chunks)
+        span.add("cached_chunks", stats.cached_chunks)
+        span.add("reduce_rounds", stats.reduce_rounds)
+
+    if echo:
+        print(
+            f"📉 部分要約 {len(summaries)}件から最終レポートを作成します"
+            f"（キャッシュ利用 {stats.cached_chunks}件、失敗 {stats.failed_chunks}件、"
+            f"統合 {stats.reduce_rounds}段）\n"
+        )
+
+    memos = "\n\n---\n\n".join(summaries)
+    body = (
+        f"ユーザーのクエリ: {user_query}\n\n"
+        f"収集したデータ（{stats.items}件）を分割して要約した中間メモ:\n\n{memos}\n{instructions}"
+    )
+    if session is not None:
+        return await complete(
+            body, "analyze", echo=echo, session=session, completions=completions, on_text=on_text
+        )
+    return await complete(
+        f"{system_prompt}\n\n{body}", "analyze", echo=echo, completions=completions, on_text=on_text
+    )
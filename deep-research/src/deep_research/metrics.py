@@ -0,0 +1,317 @@
+"""Lightweight per-stage latency and throughput instrumentation."""
+
+import importlib
+import json
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class Span:
+    """One timed execution of a pipeline stage."""
+
+    stage: str
+    labels: Dict[str, str]
+    started_at: float
+    duration: float = 0.0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    def set(self, name: str, value: Any) -> None:
+        """Set an attribute (e.g. time to first token)."""
+        self.attrs[name] = value
+
+    def add(self, name: str, value: float = 1) -> None:
+        """Accumulate a numeric attribute (bytes, results, retries, ...)."""
+        self.attrs[name] = self.attrs.get(name, 0) + value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stage": self.stage,
+            **self.labels,
+            "started_at": round(self.started_at, 6),
+            "duration": round(self.duration, 6),
+            **self.attrs,
+        }
+
+
+class _NullSpan(Span):
+    """Span handed out while profiling is disabled; it records nothing."""
+
+    def __init__(self):
+        super().__init__("", {}, 0.0)
+
+    def set(self, name: str, value: Any) -> None:
+        pass
+
+    def add(self, name: str, value: float = 1) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+# Innermost active span of the current task, used by record()
+_current_span: ContextVar[Optional[Span]] = ContextVar("deep_research_span", default=None)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Profiler:
+    """
+    Collects spans for pipeline stages and exports them.
+
+    A disabled profiler hands out a shared no-op span, so instrumented code
+    costs next to nothing unless ``--profile`` is given.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.spans: List[Span] = []
+
+    @contextmanager
+    def stage(self, name: str, **labels: str) -> Iterator[Span]:
+        """
+        Time a pipeline stage.
+
+        Args:
+            name: Stage name (e.g. "search", "translate", "analyze")
+            **labels: Extra dimensions such as the source name
+
+        Yields:
+            Span whose attributes can be filled in by the caller
+        """
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+
+        span = Span(name, {k: str(v) for k, v in labels.items()}, time.time())
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.set("error", type(e).__name__)
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            _current_span.reset(token)
+            self.spans.append(span)
+
+    def _groups(self) -> Dict[Tuple[str, Tuple[Tuple[str, str], ...]], List[Span]]:
+        groups: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], List[Span]] = {}
+        for span in self.spans:
+            key = (span.stage, tuple(sorted(span.labels.items())))
+            groups.setdefault(key, []).append(span)
+        return groups
+
+    def to_jsonl(self) -> str:
+        """
+        Export every span as one JSON object per line.
+
+        Returns:
+            JSON Lines text
+        """
+        return "".join(
+            json.dumps(span.to_dict(), ensure_ascii=False) + "\n" for span in self.spans
+        )
+
+    def to_prometheus(self) -> str:
+        """
+        Export aggregated spans in the Prometheus text exposition format.
+
+        Durations become ``deep_research_stage_seconds`` summaries, and every
+        numeric span attribute becomes a ``deep_research_<name>_total`` counter.
+
+        Returns:
+            Prometheus text dump
+        """
+        lines = ["# TYPE deep_research_stage_seconds summary"]
+        counters: Dict[str, List[str]] = {}
+        for (stage, labels), spans in self._groups().items():
+            label_text = ",".join(
+                f'{k}="{v}"' for k, v in (("stage", stage),) + labels
+            )
+            durations = [span.duration for span in spans]
+            for quantile in (0.5, 0.95, 0.99):
+                lines.append(
+                    f'deep_research_stage_seconds{{{label_text},quantile="{quantile}"}} '
+                    f"{_percentile(durations, quantile):.6f}"
+                )
+            lines.append(f"deep_research_stage_seconds_sum{{{label_text}}} {sum(durations):.6f}")
+            lines.append(f"deep_research_stage_seconds_count{{{label_text}}} {len(durations)}")
+
+            totals: Dict[str, float] = {}
+            for span in spans:
+                for name, value in span.attrs.items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        totals[name] = totals.get(name, 0) + value
+            for name, value in totals.items():
+                counters.setdefault(name, []).append(
+                    f"deep_research_{name}_total{{{label_text}}} {value:g}"
+                )
+
+        for name, samples in counters.items():
+            lines.append(f"# TYPE deep_research_{name}_total counter")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """
+        Render a human-readable per-stage table.
+
+        Returns:
+            Multi-line summary text
+        """
+        rows = []
+        for (stage, labels), spans in self._groups().items():
+            durations = [span.duration for span in spans]
+            name = stage + "".join(f" {v}" for _, v in labels)
+            extras = {}
+            for span in spans:
+                for key, value in span.attrs.items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        extras[key] = extras.get(key, 0) + value
+            extra_text = " ".join(f"{k}={v:g}" for k, v in extras.items())
+            rows.append(
+                f"{name:<24} n={len(spans):<4} total={sum(durations):7.3f}s "
+                f"p50={_percentile(durations, 0.5):6.3f}s p95={_percentile(durations, 0.95):6.3f}s "
+                f"{extra_text}".rstrip()
+            )
+        return "\n".join(rows)
+
+    def export(self, path: Path) -> None:
+        """
+        Write the collected spans to a file.
+
+        Files ending in ``.prom`` or ``.txt`` receive the Prometheus dump;
+        anything else receives JSON Lines.
+
+        Args:
+            path: Output file
+        """
+        path = Path(path)
+        text = self.to_prometheus() if path.suffix in (".prom", ".txt") else self.to_jsonl()
+        path.write_text(text, encoding="utf-8")
+
+
+_profiler = Profiler()
+
+
+def get_profiler() -> Profiler:
+    """
+    Get the process-wide profiler.
+
+    Returns:
+        Shared Profiler instance (disabled unless enable_profiling was called)
+    """
+    return _profiler
+
+
+def enable_profiling() -> Profiler:
+    """
+    Turn on span collection for the rest of the process.
+
+    Returns:
+        The shared Profiler
+    """
+    _profiler.enabled = True
+    return _profiler
+
+
+def stage(name: str, **labels: str):
+    """Shorthand for ``get_profiler().stage(...)``."""
+    return _profiler.stage(name, **labels)
+
+
+def record(name: str, value: float = 1) -> None:
+    """
+    Add to a numeric attribute of the innermost active span, if any.
+
+    Args:
+        name: Attribute name (e.g. "bytes_downloaded", "cache_hits")
+        value: Amount to add
+    """
+    span = _current_span.get()
+    if span is not None:
+        span.add(name, value)
+
+
+def report(output: Optional[Path] = None) -> None:
+    """
+    Print the profiling summary and optionally export the spans.
+
+    Args:
+        output: File to export to (see Profiler.export)
+    """
+    print("\n⏱️  プロファイル結果")
+    print("-" * 60)
+    print(_profiler.summary() or "(記録なし)")
+    if output is not None:
+        _profiler.export(output)
+        print(f"📝 プロファイルを書き出しました: {output}")
+
+
+# Seconds spent in imports deferred until first use, keyed by module name
+_lazy_imports: Dict[str, float] = {}
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Import a module on first use, remembering how long the import took.
+
+    Heavy dependencies are loaded through this helper instead of at the top
+    of a module, so commands that never reach them start without paying for
+    them. Later calls return the loaded module, waiting for the import to
+    finish if another thread started it.
+
+    Args:
+        name: Absolute module name (e.g. "claude_agent_sdk")
+
+    Returns:
+        The imported module
+    """
+    loaded = name in sys.modules
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    if not loaded:
+        _lazy_imports[name] = time.perf_counter() - started
+    return module
+
+
+def startup_report(started: float, entered: float) -> str:
+    """
+    Summarize where the process spent its startup time.
+
+    Args:
+        started: perf_counter() value taken when the package began importing
+        entered: perf_counter() value taken when the CLI entry point was called
+
+    Returns:
+        Human-readable table of eager imports, deferred imports and total run time
+    """
+    rows = [("パッケージのインポート", entered - started)]
+    rows += [(f"初回使用時のインポート: {name}", seconds) for name, seconds in _lazy_imports.items()]
+    rows.append(("終了までの合計", time.perf_counter() - started))
+    return "\n".join(f"{seconds * 1000:9.1f} ms  {label}" for label, seconds in rows)
+
+
+def print_startup_report(started: float, entered: float) -> None:
+    """
+    Print the startup summary to stderr, next to where ``python -X importtime`` writes.
+
+    Args:
+        started: perf_counter() value taken when the package began importing
+        entered: perf_counter() value taken when the CLI entry point was called
+    """
+    print("\n⏱️  起動時間", file=sys.stderr)
+    print("-" * 60, file=sys.stderr)
+    print(startup_report(started, entered), file=sys.stderr)
+    print("モジュールごとの内訳: python -X importtime -m deep_research.main ...", file=sys.stderr)
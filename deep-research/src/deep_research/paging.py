@@ -0,0 +1,55 @@
+"""Prefetching iteration over paginated upstream APIs."""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+
+# A page fetcher takes a cursor and returns the page's items and the next cursor (None at the end)
+PageFetcher = Callable[[Any], Awaitable[Tuple[List[Any], Optional[Any]]]]
+
+
+async def iter_pages(
+    fetch_page: PageFetcher,
+    first_cursor: Any = None,
+    max_items: Optional[int] = None,
+) -> AsyncIterator[Any]:
+    """
+    Yield items from a paginated API, fetching one page ahead.
+
+    As soon as a page arrives, the request for the next page is started in
+    the background, so its round trip overlaps with the caller processing
+    the current page. No page beyond what ``max_items`` needs is requested,
+    and the in-flight prefetch is cancelled as soon as the caller stops
+    iterating.
+
+    Args:
+        fetch_page: Coroutine function mapping a cursor to (items, next_cursor)
+        first_cursor: Cursor of the first page
+        max_items: Stop after this many items (None for all)
+
+    Yields:
+        Items in page order
+    """
+    if max_items is not None and max_items <= 0:
+        return
+
+    produced = 0
+    next_page = asyncio.ensure_future(fetch_page(first_cursor))
+    try:
+        while next_page is not None:
+            items, cursor = await next_page
+            next_page = None
+
+            needs_more = max_items is None or produced + len(items) < max_items
+            if cursor is not None and items and needs_more:
+                next_page = asyncio.ensure_future(fetch_page(cursor))
+
+            for item in items:
+                yield item
+                produced += 1
+                if max_items is not None and produced >= max_items:
+                    return
+    finally:
+        if next_page is not None and not next_page.done():
+            next_page.cancel()
+            await asyncio.gather(next_page, return_exceptions=True)
@@ -0,0 +1,438 @@
+"""LLM-planned query expansion, run as a concurrent search DAG under a shared budget."""
+
+import asyncio
+import json
+import re
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Dict, List, Optional, Tuple
+
+from .cache import CompletionCache, get_default_completions
+from .main import (
+    DEFAULT_SOURCE_TIMEOUT,
+    DEFAULT_TOTAL_TIMEOUT,
+    SOURCE_LABELS,
+    Translator,
+    create_research_tools,
+    default_sources,
+    get_api_key,
+    is_japanese,
+    translate_to_english,
+)
+from . import metrics
+from .ranking import canonicalize_url
+from .records import SourceResult
+from .scheduler import iter_fan_out
+from .session import complete
+from .tools import ResearchTools, medium_tag
+
+
+# Upper bounds on what a plan may add
+DEFAULT_PLAN_QUERIES = 4
+DEFAULT_PLAN_SUBREDDITS = 3
+DEFAULT_PLAN_CATEGORIES = 3
+
+# Searches in flight at once across every source of a planned query
+DEFAULT_PLAN_CONCURRENCY = 8
+
+# A YouTube search costs 100 quota units, so only the leading sub-queries are sent there
+YOUTUBE_PLAN_QUERIES = 2
+
+PLAN_PROMPT = """You are planning searches for a research assistant.
+
+Topic: {query}
+
+Return a JSON object with these keys:
+- "queries": up to {max_queries} short English search queries. The first one is the topic
+  itself in English; the others cover distinct subtopics, synonyms or related angles that
+  broaden recall without drifting off topic.
+- "subreddits": up to {max_subreddits} subreddit names (without "r/") where the topic is
+  actively discussed.
+- "arxiv_categories": up to {max_categories} arXiv category codes (e.g. "cs.LG", "quant-ph")
+  relevant to the topic, or an empty list if the topic is not academic.
+
+Output only the JSON object."""
+
+_SUBREDDIT_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_]{1,20}$")
+_CATEGORY_PATTERN = re.compile(r"^[a-z-]+(\.[A-Za-z-]+)?$")
+
+
+@dataclass
+class SearchPlan:
+    """Search strings and filters derived from one user query."""
+
+    # English queries; the first is the topic itself
+    queries: List[str]
+    subreddits: List[str] = field(default_factory=list)
+    categories: List[str] = field(default_factory=list)
+
+
+def _unique(values: List[str]) -> List[str]:
+    seen = set()
+    unique = []
+    for value in values:
+        key = value.casefold()
+        if key not in seen:
+            seen.add(key)
+            unique.append(value)
+    return unique
+
+
+def parse_plan(
+    text: str,
+    max_queries: int = DEFAULT_PLAN_QUERIES,
+    max_subreddits: int = DEFAULT_PLAN_SUBREDDITS,
+    max_categories: int = DEFAULT_PLAN_CATEGORIES,
+) -> Optional[SearchPlan]:
+    """
+    Extract a search plan from Claude's reply.
+
+    Entries that are not strings, subreddit names that Reddit would reject
+    and malformed category codes are dropped, and every list is capped.
+
+    Args:
+        text: Reply containing a JSON object (surrounding prose or code fences are ignored)
+        max_queries: Maximum number of queries kept
+        max_subreddits: Maximum number of subreddits kept
+        max_categories: Maximum number of ArXiv categories kept
+
+    Returns:
+        The plan, or None if the reply holds no usable queries
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    def strings(key: str) -> List[str]:
+        values = data.get(key)
+        if not isinstance(values, list):
+            return []
+        return [" ".join(value.split()) for value in values if isinstance(value, str) and value.strip()]
+
+    queries = _unique(strings("queries"))[:max_queries]
+    if not queries:
+        return None
+    subreddits = [name.removeprefix("r/") for name in strings("subreddits")]
+    subreddits = _unique([name for name in subreddits if _SUBREDDIT_PATTERN.match(name)])
+    categories = _unique([code for code in strings("arxiv_categories") if _CATEGORY_PATTERN.match(code)])
+    return SearchPlan(queries, subreddits[:max_subreddits], categories[:max_categories])
+
+
+async def plan_searches(
+    user_query: str,
+    tools: Optional[ResearchTools] = None,
+    translator: Optional[Translator] = None,
+    completions: Optional[CompletionCache] = None,
+    max_queries: int = DEFAULT_PLAN_QUERIES,
+) -> SearchPlan:
+    """
+    Ask Claude to expand a query into sub-queries, subreddits and ArXiv categories.
+
+    Plans are replayed from the completion cache for repeated topics. When
+    no API key is set or the reply cannot be parsed, the plan falls back to
+    the query itself (translated to English if it is Japanese).
+
+    Args:
+        user_query: The research query
+        tools: ResearchTools whose response cache memoizes the fallback translation
+        translator: Warm session (or pool) used for the fallback translation
+        completions: Completion cache for the planning call (None to always call Claude)
+        max_queries: Maximum number of English queries in the plan
+
+    Returns:
+        The search plan
+    """
+    with metrics.stage("plan") as span:
+        plan = None
+        try:
+            get_api_key()
+            prompt = PLAN_PROMPT.format(
+                query=user_query,
+                max_queries=max_queries,
+                max_subreddits=DEFAULT_PLAN_SUBREDDITS,
+                max_categories=DEFAULT_PLAN_CATEGORIES,
+            )
+            plan = parse_plan(await complete(prompt, "plan", completions=completions), max_queries)
+            if plan is None:
+                print("   検索計画を読み取れなかったため元のクエリだけで検索します")
+        except ValueError:
+            pass  # No API key: search with the query alone
+        except Exception as e:
+            print(f"   検索計画の作成に失敗したため元のクエリだけで検索します: {e}")
+
+        if plan is None:
+            english = user_query
+            if is_japanese(user_query):
+                english = await translate_to_english(
+                    user_query, cache=tools.cache if tools else None, translator=translator
+                )
+            plan = SearchPlan([english])
+        span.add("queries", len(plan.queries))
+        return plan
+
+
+# One search of a source: (query, filter), where the filter is the subreddit,
+# ArXiv category or Medium tag (None for none)
+Search = Tuple[str, Optional[str]]
+
+
+def _planned_searches(source: str, user_query: str, plan: SearchPlan) -> List[Search]:
+    """Every search a plan calls for on one source, starting with the query as typed."""
+    if source == "reddit":
+        # Reddit handles any language, so the original wording is searched as well
+        searches = [(query, "all") for query in _unique([user_query] + plan.queries)]
+        return searches + [(plan.queries[0], subreddit) for subreddit in plan.subreddits]
+    if source == "arxiv":
+        searches = [(query, None) for query in plan.queries]
+        return searches + [(plan.queries[0], category) for category in plan.categories]
+    if source == "youtube":
+        return [(query, None) for query in plan.queries[:YOUTUBE_PLAN_QUERIES]]
+    # Medium only has tag feeds, and tags slugged from free-text sub-queries rarely exist
+    return [(plan.queries[0], medium_tag(plan.queries[0]))]
+
+
+def _search_key(source: str, search: Search) -> Tuple[str, ...]:
+    # Medium searches are tag feeds: two queries mapping to the same tag are the same search
+    query, search_filter = search
+    if source == "medium":
+        return (search_filter,)
+    return (query.casefold(), search_filter or "")
+
+
+def merge_source_results(source: str, query: str, results: List[SourceResult]) -> SourceResult:
+    """
+    Merge the results of several searches of one source, dropping duplicates.
+
+    Items are kept in search order and identified by their canonical URL,
+    so the same post or paper found by two sub-queries appears once.
+
+    Args:
+        source: Source identifier (e.g. "reddit")
+        query: Query reported for the merged result
+        results: Results of the individual searches (failed ones carry ``error``)
+
+    Returns:
+        One SourceResult; ``error`` is set only if every search failed
+    """
+    items = []
+    seen = set()
+    for result in results:
+        for item in result.results:
+            key = canonicalize_url(item.url) or item.title
+            if key in seen:
+                continue
+            seen.add(key)
+            items.append(item)
+    errors = _unique([result.error for result in results if result.error])
+    failed = not items and all(result.error for result in results)
+    return SourceResult(
+        source=SOURCE_LABELS.get(source, source),
+        query=query,
+        results=items,
+        total_results=len(items),
+        error="; ".join(errors) if failed else None,
+    )
+
+
+async def iter_planned_sources(
+    user_query: str,
+    sources: Optional[List[str]] = None,
+    source_timeout: Optional[float] = DEFAULT_SOURCE_TIMEOUT,
+    total_timeout: Optional[float] = DEFAULT_TOTAL_TIMEOUT,
+    use_cache: bool = True,
+    refresh: bool = False,
+    tools: Optional[ResearchTools] = None,
+    use_corpus: bool = True,
+    translator: Optional[Translator] = None,
+    max_results: Optional[int] = None,
+    concurrency: int = DEFAULT_PLAN_CONCURRENCY,
+    max_queries: int = DEFAULT_PLAN_QUERIES,
+    use_llm_cache: bool = True,
+) -> AsyncIterator[Tuple[str, SourceResult]]:
+    """
+    Research a query with an LLM-planned set of searches, yielding each source as it finishes.
+
+    The searches form a small DAG. Searches that need no plan (the query
+    as typed on Reddit, and on every source when it is not Japanese) start
+    right away, alongside the planning call; the sub-queries, subreddit
+    and category searches start as soon as the plan arrives. All searches
+    share one concurrency limit and one deadline: a search still running
+    when ``total_timeout`` runs out is cancelled and its source is
+    reported with what the other searches found. Each source's results are
+    merged and deduplicated into the research_query_sources format, so the
+    wider coverage costs about the wall time of the planning call plus the
+    slowest search.
+
+    Args:
+        user_query: The research query
+        sources: List of sources to search (default: default_sources())
+        source_timeout: Deadline for each search in seconds (None for no limit)
+        total_timeout: Overall time budget in seconds, planning included (None for no limit)
+        use_cache: Serve repeated searches from the response cache
+        refresh: Ignore cached responses and refetch (the cache is still updated)
+        tools: Long-lived ResearchTools to reuse; when omitted a temporary
+            instance is created (honoring use_cache, refresh and use_corpus) and closed afterwards
+        use_corpus: Write fetched items to the local research corpus
+        translator: Warm session (or pool) used if the plan falls back to translating
+        max_results: Items to request from each search (None for the tools' defaults)
+        concurrency: Searches in flight at once across all sources
+        max_queries: Maximum number of English queries in the plan
+        use_llm_cache: Replay the plan of a repeated query from the completion cache
+
+    Yields:
+        (source, result) tuples in completion order
+    """
+    if sources is None:
+        sources = default_sources()
+
+    owns_tools = tools is None
+    if owns_tools:
+        tools = create_research_tools(use_cache=use_cache, refresh=refresh, use_corpus=use_corpus)
+
+    loop = asyncio.get_running_loop()
+    deadline = None if total_timeout is None else loop.time() + total_timeout
+    limit = asyncio.Semaphore(concurrency)
+    reddit_size = {} if max_results is None else {"limit": max_results}
+    size = {} if max_results is None else {"max_results": max_results}
+
+    def remaining() -> Optional[float]:
+        return None if deadline is None else max(0.0, deadline - loop.time())
+
+    def call(source: str, search: Search) -> Awaitable[SourceResult]:
+        query, search_filter = search
+        if source == "reddit":
+            return tools.search_reddit(query, subreddit=search_filter, **reddit_size)
+        if source == "arxiv":
+            return tools.search_arxiv(query, category=search_filter, **size)
+        if source == "youtube":
+            return tools.search_youtube(query, **size)
+        return tools.search_medium(query, tag=search_filter, **size)
+
+    async def run(source: str, search: Search) -> SourceResult:
+        async with limit:
+            return await asyncio.wait_for(call(source, search), source_timeout)
+
+    print("🧭 検索計画を作成中...")
+    planning = asyncio.ensure_future(
+        plan_searches(
+            user_query,
+            tools=tools,
+            translator=translator,
+            completions=get_default_completions() if use_llm_cache else None,
+            max_queries=max_queries,
+        )
+    )
+    # Used when the plan misses the deadline: the searches already running are all there is
+    fallback_plan = SearchPlan([user_query])
+
+    async def get_plan() -> SearchPlan:
+        try:
+            # Shield the shared planning call so one source giving up does not cancel it for the others
+            return await asyncio.wait_for(asyncio.shield(planning), remaining())
+        except asyncio.TimeoutError:
+            return fallback_plan
+        except Exception:
+            # The fallback translation failed as well
+            return fallback_plan
+
+    plan_reported = False
+
+    async def research_source(source: str) -> SourceResult:
+        nonlocal plan_reported
+        started: Dict[Tuple[str, ...], asyncio.Future] = {}
+
+        def start(search: Search) -> None:
+            key = _search_key(source, search)
+            if key not in started:
+                started[key] = asyncio.ensure_future(run(source, search))
+
+        # Root searches: the query as typed works everywhere unless it is Japanese
+        if source == "reddit" or not is_japanese(user_query):
+            start(_planned_searches(source, user_query, SearchPlan([user_query]))[0])
+
+        plan = await get_plan()
+        if not plan_reported:
+            plan_reported = True
+            print(
+                f"   サブクエリ: {', '.join(plan.queries)}"
+                + (f" / r/{', r/'.join(plan.subreddits)}" if plan.subreddits else "")
+                + (f" / カテゴリ: {', '.join(plan.categories)}" if plan.categories else "")
+            )
+        for search in _planned_searches(source, user_query, plan):
+            start(search)
+
+        tasks = list(started.values())
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=remaining())
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        label = SOURCE_LABELS.get(source, source)
+        results = []
+        for task in tasks:
+            if task not in done:
+                # Only possible when a total budget is set
+                results.append(SourceResult(source=label, error=f"exceeded total time budget of {total_timeout:g}s"))
+            elif task.cancelled():
+                results.append(SourceResult(source=label, error="cancelled"))
+            elif isinstance(task.exception(), TimeoutError) and source_timeout is not None:
+                results.append(SourceResult(source=label, error=f"timed out after {source_timeout:g}s"))
+            elif isinstance(task.exception(), TimeoutError):
+                results.append(SourceResult(source=label, error=str(task.exception()) or "timed out"))
+            elif task.exception() is not None:
+                results.append(SourceResult(source=label, error=str(task.exception())))
+            else:
+                results.append(task.result())
+        metrics.record("searches", len(tasks))
+        query = user_query if source == "reddit" else plan.queries[0]
+        return merge_source_results(source, query, results)
+
+    def source_error(source_name: str, message: str) -> SourceResult:
+        label = SOURCE_LABELS.get(source_name, source_name)
+        print(f"⚠️  {label} の検索に失敗しました: {message}")
+        return SourceResult(source=label, error=message)
+
+    try:
+        # Each source enforces the shared deadline on its own searches, so it
+        # can still report what it found when the budget runs out
+        with metrics.stage("fetch"):
+            async for source, result in iter_fan_out(
+                {source: research_source(source) for source in sources},
+                on_error=source_error,
+            ):
+                yield source, result
+    finally:
+        if not planning.done():
+            planning.cancel()
+        await asyncio.gather(planning, return_exceptions=True)
+        if owns_tools:
+            await tools.close()
+
+
+async def research_planned(
+    user_query: str,
+    sources: Optional[List[str]] = None,
+    **kwargs,
+) -> Dict[str, SourceResult]:
+    """
+    Research a query with an LLM-planned set of searches and collect the results.
+
+    Args:
+        user_query: The research query
+        sources: List of sources to search (default: default_sources())
+        **kwargs: Passed on to iter_planned_sources
+
+    Returns:
+        SourceResult of every source, keyed by source (the research_query_sources format)
+    """
+    results = {}
+    async for source, result in iter_planned_sources(user_query, sources, **kwargs):
+        results[source] = result
+    return {source: results[source] for source in SOURCE_LABELS if source in results}
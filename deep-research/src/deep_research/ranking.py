@@ -0,0 +1,414 @@
+"""In-memory deduplication and relevance ranking of collected research items."""
+
+import math
+import random
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from .records import ResearchItem
+
+
+# Number of items kept for the prompt by default
+DEFAULT_TOP_K = 50
+
+# Title Jaccard similarity above which two items count as the same story
+DEFAULT_NEAR_DUP_THRESHOLD = 0.6
+
+# Weight of redundancy against relevance when picking the top-K (0 disables diversification)
+DEFAULT_DIVERSITY = 0.3
+
+# MinHash signature length and LSH banding (8 bands x 4 rows puts the S-curve around 0.6 Jaccard)
+NUM_PERM = 32
+LSH_BANDS = 8
+
+# Titles with fewer shingles than this are too short to compare reliably
+MIN_SHINGLES = 3
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Fields whose text is indexed for relevance scoring
+_TEXT_FIELDS = ["title", "summary", "selftext", "description"]
+
+# Hiragana, katakana, CJK ideographs and Hangul: scripts written without spaces
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af"
+_TOKEN_RE = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+")
+_CJK_RUN_RE = re.compile(rf"[{_CJK}]")
+
+# Byte table for the ASCII fast path: lowercase letters and digits, everything else separates words
+_ASCII_TERMS = bytes(
+    ord(chr(i).lower()) if chr(i).isascii() and chr(i).isalnum() else ord(" ")
+    for i in range(256)
+)
+
+# Query parameters that only track where a link was shared from
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|ref|ref_src|source|share_id|fbclid|gclid|si)$")
+_REDDIT_POST_RE = re.compile(r"^/r/[^/]+/comments/([a-z0-9]+)")
+_ARXIV_ID_RE = re.compile(r"^/(?:abs|pdf)/(.+?)(?:v\d+)?(?:\.pdf)?/?$")
+# Reddit and ArXiv links in the shape ResearchTools builds them, handled without a full URL parse
+_KNOWN_URL_RE = re.compile(
+    r"^https?://(?:www\.|old\.|np\.|export\.)?"
+    r"(?:reddit\.com/r/[^/]+/comments/(?P<reddit>[A-Za-z0-9]+)"
+    r"|arxiv\.org/(?:abs|pdf)/(?P<arxiv>[^?#]+?)(?:v\d+)?(?:\.pdf)?/?$)"
+)
+
+_MASK = (1 << 64) - 1
+# XOR masks act as cheap random permutations of the 64-bit shingle hashes
+_PERMUTATIONS = [random.Random(seed).getrandbits(64) for seed in range(NUM_PERM)]
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Reduce a URL to a canonical form shared by every link to the same item.
+
+    Drops the scheme, ``www.``-style prefixes, fragments and tracking
+    parameters. Reddit post links collapse to the post id (so old./np.
+    mirrors and slug variants match), ArXiv abs/pdf links lose their
+    version suffix, and YouTube short links become watch URLs.
+
+    Args:
+        url: URL as returned by a source
+
+    Returns:
+        Canonical URL string, or "" if the URL is empty
+    """
+    url = url.strip()
+    if not url:
+        return ""
+    known = _KNOWN_URL_RE.match(url)
+    if known:
+        if known.group("reddit"):
+            return f"reddit.com/comments/{known.group('reddit').lower()}"
+        return f"arxiv.org/abs/{known.group('arxiv')}"
+
+    parts = urlsplit(url if "//" in url else f"//{url}")
+    host = (parts.hostname or "").lower()
+    for prefix in ("www.", "old.", "np.", "m.", "export."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    path = parts.path
+
+    if host.endswith("reddit.com"):
+        match = _REDDIT_POST_RE.match(path.lower())
+        if match:
+            return f"reddit.com/comments/{match.group(1)}"
+    elif host == "redd.it":
+        return f"reddit.com/comments/{path.strip('/').lower()}"
+    elif host == "arxiv.org":
+        match = _ARXIV_ID_RE.match(path)
+        if match:
+            return f"arxiv.org/abs/{match.group(1)}"
+    elif host == "youtu.be":
+        return f"youtube.com/watch?v={path.strip('/')}"
+    elif host == "youtube.com" and path == "/watch":
+        video = dict(parse_qsl(parts.query)).get("v", "")
+        return f"youtube.com/watch?v={video}"
+
+    params = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _TRACKING_PARAMS.match(key.lower())
+    )
+    canonical = host + path.rstrip("/")
+    if params:
+        canonical += "?" + urlencode(params)
+    return canonical
+
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def _split(text: str) -> List[str]:
+    """Split normalized text into latin-script words and whole CJK runs."""
+    return _TOKEN_RE.findall(_normalize(text))
+
+
+def _is_cjk(token: str) -> bool:
+    return not token.isascii() and _CJK_RUN_RE.match(token) is not None
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into index terms.
+
+    Latin-script text is split into words; runs of CJK characters, which
+    have no spaces, are split into overlapping character bigrams.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms
+    """
+    if text.isascii():
+        return text.encode("ascii").translate(_ASCII_TERMS).decode("ascii").split()
+    terms = []
+    for token in _split(text):
+        if len(token) > 1 and _is_cjk(token):
+            terms.extend(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            terms.append(token)
+    return terms
+
+
+def title_shingles(title: str) -> Set[str]:
+    """
+    Build the shingle set used for near-duplicate detection.
+
+    Latin-script words contribute word bigrams and CJK runs contribute
+    character trigrams.
+
+    Args:
+        title: Item title
+
+    Returns:
+        Set of shingles
+    """
+    shingles = set()
+    words: List[str] = []
+    for token in _split(title):
+        if not _is_cjk(token):
+            words.append(token)
+        elif len(token) < 3:
+            shingles.add(token)
+        else:
+            shingles.update(token[i:i + 3] for i in range(len(token) - 2))
+    if len(words) == 1:
+        shingles.add(words[0])
+    shingles.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return shingles
+
+
+def minhash(shingles: Set[str]) -> Tuple[int, ...]:
+    """
+    Compute the MinHash signature of a shingle set.
+
+    Args:
+        shingles: Non-empty shingle set
+
+    Returns:
+        Signature of NUM_PERM values
+    """
+    hashes = [hash(shingle) & _MASK for shingle in shingles]
+    return tuple(min(map(mask.__xor__, hashes)) for mask in _PERMUTATIONS)
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    intersection = len(a & b)
+    return intersection / (len(a) + len(b) - intersection)
+
+
+@dataclass
+class RankedItem:
+    """One indexed item together with its ranking state."""
+
+    source: str
+    item: ResearchItem
+    position: int
+    canonical_url: str
+    terms: List[str]
+    score: float = 0.0
+    # Filled in lazily, only for items that reach near-duplicate checking
+    shingles: Optional[Set[str]] = None
+
+
+class ResultIndex:
+    """
+    In-memory index over the items collected for one query.
+
+    Exact duplicates (same canonical URL) are merged as items are added.
+    ``top_k`` then scores every item with BM25 against the queries, drops
+    near-duplicate titles found through MinHash LSH (keeping the better
+    scoring copy), and picks a relevant but diverse top-K.
+
+    Only tokenization and scoring touch every item; shingles and MinHash
+    signatures are computed for the best-scoring items as they are
+    visited, so ranking tens of thousands of items stays cheap.
+    """
+
+    def __init__(self, near_dup_threshold: float = DEFAULT_NEAR_DUP_THRESHOLD):
+        """
+        Args:
+            near_dup_threshold: Title Jaccard similarity treated as a duplicate
+        """
+        self.near_dup_threshold = near_dup_threshold
+        self.items: List[RankedItem] = []
+        self._urls: Set[str] = set()
+        self._positions: Counter = Counter()
+        # Items merged into an indexed URL, and titles dropped by the last top_k call
+        self.url_duplicates = 0
+        self.near_duplicates = 0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add(self, source: str, item: ResearchItem) -> bool:
+        """
+        Add an item to the index.
+
+        Args:
+            source: Source the item came from
+            item: Result item from a ResearchTools search
+
+        Returns:
+            False if the item duplicates an indexed URL or has no title and URL
+        """
+        canonical = canonicalize_url(item.url)
+        if not canonical and not item.title.strip():
+            return False
+        if canonical:
+            if canonical in self._urls:
+                self.url_duplicates += 1
+                return False
+            self._urls.add(canonical)
+
+        text = " ".join(getattr(item, field, "") for field in _TEXT_FIELDS)
+        self.items.append(RankedItem(
+            source=source,
+            item=item,
+            position=self._positions[source],
+            canonical_url=canonical,
+            terms=tokenize(text),
+        ))
+        self._positions[source] += 1
+        return True
+
+    def add_all(self, source: str, items: Iterable[ResearchItem]) -> None:
+        for item in items:
+            self.add(source, item)
+
+    def score(self, queries: Iterable[str]) -> None:
+        """
+        Set every item's BM25 relevance against the union of the query terms.
+
+        Args:
+            queries: Query strings (e.g. the original and the translated query)
+        """
+        query_terms = set()
+        for query in queries:
+            query_terms.update(tokenize(query))
+        if not self.items:
+            return
+
+        # One pass collects each item's matching terms and the document frequencies
+        matches = []
+        df: Counter = Counter()
+        for entry in self.items:
+            hits = query_terms.intersection(entry.terms)
+            matches.append(hits)
+            df.update(hits)
+
+        total = len(self.items)
+        average_length = sum(len(entry.terms) for entry in self.items) / total or 1.0
+        idf = {term: math.log(1 + (total - n + 0.5) / (n + 0.5)) for term, n in df.items()}
+
+        for entry, hits in zip(self.items, matches):
+            score = 0.0
+            if hits:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * len(entry.terms) / average_length)
+                for term in hits:
+                    tf = entry.terms.count(term)
+                    score += idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+            entry.score = score
+
+    def _distinct(self, ranked: List[RankedItem], limit: Optional[int]) -> List[RankedItem]:
+        """
+        Walk the ranked items, skipping near-identical titles, until ``limit`` are kept.
+
+        The first (best-ranked) item of every group of similar titles wins.
+        Candidates come from MinHash LSH buckets and are confirmed with the
+        exact Jaccard similarity of their title shingles.
+        """
+        rows = NUM_PERM // LSH_BANDS
+        buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        kept: List[RankedItem] = []
+        self.near_duplicates = 0
+        for entry in ranked:
+            if limit is not None and len(kept) >= limit:
+                break
+            if entry.shingles is None:
+                entry.shingles = title_shingles(entry.item.title)
+            if len(entry.shingles) < MIN_SHINGLES:
+                kept.append(entry)
+                continue
+
+            signature = minhash(entry.shingles)
+            keys = [
+                (band, signature[band * rows:(band + 1) * rows])
+                for band in range(LSH_BANDS)
+            ]
+            candidates = set()
+            for key in keys:
+                candidates.update(buckets.get(key, ()))
+            if any(
+                jaccard(entry.shingles, kept[i].shingles) >= self.near_dup_threshold
+                for i in candidates
+            ):
+                self.near_duplicates += 1
+                continue
+            for key in keys:
+                buckets.setdefault(key, []).append(len(kept))
+            kept.append(entry)
+        return kept
+
+    def top_k(
+        self,
+        queries: Iterable[str],
+        k: Optional[int] = DEFAULT_TOP_K,
+        diversity: float = DEFAULT_DIVERSITY,
+    ) -> List[RankedItem]:
+        """
+        Rank the indexed items and keep the best K distinct ones.
+
+        Ties (including when no item matches the query at all) fall back to
+        each source's own order, interleaved across sources. Diversification
+        greedily trades relevance against title similarity to the items
+        already picked (maximal marginal relevance).
+
+        Args:
+            queries: Query strings to score against
+            k: Number of items to keep (None for all)
+            diversity: Weight of redundancy against relevance, 0 to 1
+
+        Returns:
+            Selected items, most relevant first
+        """
+        self.score(queries)
+        ranked = sorted(self.items, key=lambda entry: (-entry.score, entry.position))
+        if k is None:
+            return self._distinct(ranked, None)
+
+        best = ranked[0].score if ranked else 0.0
+        if diversity <= 0 or best <= 0:
+            return self._distinct(ranked, k)
+
+        # Diversify among a shortlist; anything far below it would not be picked anyway
+        pool = self._distinct(ranked, k * 4)
+        redundancy = [0.0] * len(pool)
+        selected: List[RankedItem] = []
+        remaining = set(range(len(pool)))
+        while remaining and len(selected) < k:
+            pick = max(
+                remaining,
+                key=lambda i: (
+                    (1 - diversity) * pool[i].score / best - diversity * redundancy[i],
+                    -i,
+                ),
+            )
+            remaining.discard(pick)
+            chosen = pool[pick]
+            selected.append(chosen)
+            for i in remaining:
+                similarity = jaccard(pool[i].shingles, chosen.shingles)
+                if similarity > redundancy[i]:
+                    redundancy[i] = similarity
+        return selected
@@ -0,0 +1,305 @@
+"""Rate limiting, retries and circuit breaking for upstream API requests."""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import httpx
+
+from . import metrics
+
+
+# Status codes worth retrying: throttling and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a host's circuit breaker rejects a request."""
+
+
+@dataclass
+class HostPolicy:
+    """
+    Request policy for one upstream host.
+
+    Attributes:
+        rate: Sustained requests per second (None for unlimited)
+        burst: Requests allowed back to back before the rate applies
+        max_retries: Retries after the first attempt
+        backoff_base: Base delay in seconds for exponential backoff
+        backoff_max: Upper bound for a single backoff delay
+        failure_threshold: Consecutive failures that open the circuit
+        reset_timeout: Seconds the circuit stays open before a trial request
+    """
+
+    rate: Optional[float] = None
+    burst: int = 1
+    max_retries: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+
+
+DEFAULT_POLICIES = {
+    # ArXiv asks API clients to wait three seconds between requests
+    "export.arxiv.org": HostPolicy(rate=1 / 3, burst=1),
+    # Reddit throttles unauthenticated clients and reports its budget in X-Ratelimit-* headers
+    "www.reddit.com": HostPolicy(rate=1.0, burst=5),
+    # YouTube Data API quota is daily, so only smooth out bursts
+    "www.googleapis.com": HostPolicy(rate=5.0, burst=10),
+    # Medium serves tag feeds from its main host
+    "medium.com": HostPolicy(rate=1.0, burst=3),
+}
+DEFAULT_POLICY = HostPolicy()
+
+
+class TokenBucket:
+    """
+    Token bucket that callers reserve from in arrival order.
+
+    Tokens may go negative: each caller takes a token immediately and then
+    sleeps until the bucket would have refilled to cover its reservation,
+    which keeps waiters in FIFO order without a lock.
+    """
+
+    def __init__(self, rate: Optional[float], burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller back for the given time (e.g. after a 429)."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> float:
+        """
+        Wait until a request may be sent.
+
+        Returns:
+            Seconds spent waiting
+        """
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, self.paused_until - now)
+        if self.rate is not None:
+            self.tokens -= 1
+            wait = max(wait, -self.tokens / self.rate)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                if self.rate is not None:
+                    self.tokens += 1
+                raise
+        return wait
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a host after repeated failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    requests fail fast. Once ``reset_timeout`` has passed, a single trial
+    request is let through; its outcome closes or reopens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self.trial_in_flight or time.monotonic() - self.opened_at < self.reset_timeout:
+            return False
+        self.trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.trial_in_flight or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.trial_in_flight = False
+
+    def abandon_trial(self) -> None:
+        """Let another trial through after the current one was cancelled without an outcome."""
+        self.trial_in_flight = False
+
+
+def parse_retry_after(response: httpx.Response) -> Optional[float]:
+    """
+    Read the ``Retry-After`` header as a delay in seconds.
+
+    Args:
+        response: Upstream response
+
+    Returns:
+        Delay in seconds, or None if the header is missing or invalid
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """
+    Sends requests with per-host rate limits, retries and circuit breakers.
+
+    A single scheduler is meant to be shared by every concurrent query in
+    the process, so all of them draw from the same per-host budget.
+    """
+
+    def __init__(
+        self,
+        policies: Optional[Dict[str, HostPolicy]] = None,
+        default_policy: HostPolicy = DEFAULT_POLICY,
+    ):
+        """
+        Args:
+            policies: Policies keyed by host name (default: DEFAULT_POLICIES)
+            default_policy: Policy for hosts without an explicit entry
+        """
+        self.policies = DEFAULT_POLICIES if policies is None else policies
+        self.default_policy = default_policy
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def policy_for(self, host: str) -> HostPolicy:
+        return self.policies.get(host, self.default_policy)
+
+    def _state(self, host: str):
+        policy = self.policy_for(host)
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(policy.rate, policy.burst)
+            self._breakers[host] = CircuitBreaker(policy.failure_threshold, policy.reset_timeout)
+        return policy, self._buckets[host], self._breakers[host]
+
+    @staticmethod
+    def _backoff(policy: HostPolicy, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(policy.backoff_max, policy.backoff_base * 2 ** attempt))
+
+    @staticmethod
+    def _observe_rate_headers(response: httpx.Response, bucket: TokenBucket) -> None:
+        """Pause the host's bucket when the upstream reports an exhausted budget."""
+        remaining = response.headers.get("X-Ratelimit-Remaining")
+        reset = response.headers.get("X-Ratelimit-Reset")
+        try:
+            if remaining is not None and reset is not None and float(remaining) < 1:
+                bucket.pause(float(reset))
+        except ValueError:
+            pass
+
+    async def send(
+        self,
+        client: httpx.AsyncClient,
+        request: httpx.Request,
+        stream: bool = False,
+    ) -> httpx.Response:
+        """
+        Send a request, retrying throttled and transient failures.
+
+        Retries use jittered exponential backoff, stretched to honour any
+        ``Retry-After`` header. A 429 also pauses the host's bucket so the
+        other in-flight queries back off together.
+
+        Args:
+            client: HTTP client used to send the request
+            request: Prepared request
+            stream: Leave the response body unread for streaming
+
+        Returns:
+            The final response (possibly a 429/5xx once retries are exhausted)
+
+        Raises:
+            CircuitOpenError: If the host's circuit breaker is open
+            httpx.TransportError: If the last attempt failed at the transport level
+        """
+        host = request.url.host
+        policy, bucket, breaker = self._state(host)
+
+        for attempt in range(policy.max_retries + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(f"circuit open for {host} after repeated failures")
+            # An open circuit only lets the half-open trial through
+            trial = breaker.opened_at is not None
+
+            last_attempt = attempt == policy.max_retries
+            try:
+                waited = await bucket.acquire()
+                if waited:
+                    metrics.record("throttle_seconds", waited)
+                response = await client.send(request, stream=stream)
+            except httpx.TransportError:
+                breaker.record_failure()
+                if last_attempt:
+                    raise
+                delay = self._backoff(policy, attempt)
+            except BaseException:
+                # Cancelled (e.g. by a source deadline) or failed before an outcome was seen;
+                # a stuck trial would keep the circuit open for the rest of the process
+                if trial:
+                    breaker.abandon_trial()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    breaker.record_success()
+                    self._observe_rate_headers(response, bucket)
+                    return response
+
+                breaker.record_failure()
+                if last_attempt:
+                    return response
+                retry_after = parse_retry_after(response)
+                delay = max(retry_after or 0.0, self._backoff(policy, attempt))
+                if response.status_code == 429:
+                    bucket.pause(delay)
+                await response.aclose()
+
+            metrics.record("retries")
+            await asyncio.sleep(delay)
+
+        raise AssertionError("unreachable")
+
+
+_default_scheduler: Optional[RequestScheduler] = None
+
+
+def get_request_scheduler() -> RequestScheduler:
+    """
+    Get the process-wide request scheduler, creating it on first use.
+
+    Returns:
+        Shared RequestScheduler instance
+    """
+    global _default_scheduler
+    if _default_scheduler is None:
+        _default_scheduler = RequestScheduler()
+    return _default_scheduler
@@ -0,0 +1,189 @@
+"""Typed result records passed through the research pipeline, with fast JSON encoding."""
+
+import json
+from dataclasses import dataclass, field, fields, is_dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; the standard library encoder is used instead
+    orjson = None
+
+
+@dataclass(slots=True)
+class ResearchItem:
+    """One search hit. Each source has a subclass carrying its own fields."""
+
+    title: str = ""
+    url: str = ""
+
+
+@dataclass(slots=True)
+class RedditPost(ResearchItem):
+    """A Reddit submission."""
+
+    score: int = 0
+    author: str = ""
+    subreddit: str = ""
+    num_comments: int = 0
+    selftext: str = ""
+
+
+@dataclass(slots=True)
+class ArxivPaper(ResearchItem):
+    """An ArXiv entry."""
+
+    summary: str = ""
+    pdf_url: str = ""
+    published: str = ""
+    updated: str = ""
+    authors: List[str] = field(default_factory=list)
+    primary_category: str = ""
+    categories: List[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class YouTubeVideo(ResearchItem):
+    """A YouTube video with its statistics."""
+
+    description: str = ""
+    channel: str = ""
+    published: str = ""
+    view_count: int = 0
+    like_count: int = 0
+    comment_count: int = 0
+    duration: str = ""
+
+
+@dataclass(slots=True)
+class MediumArticle(ResearchItem):
+    """A Medium article from a tag feed."""
+
+    summary: str = ""
+    author: str = ""
+    published: str = ""
+    categories: List[str] = field(default_factory=list)
+
+
+# Item type of each source, used when records are rebuilt from JSON
+ITEM_TYPES: Dict[str, Type[ResearchItem]] = {
+    "reddit": RedditPost,
+    "arxiv": ArxivPaper,
+    "youtube": YouTubeVideo,
+    "medium": MediumArticle,
+}
+
+
+@dataclass(slots=True)
+class SourceResult:
+    """Everything one source returned for a query."""
+
+    source: str
+    results: List[ResearchItem] = field(default_factory=list)
+    query: str = ""
+    total_results: int = 0
+    error: Optional[str] = None
+    subreddit: Optional[str] = None
+    tag: Optional[str] = None
+    # "corpus" or "network" for results answered by the search subcommand
+    origin: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, source: str, data: Dict[str, Any]) -> "SourceResult":
+        """
+        Rebuild a result from its JSON form.
+
+        Args:
+            source: Source identifier selecting the item type (e.g. "reddit")
+            data: Decoded JSON object
+
+        Returns:
+            SourceResult holding typed items
+        """
+        values = _known_fields(cls, data)
+        values["results"] = [item_from_dict(source, item) for item in data.get("results", [])]
+        return cls(**values)
+
+
+@lru_cache(maxsize=None)
+def _field_names(cls: type) -> Tuple[str, ...]:
+    return tuple(f.name for f in fields(cls))
+
+
+def _known_fields(cls: type, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only the keys that are fields of ``cls`` (older or newer payloads may differ)."""
+    names = _field_names(cls)
+    return {key: value for key, value in data.items() if key in names}
+
+
+def item_from_dict(source: str, data: Dict[str, Any]) -> ResearchItem:
+    """
+    Rebuild an item from its JSON form.
+
+    Args:
+        source: Source identifier selecting the item type
+        data: Decoded JSON object
+
+    Returns:
+        Item of the source's type
+    """
+    cls = ITEM_TYPES.get(source, ResearchItem)
+    return cls(**_known_fields(cls, data))
+
+
+def to_dict(record: Any) -> Dict[str, Any]:
+    """
+    Convert a record (and the records it holds) to plain JSON-compatible objects.
+
+    Args:
+        record: A ResearchItem or SourceResult
+
+    Returns:
+        Dictionary with one key per field
+    """
+    data = {name: getattr(record, name) for name in _field_names(type(record))}
+    if isinstance(record, SourceResult):
+        data["results"] = [to_dict(item) for item in record.results]
+    return data
+
+
+def _default(value: Any) -> Any:
+    if is_dataclass(value) and not isinstance(value, type):
+        return to_dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any, indent: bool = False) -> str:
+    """
+    Encode records, or structures containing them, as JSON.
+
+    Uses orjson (which encodes dataclasses natively) when it is installed.
+
+    Args:
+        value: Value to encode
+        indent: Pretty-print with two-space indentation
+
+    Returns:
+        JSON text (non-ASCII characters are not escaped)
+    """
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_INDENT_2 if indent else 0).decode("utf-8")
+    if indent:
+        return json.dumps(value, default=_default, ensure_ascii=False, indent=2)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(text: Any) -> Any:
+    """
+    Decode JSON text (str or bytes).
+
+    Args:
+        text: JSON document
+
+    Returns:
+        Decoded value
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
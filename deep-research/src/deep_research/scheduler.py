@@ -0,0 +1,112 @@
+"""Concurrent fan-out scheduling for research source queries."""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+
+ErrorHandler = Callable[[str, str], Any]
+
+
+def _default_error(name: str, message: str) -> Dict[str, Any]:
+    """Build the fallback result used when a job fails or misses its deadline."""
+    return {"source": name, "error": message, "results": []}
+
+
+async def iter_fan_out(
+    jobs: Dict[str, Awaitable[Any]],
+    source_timeout: Optional[float] = None,
+    total_timeout: Optional[float] = None,
+    on_error: ErrorHandler = _default_error,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Run jobs concurrently and yield their results in completion order.
+
+    Every job gets its own deadline (``source_timeout``) and the whole
+    fan-out shares an overall budget (``total_timeout``). When the budget
+    runs out, the remaining jobs are cancelled and reported through
+    ``on_error`` so callers always receive one entry per job.
+
+    Args:
+        jobs: Mapping of job name to awaitable
+        source_timeout: Per-job deadline in seconds (None for no limit)
+        total_timeout: Overall time budget in seconds (None for no limit)
+        on_error: Callback building a fallback result from (name, message)
+
+    Yields:
+        (name, result) tuples as each job finishes
+    """
+    loop = asyncio.get_running_loop()
+    deadline = None if total_timeout is None else loop.time() + total_timeout
+
+    names: Dict[asyncio.Future, str] = {}
+    for name, job in jobs.items():
+        if source_timeout is not None:
+            job = asyncio.wait_for(job, source_timeout)
+        names[asyncio.ensure_future(job)] = name
+    order = {task: index for index, task in enumerate(names)}
+
+    pending = set(names)
+    try:
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - loop.time())
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                # Overall budget exhausted; stragglers are cancelled below
+                break
+            for task in sorted(done, key=order.__getitem__):
+                name = names[task]
+                if task.cancelled():
+                    yield name, on_error(name, "cancelled")
+                elif isinstance(task.exception(), TimeoutError) and source_timeout is not None:
+                    yield name, on_error(name, f"timed out after {source_timeout:g}s")
+                elif isinstance(task.exception(), TimeoutError):
+                    # A job's own timeout, with no per-job deadline to report
+                    yield name, on_error(name, str(task.exception()) or "timed out")
+                elif task.exception() is not None:
+                    yield name, on_error(name, str(task.exception()))
+                else:
+                    yield name, task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    for task in names:
+        if task in pending:
+            yield names[task], on_error(
+                names[task], f"exceeded total time budget of {total_timeout:g}s"
+            )
+
+
+async def fan_out(
+    jobs: Dict[str, Awaitable[Any]],
+    source_timeout: Optional[float] = None,
+    total_timeout: Optional[float] = None,
+    on_error: ErrorHandler = _default_error,
+) -> Dict[str, Any]:
+    """
+    Run jobs concurrently and collect their results.
+
+    The returned dictionary keeps the order of ``jobs``, regardless of the
+    order in which the jobs completed. Jobs that fail, miss their deadline
+    or are cut off by the overall budget are filled in via ``on_error``,
+    so partial results are always returned.
+
+    Args:
+        jobs: Mapping of job name to awaitable
+        source_timeout: Per-job deadline in seconds (None for no limit)
+        total_timeout: Overall time budget in seconds (None for no limit)
+        on_error: Callback building a fallback result from (name, message)
+
+    Returns:
+        Dictionary mapping each job name to its result
+    """
+    results = {}
+    async for name, result in iter_fan_out(
+        jobs, source_timeout=source_timeout, total_timeout=total_timeout, on_error=on_error
+    ):
+        results[name] = result
+    return {name: results[name] for name in jobs}
@@ -0,0 +1,260 @@
+"""``deep-research search``: answer queries from the local corpus and fetch only the gaps."""
+
+import argparse
+import asyncio
+import dataclasses
+import time
+from typing import Dict, List, Optional
+
+from .context import DEFAULT_TOKEN_BUDGET, render_item
+from .main import (
+    ENGLISH_ONLY_SOURCES,
+    SOURCE_LABELS,
+    add_llm_cache_arguments,
+    add_profile_arguments,
+    analyze_with_claude,
+    create_research_tools,
+    default_sources,
+    is_japanese,
+    research_query_sources,
+    translate_to_english,
+)
+from . import metrics
+from .ranking import canonicalize_url
+from .records import ResearchItem, SourceResult, dumps
+from .tools import ResearchTools, search_params
+
+
+# Sources whose results are written to the corpus
+CORPUS_SOURCES = ["reddit", "arxiv", "youtube", "medium"]
+
+DEFAULT_LIMIT = 10
+
+# A network fetch of the same query within this many hours counts as covering it
+DEFAULT_MAX_AGE_HOURS = 24.0
+
+
+def _merge(first: List[ResearchItem], rest: List[ResearchItem], limit: int) -> List[ResearchItem]:
+    """Items from ``first``, topped up with items from ``rest`` not already among them."""
+    merged = []
+    seen = set()
+    for item in first + rest:
+        key = canonicalize_url(item.url) or item.title
+        if key in seen:
+            continue
+        seen.add(key)
+        merged.append(item)
+    return merged[:limit]
+
+
+async def search_corpus(
+    user_query: str,
+    sources: Optional[List[str]] = None,
+    limit: int = DEFAULT_LIMIT,
+    max_age_hours: float = DEFAULT_MAX_AGE_HOURS,
+    offline: bool = False,
+    use_cache: bool = True,
+    refresh: bool = False,
+    tools: Optional[ResearchTools] = None,
+) -> Dict[str, SourceResult]:
+    """
+    Answer a query from the local corpus, fetching only the sources it cannot cover.
+
+    For each source the corpus is searched first. The source counts as
+    covered when the same query was fetched within ``max_age_hours`` or the
+    corpus already holds ``limit`` matching items; every other source is a
+    gap and is fetched with research_query_sources, which also writes the
+    new items to the corpus.
+
+    Args:
+        user_query: The research query
+        sources: Sources to search (default: default_sources())
+        limit: Maximum number of items per source
+        max_age_hours: How long a previous fetch of the same query stays valid
+        offline: Never touch the network; gaps return only the stored matches
+        use_cache: Serve repeated network searches from the response cache
+        refresh: Treat every source as a gap and refetch
+        tools: Long-lived ResearchTools to reuse; its corpus is the one searched.
+            When omitted a temporary instance with the default corpus is created.
+
+    Returns:
+        Results keyed by source in the research_query_sources format, with
+        ``origin`` set to "corpus" or "network"
+
+    Raises:
+        ValueError: If the given tools have no corpus
+    """
+    sources = sources or default_sources()
+    owns_tools = tools is None
+    if owns_tools:
+        tools = create_research_tools(use_cache=use_cache, refresh=refresh)
+    if tools.corpus is None:
+        raise ValueError("search requires ResearchTools with a corpus")
+    corpus = tools.corpus
+
+    try:
+        # English-only sources were fetched (and stored) with the translated query
+        english_query = user_query
+        if is_japanese(user_query) and ENGLISH_ONLY_SOURCES.intersection(sources):
+            try:
+                english_query = await translate_to_english(user_query, cache=tools.cache)
+            except Exception as e:
+                print(f"   翻訳に失敗したため元のクエリを使用します: {e}")
+
+        results: Dict[str, SourceResult] = {}
+        gaps = []
+        with metrics.stage("corpus"):
+            for source in sources:
+                query = english_query if source in ENGLISH_ONLY_SOURCES else user_query
+                hits = corpus.search(query, source=source, limit=limit)
+                # Only the default search of this size answers the query; subreddit,
+                # category and newest-first searches are recorded separately
+                last = corpus.last_search(source, query, search_params(source, query, limit))
+                covered = len(hits) >= limit
+                if last is not None and time.time() - last[0] <= max_age_hours * 3600:
+                    # The same query was fetched recently: replay its results in their original order
+                    hits = _merge(last[1], hits, limit)
+                    covered = True
+                results[source] = SourceResult(
+                    source=SOURCE_LABELS.get(source, source),
+                    query=query,
+                    results=hits,
+                    total_results=len(hits),
+                    origin="corpus",
+                )
+                if refresh or not covered:
+                    gaps.append(source)
+
+        if gaps and not offline:
+            fetched = await research_query_sources(
+                user_query, sources=gaps, tools=tools, max_results=limit
+            )
+            for source, data in fetched.items():
+                stored = results[source].results
+                if data.error and stored:
+                    # Keep answering from the corpus when the refetch fails
+                    results[source].error = data.error
+                    continue
+                merged = _merge(data.results, stored, limit)
+                results[source] = dataclasses.replace(
+                    data, results=merged, total_results=len(merged), origin="network"
+                )
+    finally:
+        if owns_tools:
+            await tools.close()
+
+    return results
+
+
+def print_results(results: Dict[str, SourceResult]) -> None:
+    """
+    Print search results as compact bullets, noting where each source was answered from.
+
+    Args:
+        results: Results returned by search_corpus
+    """
+    for source, data in results.items():
+        origin = "💾 ローカルコーパス" if data.origin == "corpus" else "🌐 ネットワーク"
+        print(f"\n📚 {data.source}（{origin}、{len(data.results)}件）")
+        if data.error:
+            print(f"   ⚠️  {data.error}")
+        for item in data.results:
+            print(render_item(item))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the parser for the ``search`` subcommand.
+
+    Returns:
+        Configured ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="deep-research search",
+        description="ローカルコーパスを優先して検索し、足りない分だけネットワークから取得します",
+    )
+    parser.add_argument("query", nargs="+", help="検索クエリ")
+    parser.add_argument(
+        "-s", "--sources",
+        nargs="+",
+        choices=CORPUS_SOURCES,
+        default=None,
+        help="検索するソース（デフォルト: YouTube は YOUTUBE_API_KEY 設定時のみ、他はすべて）",
+    )
+    parser.add_argument(
+        "-n", "--limit",
+        type=int,
+        default=DEFAULT_LIMIT,
+        help=f"ソースごとの最大件数（デフォルト: {DEFAULT_LIMIT}）",
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=DEFAULT_MAX_AGE_HOURS,
+        help=f"同じクエリの取得結果をローカルで再利用する期間（時間、デフォルト: {DEFAULT_MAX_AGE_HOURS:g}）",
+    )
+    parser.add_argument("--offline", action="store_true", help="ネットワークに接続せずローカルコーパスだけで回答する")
+    parser.add_argument("--refresh", action="store_true", help="ローカルコーパスを使わずに再取得する")
+    parser.add_argument("--no-cache", action="store_true", help="レスポンスキャッシュを使用しない")
+    parser.add_argument("--json", action="store_true", help="結果を JSON で出力する")
+    parser.add_argument("--analyze", action="store_true", help="検索結果を Claude で分析する")
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=DEFAULT_TOKEN_BUDGET,
+        help=f"プロンプトに含める収集データのおおよそのトークン上限（デフォルト: {DEFAULT_TOKEN_BUDGET}）",
+    )
+    add_llm_cache_arguments(parser)
+    add_profile_arguments(parser)
+    return parser
+
+
+async def run_search(args: argparse.Namespace) -> None:
+    user_query = " ".join(args.query)
+    started = time.perf_counter()
+    results = await search_corpus(
+        user_query,
+        sources=args.sources,
+        limit=args.limit,
+        max_age_hours=args.max_age,
+        offline=args.offline,
+        use_cache=not args.no_cache,
+        refresh=args.refresh,
+    )
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        print(dumps(results, indent=True))
+    else:
+        print_results(results)
+        local = sum(1 for data in results.values() if data.origin == "corpus")
+        print(f"\n⚡ {elapsed * 1000:.0f}ms（{len(results)}ソース中 {local}ソースをローカルから回答）")
+
+    if args.analyze:
+        print(f"\n{'='*60}")
+        print("🤖 AI分析")
+        print('='*60)
+        await analyze_with_claude(
+            user_query,
+            results,
+            token_budget=args.token_budget,
+            use_llm_cache=not args.no_llm_cache,
+        )
+        print("\n")
+
+
+def main(argv: Optional[list[str]] = None):
+    """
+    Entry point for ``deep-research search``.
+
+    Args:
+        argv: Arguments following the subcommand name
+    """
+    args = build_parser().parse_args(argv)
+    if args.profile or args.profile_output:
+        metrics.enable_profiling()
+    try:
+        asyncio.run(run_search(args))
+    finally:
+        if metrics.get_profiler().enabled:
+            metrics.report(args.profile_output)
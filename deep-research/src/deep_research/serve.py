@@ -0,0 +1,505 @@
+"""``deep-research serve``: HTTP front end streaming reports over SSE, coalescing identical queries."""
+
+import argparse
+import asyncio
+import json
+import time
+from contextlib import aclosing
+from http import HTTPStatus
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .batch import DEFAULT_TRANSLATION_SESSIONS
+from .cache import make_cache_key
+from .context import DEFAULT_TOKEN_BUDGET
+from .executor import configure_default_executor, get_default_executor
+from .main import (
+    SOURCE_LABELS,
+    add_llm_cache_arguments,
+    add_map_reduce_arguments,
+    add_profile_arguments,
+    add_worker_arguments,
+    analyze_with_claude,
+    create_analysis_session,
+    create_research_tools,
+    create_translation_session,
+    default_sources,
+    get_api_key,
+    iter_research_sources,
+)
+from . import metrics
+from .records import dumps
+from .session import SessionPool
+from .tools import ResearchTools
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+# Distinct queries researched at once, and distinct queries allowed to wait for a slot
+DEFAULT_MAX_ACTIVE = 4
+DEFAULT_MAX_QUEUE = 16
+
+# Seconds of silence after which an SSE comment is sent to keep proxies from closing the stream
+HEARTBEAT_SECONDS = 15.0
+
+# Limits on reading a request head
+MAX_HEADER_BYTES = 16 * 1024
+READ_TIMEOUT = 10.0
+
+
+class Flight:
+    """
+    One in-flight research job and the clients streaming it.
+
+    Every event is kept for the lifetime of the flight, so a client that
+    joins late first receives everything published so far and then
+    follows along live; all clients see the same stream.
+    """
+
+    def __init__(self, key: str, query: str, sources: List[str], analyze: bool):
+        self.key = key
+        self.query = query
+        self.sources = sources
+        self.analyze = analyze
+        self.events: List[Tuple[str, str]] = []
+        self.clients = 0
+        self.finished = False
+        self.task: Optional[asyncio.Task] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    def publish(self, event: str, value: Any) -> None:
+        """
+        Send an event to every current client and keep it for later ones.
+
+        Args:
+            event: SSE event name
+            value: Payload, encoded as JSON
+        """
+        entry = (event, dumps(value))
+        self.events.append(entry)
+        for queue in self._subscribers:
+            queue.put_nowait(entry)
+
+    def finish(self) -> None:
+        """End the stream of every client."""
+        self.finished = True
+        for queue in self._subscribers:
+            queue.put_nowait(None)
+
+    async def stream(self, heartbeat: float = HEARTBEAT_SECONDS) -> AsyncIterator[Optional[Tuple[str, str]]]:
+        """
+        Follow the flight from its first event to its last.
+
+        Args:
+            heartbeat: Seconds of silence after which None is yielded
+
+        Yields:
+            (event, data) pairs, or None when nothing happened for ``heartbeat`` seconds
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for entry in self.events:
+            queue.put_nowait(entry)
+        if self.finished:
+            queue.put_nowait(None)
+        else:
+            self._subscribers.add(queue)
+        self.clients += 1
+        try:
+            while True:
+                try:
+                    entry = await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if entry is None:
+                    return
+                yield entry
+        finally:
+            self._subscribers.discard(queue)
+
+
+class ResearchServer:
+    """
+    Asyncio HTTP server running the research pipeline for concurrent clients.
+
+    ``GET /research?q=...`` streams the research as server-sent events:
+    ``status`` (queued / running), one ``source`` per finished source,
+    ``report`` text as Claude writes it, then ``done`` (or ``error``).
+    ``GET /healthz`` returns the load counters as JSON.
+
+    Identical requests (same normalized query, sources and analysis flag)
+    are coalesced: while one is in flight, later ones join it and share its
+    fetch and analysis instead of starting their own. Admission control
+    bounds the work: at most ``max_active`` distinct queries run at once,
+    at most ``max_queue`` more wait for a slot, and anything beyond that is
+    rejected right away with 503 and Retry-After rather than queueing
+    without bound. Joining a flight that is already admitted is always
+    allowed.
+    """
+
+    def __init__(
+        self,
+        tools: Optional[ResearchTools] = None,
+        analyze: bool = True,
+        max_active: int = DEFAULT_MAX_ACTIVE,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+        map_reduce: bool = False,
+        max_results: Optional[int] = None,
+        use_llm_cache: bool = True,
+    ):
+        """
+        Args:
+            tools: Long-lived ResearchTools shared by every request; when
+                omitted one is created with the default caches and closed with the server
+            analyze: Offer Claude analysis (clients can opt out with ``analyze=0``)
+            max_active: Distinct queries researched at the same time
+            max_queue: Distinct queries allowed to wait for a free slot
+            token_budget: Approximate token budget for the collected data in each prompt
+            map_reduce: Analyze every collected item with map-reduce summarization
+            max_results: Items to request from each source (None for the defaults)
+            use_llm_cache: Replay the report of an identical analysis from the completion cache
+        """
+        self.owns_tools = tools is None
+        self.tools = tools or create_research_tools()
+        self.analyze = analyze
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.token_budget = token_budget
+        self.map_reduce = map_reduce
+        self.max_results = max_results
+        self.use_llm_cache = use_llm_cache
+
+        self.flights: Dict[str, Flight] = {}
+        self.slots = asyncio.Semaphore(max_active)
+        self.analysts = SessionPool(max_active, create_analysis_session) if analyze else None
+        self.translators = SessionPool(
+            min(max_active, DEFAULT_TRANSLATION_SESSIONS), create_translation_session
+        )
+        # Admitted flights that have not finished, and those of them holding a slot
+        self.pending = 0
+        self.running = 0
+        self.stats = {"requests": 0, "coalesced": 0, "rejected": 0, "completed": 0, "failed": 0}
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def __aenter__(self) -> "ResearchServer":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        """
+        Start listening.
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+        """
+        self.server = await asyncio.start_server(self._handle, host, port, limit=MAX_HEADER_BYTES)
+
+    async def serve_forever(self) -> None:
+        """Accept connections until cancelled."""
+        await self.server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop listening, cancel the running flights and release the shared resources."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        tasks = [flight.task for flight in self.flights.values() if flight.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.analysts is not None:
+            await self.analysts.close()
+        await self.translators.close()
+        if self.owns_tools:
+            await self.tools.close()
+
+    def status(self) -> Dict[str, int]:
+        """
+        Current load of the server.
+
+        Returns:
+            Running and queued flights, flights in memory, and the request counters
+        """
+        return {
+            "running": self.running,
+            "queued": self.pending - self.running,
+            "flights": len(self.flights),
+            **self.stats,
+        }
+
+    def join(self, query: str, sources: List[str], analyze: bool) -> Optional[Flight]:
+        """
+        Attach to the flight for a request, starting one if none is in flight.
+
+        Args:
+            query: Research query
+            sources: Sources to search
+            analyze: Whether the flight includes the Claude analysis
+
+        Returns:
+            The shared flight, or None if the server is saturated
+        """
+        self.stats["requests"] += 1
+        key = make_cache_key("serve", query, {"sources": sorted(sources), "analyze": analyze})
+        flight = self.flights.get(key)
+        if flight is not None:
+            self.stats["coalesced"] += 1
+            return flight
+        if self.pending >= self.max_active + self.max_queue:
+            self.stats["rejected"] += 1
+            return None
+
+        flight = Flight(key, query, sources, analyze)
+        self.flights[key] = flight
+        self.pending += 1
+        flight.task = asyncio.create_task(self._run(flight))
+        return flight
+
+    async def _run(self, flight: Flight) -> None:
+        """Research (and analyze) one flight, publishing its progress."""
+        started = time.perf_counter()
+        try:
+            if self.slots.locked():
+                flight.publish("status", {"state": "queued", "position": self.pending - self.running})
+            async with self.slots:
+                self.running += 1
+                try:
+                    print(f"🔍 調査開始: {flight.query}")
+                    flight.publish("status", {"state": "running"})
+                    with metrics.stage("serve"):
+                        research_data = {}
+                        async for source, result in iter_research_sources(
+                            flight.query,
+                            sources=flight.sources,
+                            tools=self.tools,
+                            translator=self.translators,
+                            max_results=self.max_results,
+                        ):
+                            research_data[source] = result
+                            flight.publish("source", result)
+
+                        if flight.analyze:
+                            async with self.analysts.acquire() as session:
+                                await analyze_with_claude(
+                                    flight.query,
+                                    research_data,
+                                    echo=False,
+                                    token_budget=self.token_budget,
+                                    session=session,
+                                    map_reduce=self.map_reduce,
+                                    cache=self.tools.cache,
+                                    use_llm_cache=self.use_llm_cache,
+                                    on_text=lambda text: flight.publish("report", {"text": text}),
+                                )
+                finally:
+                    self.running -= 1
+
+            elapsed = round(time.perf_counter() - started, 3)
+            flight.publish("done", {"elapsed": elapsed, "clients": flight.clients})
+            self.stats["completed"] += 1
+            print(f"✅ {flight.query}（{elapsed:.1f}秒、{flight.clients}クライアント）")
+        except Exception as e:
+            self.stats["failed"] += 1
+            flight.publish("error", {"message": str(e)})
+            print(f"❌ {flight.query}: {e}")
+        finally:
+            flight.finish()
+            self.flights.pop(flight.key, None)
+            self.pending -= 1
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one connection (one request; the connection is closed afterwards)."""
+        try:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), READ_TIMEOUT)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                return
+            parts = head.split(b"\r\n", 1)[0].decode("latin-1").split()
+            if len(parts) != 3:
+                await self._send_json(writer, 400, {"error": "malformed request line"})
+                return
+            method, target, _ = parts
+            url = urlsplit(target)
+            if method != "GET":
+                await self._send_json(writer, 405, {"error": "only GET is supported"}, {"Allow": "GET"})
+            elif url.path == "/healthz":
+                await self._send_json(writer, 200, self.status())
+            elif url.path == "/research":
+                await self._research(writer, parse_qs(url.query))
+            else:
+                await self._send_json(writer, 404, {"error": "not found"})
+        except ConnectionError:
+            pass  # The client went away; its flight carries on for the others
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _research(self, writer: asyncio.StreamWriter, params: Dict[str, List[str]]) -> None:
+        """Validate a /research request and stream its flight as server-sent events."""
+        query = " ".join(params.get("q", [""])[0].split())
+        if not query:
+            await self._send_json(writer, 400, {"error": "q is required"})
+            return
+        if "sources" in params:
+            sources = [source for source in params["sources"][0].split(",") if source]
+        else:
+            sources = default_sources()
+        unknown = [source for source in sources if source not in SOURCE_LABELS]
+        if unknown or not sources:
+            await self._send_json(
+                writer, 400, {"error": f"unknown sources: {', '.join(unknown) or '(none)'}"}
+            )
+            return
+        analyze = self.analyze and params.get("analyze", ["1"])[0].lower() not in ("0", "false", "no")
+
+        flight = self.join(query, sources, analyze)
+        if flight is None:
+            await self._send_json(writer, 503, {"error": "server busy"}, {"Retry-After": "5"})
+            return
+
+        self._write_head(
+            writer, 200, "text/event-stream; charset=utf-8", {"Cache-Control": "no-cache"}
+        )
+        # Close the stream (and unsubscribe) as soon as this client goes away
+        async with aclosing(flight.stream()) as events:
+            async for entry in events:
+                if entry is None:
+                    writer.write(b": keep-alive\n\n")
+                else:
+                    event, data = entry
+                    writer.write(f"event: {event}\ndata: {data}\n\n".encode("utf-8"))
+                await writer.drain()
+
+    @staticmethod
+    def _write_head(
+        writer: asyncio.StreamWriter,
+        status: int,
+        content_type: str,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        lines = [
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+            f"Content-Type: {content_type}",
+            "Connection: close",
+        ]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    async def _send_json(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self._write_head(
+            writer,
+            status,
+            "application/json; charset=utf-8",
+            {"Content-Length": str(len(payload)), **(headers or {})},
+        )
+        writer.write(payload)
+        await writer.drain()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the parser for the ``serve`` subcommand.
+
+    Returns:
+        Configured ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="deep-research serve",
+        description="リサーチを HTTP サービスとして提供し、レポートを SSE でストリーミングします",
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"待ち受けるアドレス（デフォルト: {DEFAULT_HOST}）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"待ち受けるポート（デフォルト: {DEFAULT_PORT}）")
+    parser.add_argument(
+        "--max-active",
+        type=int,
+        default=DEFAULT_MAX_ACTIVE,
+        help=f"同時に処理する異なるクエリの数（デフォルト: {DEFAULT_MAX_ACTIVE}）",
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=DEFAULT_MAX_QUEUE,
+        help=f"処理待ちにできる異なるクエリの数。超えると 503 を返す（デフォルト: {DEFAULT_MAX_QUEUE}）",
+    )
+    parser.add_argument("--no-analyze", action="store_true", help="Claude による分析を行わず検索結果だけを返す")
+    parser.add_argument("--no-cache", action="store_true", help="レスポンスキャッシュを使用しない")
+    parser.add_argument("--no-corpus", action="store_true", help="取得した結果をローカルコーパスに保存しない")
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=DEFAULT_TOKEN_BUDGET,
+        help=f"プロンプトに含める収集データのおおよそのトークン上限（デフォルト: {DEFAULT_TOKEN_BUDGET}）",
+    )
+    add_map_reduce_arguments(parser)
+    add_llm_cache_arguments(parser)
+    add_worker_arguments(parser)
+    add_profile_arguments(parser)
+    return parser
+
+
+async def run_server(args: argparse.Namespace) -> None:
+    analyze = not args.no_analyze
+    if analyze:
+        try:
+            get_api_key()
+        except ValueError as e:
+            print(f"⚠️  AI分析を無効にして起動します: {e}")
+            analyze = False
+
+    tools = create_research_tools(use_cache=not args.no_cache, use_corpus=not args.no_corpus)
+    async with tools, ResearchServer(
+        tools,
+        analyze=analyze,
+        max_active=args.max_active,
+        max_queue=args.max_queue,
+        token_budget=args.token_budget,
+        map_reduce=args.map_reduce,
+        max_results=args.max_results,
+        use_llm_cache=not args.no_llm_cache,
+    ) as server:
+        await server.start(args.host, args.port)
+        print(f"🌐 {server.base_url}/research?q=<クエリ> で待ち受け中（Ctrl+C で終了）")
+        await server.serve_forever()
+
+
+def main(argv: Optional[list[str]] = None):
+    """
+    Entry point for ``deep-research serve``.
+
+    Args:
+        argv: Arguments following the subcommand name
+    """
+    args = build_parser().parse_args(argv)
+    if args.profile or args.profile_output:
+        metrics.enable_profiling()
+    if args.workers is not None:
+        configure_default_executor(args.workers)
+
+    try:
+        asyncio.run(run_server(args))
+    except KeyboardInterrupt:
+        print("\n👋 サーバーを停止しました")
+    finally:
+        get_default_executor().close()
+        if metrics.get_profiler().enabled:
+            metrics.report(args.profile_output)
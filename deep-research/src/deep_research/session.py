@@ -0,0 +1,367 @@
+"""Persistent Claude agent session for multi-turn analysis, and one-shot prompts with a reply cache."""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from .cache import CompletionCache
+from . import metrics
+
+if TYPE_CHECKING:
+    from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient
+
+
+# Seconds to wait for the CLI to acknowledge /clear before restarting the client instead
+RESET_TIMEOUT = 10.0
+
+
+def sdk() -> ModuleType:
+    """
+    The claude_agent_sdk module, imported on first use.
+
+    The SDK accounts for most of the CLI's import time, so it is only
+    loaded once a Claude call is actually about to be made.
+
+    Returns:
+        The claude_agent_sdk module
+    """
+    return metrics.lazy_import("claude_agent_sdk")
+
+
+def preload_sdk() -> None:
+    """Import the SDK on a background thread, e.g. while waiting for user input."""
+    threading.Thread(target=sdk, name="sdk-preload", daemon=True).start()
+
+
+def claude_query(*, prompt: str, options: "ClaudeAgentOptions") -> AsyncIterator[Any]:
+    """``claude_agent_sdk.query``, importing the SDK on first use."""
+    return sdk().query(prompt=prompt, options=options)
+
+
+class AgentSession:
+    """
+    One long-lived ClaudeSDKClient conversation.
+
+    The client (and its CLI subprocess) is started on first use and kept
+    open, so successive turns skip the startup cost and can build on the
+    earlier turns without resending their context. Turns are serialized;
+    concurrent callers wait for the current turn to finish.
+
+    ``reset`` starts a new conversation on the same warm client, and
+    ``max_turns`` does so automatically so that a session answering many
+    independent requests does not grow its context without bound.
+
+    Turns answered without Claude (replayed from a cache) are recorded with
+    ``seed`` and sent along with the next real turn, so the conversation
+    still sees them.
+    """
+
+    def __init__(
+        self,
+        options: Optional["ClaudeAgentOptions"] = None,
+        max_turns: Optional[int] = None,
+        system_prompt: Optional[str] = None,
+    ):
+        """
+        Args:
+            options: Options for the underlying client (system prompt, model, ...)
+            max_turns: Turns after which the conversation is reset automatically
+                (None to keep it until reset is called)
+            system_prompt: System prompt of the default options, used when
+                ``options`` is omitted; the SDK is then not imported until first use
+        """
+        self._options = options
+        self.system_prompt = system_prompt
+        self.max_turns = max_turns
+        self.client: Optional["ClaudeSDKClient"] = None
+        self.turns = 0
+        self._seeded: List[Tuple[str, str]] = []
+        self._lock = asyncio.Lock()
+
+    @property
+    def options(self) -> "ClaudeAgentOptions":
+        """Options of the underlying client, built on first access."""
+        if self._options is None:
+            self._options = sdk().ClaudeAgentOptions(system_prompt=self.system_prompt)
+        return self._options
+
+    async def __aenter__(self) -> "AgentSession":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def connect(self) -> None:
+        """Start the client if it is not running yet."""
+        if self.client is None:
+            client = sdk().ClaudeSDKClient(options=self.options)
+            await client.connect()
+            self.client = client
+
+    async def close(self) -> None:
+        """Stop the client; the next turn starts a fresh conversation."""
+        self.turns = 0
+        self._seeded = []
+        if self.client is not None:
+            client, self.client = self.client, None
+            await client.disconnect()
+
+    async def reset(self) -> None:
+        """Start a new conversation, keeping the client process running."""
+        async with self._lock:
+            await self._reset()
+
+    async def _reset(self) -> None:
+        self._seeded = []
+        if self.client is None or self.turns == 0:
+            self.turns = 0
+            return
+
+        claude = sdk()
+        # Older SDKs have no ConversationResetMessage; the /clear turn still ends with a ResultMessage
+        done_types = (getattr(claude, "ConversationResetMessage", claude.ResultMessage), claude.ResultMessage)
+
+        async def clear():
+            await self.client.query("/clear")
+            async for message in self.client.receive_messages():
+                if isinstance(message, done_types):
+                    return
+
+        try:
+            await asyncio.wait_for(clear(), RESET_TIMEOUT)
+        except (asyncio.TimeoutError, claude.ClaudeSDKError):
+            # Fall back to a fresh client if the CLI does not acknowledge the reset
+            await self.close()
+        self.turns = 0
+
+    def seed(self, prompt: str, reply: str) -> None:
+        """
+        Record a turn that was answered without Claude, e.g. from a cache.
+
+        Args:
+            prompt: User message of the turn
+            reply: Reply given to it
+        """
+        self._seeded.append((prompt, reply))
+        self.turns += 1
+
+    async def ask(
+        self,
+        prompt: str,
+        echo: bool = False,
+        on_text: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """
+        Send one turn and collect the reply.
+
+        Args:
+            prompt: User message for this turn
+            echo: Stream the reply to stdout as it arrives
+            on_text: Called with each text block as it arrives
+
+        Returns:
+            Text of the reply
+        """
+        async with self._lock:
+            if self.max_turns is not None and self.turns >= self.max_turns:
+                await self._reset()
+            await self.connect()
+            claude = sdk()
+            if self._seeded:
+                earlier = "\n\n".join(
+                    f"[User]\n{turn_prompt}\n\n[Assistant]\n{turn_reply}"
+                    for turn_prompt, turn_reply in self._seeded
+                )
+                prompt = f"Earlier in this conversation:\n\n{earlier}\n\n---\n\n{prompt}"
+                self._seeded = []
+            reply = ""
+            with metrics.stage("analyze") as span:
+                started = time.perf_counter()
+                try:
+                    await self.client.query(prompt)
+                    async for message in self.client.receive_response():
+                        if isinstance(message, claude.AssistantMessage):
+                            for block in message.content:
+                                if isinstance(block, claude.TextBlock):
+                                    if not reply:
+                                        span.set("ttft", round(time.perf_counter() - started, 6))
+                                    reply += block.text
+                                    if echo:
+                                        print(block.text, end="", flush=True)
+                                    if on_text is not None:
+                                        on_text(block.text)
+                        elif isinstance(message, claude.ResultMessage) and message.usage:
+                            span.add("input_tokens", message.usage.get("input_tokens", 0))
+                            span.add("output_tokens", message.usage.get("output_tokens", 0))
+                except BaseException:
+                    # A broken or interrupted conversation cannot be resumed mid-turn
+                    await self.close()
+                    raise
+            self.turns += 1
+            return reply
+
+
+class SessionPool:
+    """
+    A small pool of AgentSessions shared by concurrent callers.
+
+    Sessions are started lazily, up to ``size``, and handed out one caller
+    at a time, so concurrent queries each get a warm client of their own
+    without paying the process startup for every query.
+    """
+
+    def __init__(self, size: int, factory: Callable[[], AgentSession]):
+        """
+        Args:
+            size: Maximum number of sessions
+            factory: Creates a new (not yet connected) session
+        """
+        self.size = size
+        self.factory = factory
+        self._sessions: List[AgentSession] = []
+        self._idle: asyncio.Queue = asyncio.Queue()
+
+    async def __aenter__(self) -> "SessionPool":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @asynccontextmanager
+    async def acquire(self, fresh: bool = True) -> AsyncIterator[AgentSession]:
+        """
+        Borrow a session for one or more turns.
+
+        Args:
+            fresh: Reset the session's conversation before handing it out
+
+        Yields:
+            A session used by no one else until the block exits
+        """
+        if self._idle.empty() and len(self._sessions) < self.size:
+            session = self.factory()
+            self._sessions.append(session)
+        else:
+            session = await self._idle.get()
+        try:
+            if fresh:
+                await session.reset()
+            yield session
+        finally:
+            self._idle.put_nowait(session)
+
+    async def ask(self, prompt: str, echo: bool = False) -> str:
+        """
+        Send a single independent turn on any idle session.
+
+        Args:
+            prompt: User message
+            echo: Stream the reply to stdout as it arrives
+
+        Returns:
+            Text of the reply
+        """
+        async with self.acquire(fresh=False) as session:
+            return await session.ask(prompt, echo=echo)
+
+    async def close(self) -> None:
+        """Stop every session in the pool."""
+        sessions, self._sessions = self._sessions, []
+        await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+
+
+async def complete(
+    prompt: str,
+    stage: str,
+    echo: bool = False,
+    session: Optional[AgentSession] = None,
+    options: Optional["ClaudeAgentOptions"] = None,
+    completions: Optional[CompletionCache] = None,
+    span_attrs: Optional[Dict[str, float]] = None,
+    on_text: Optional[Callable[[str], None]] = None,
+) -> str:
+    """
+    Send one prompt to Claude and collect the reply.
+
+    With a completion cache, the reply to an identical prompt sent with
+    identical options is replayed from the cache (streamed to stdout the
+    same way when ``echo`` is set) and Claude is not called. A session turn
+    is only cached when it opens the conversation, since later replies
+    depend on the earlier turns; a replayed turn is seeded into the session
+    so that follow-up turns still see it.
+
+    Args:
+        prompt: Full prompt
+        stage: Profiling stage name of a one-off query (e.g. "map", "analyze");
+            session turns are timed by the session
+        echo: Stream the reply to stdout as it arrives
+        session: Warm session to ask; when omitted a one-off query is made
+        options: Options for the one-off query (ignored when a session is given)
+        completions: Reply cache to read and update (None to always call Claude)
+        span_attrs: Numeric attributes added to the one-off query's profiling span
+        on_text: Called with each text block as it arrives (or is replayed)
+
+    Returns:
+        Text of the reply
+    """
+    if session is not None:
+        options = session.options
+        if session.turns:
+            completions = None
+    options = options or sdk().ClaudeAgentOptions()
+
+    def replay() -> Optional[str]:
+        blocks = completions.get(prompt, options) if completions is not None else None
+        if blocks is None:
+            return None
+        metrics.record("completion_hits")
+        for block in blocks:
+            if echo:
+                print(block, end="", flush=True)
+            if on_text is not None:
+                on_text(block)
+        return "".join(blocks)
+
+    if session is not None:
+        reply = replay()
+        if reply is not None:
+            session.seed(prompt, reply)
+            return reply
+        reply = await session.ask(prompt, echo=echo, on_text=on_text)
+        if completions is not None and reply:
+            completions.set(prompt, options, [reply])
+        return reply
+
+    with metrics.stage(stage) as span:
+        for name, value in (span_attrs or {}).items():
+            span.add(name, value)
+        reply = replay()
+        if reply is not None:
+            return reply
+
+        claude = sdk()
+        blocks = []
+        started = time.perf_counter()
+        async for event in claude_query(prompt=prompt, options=options):
+            if isinstance(event, claude.AssistantMessage):
+                for block in event.content:
+                    if isinstance(block, claude.TextBlock):
+                        if not blocks:
+                            span.set("ttft", round(time.perf_counter() - started, 6))
+                        blocks.append(block.text)
+                        if echo:
+                            print(block.text, end="", flush=True)
+                        if on_text is not None:
+                            on_text(block.text)
+            elif isinstance(event, claude.ResultMessage) and event.usage:
+                span.add("input_tokens", event.usage.get("input_tokens", 0))
+                span.add("output_tokens", event.usage.get("output_tokens", 0))
+
+    reply = "".join(blocks)
+    if completions is not None and reply:
+        completions.set(prompt, options, blocks)
+    return reply
@@ -1,48 +1,398 @@
 """Research tools for collecting information from various media sources."""
 
+import asyncio
+import functools
+import os
+import re
 import httpx
-from typing import Any, Dict, List
-import json
+from contextlib import asynccontextmanager
+from importlib.util import find_spec
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .cache import ResponseCache, ValidatorStore
+from .corpus import ResearchCorpus, prepare_items
+from .executor import PostProcessor, get_default_executor
+from .feeds import iter_arxiv_entries, iter_rss_items
+from .paging import iter_pages
+from .ratelimit import RequestScheduler, get_request_scheduler
+from .records import (
+    ArxivPaper,
+    RedditPost,
+    ResearchItem,
+    SourceResult,
+    YouTubeVideo,
+    loads,
+)
+from . import metrics
+
+
+# Connection pool shared by every request made through one ResearchTools instance.
+# Idle connections are kept long enough to survive the pause between interactive queries.
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=32,
+    max_keepalive_connections=16,
+    keepalive_expiry=120.0,
+)
+
+# Maximum number of in-flight requests to a single host
+DEFAULT_PER_HOST_LIMIT = 4
+
+# Page sizes used when following Reddit's `after` cursor and ArXiv's `start` offset
+REDDIT_PAGE_SIZE = 100  # Reddit's maximum
+ARXIV_PAGE_SIZE = 200
+YOUTUBE_PAGE_SIZE = 50  # Maximum for search.list, and for the IDs in one videos.list call
+
+# Upstream endpoints (overridable, e.g. to point at a local mock server)
+REDDIT_BASE_URL = "https://www.reddit.com"
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
+YOUTUBE_API_URL = "https://www.googleapis.com/youtube/v3"
+MEDIUM_FEED_URL = "https://medium.com/feed"
+
+
+def accept_encoding() -> str:
+    """
+    Content codings this process can decode, best compression first.
+
+    Brotli and Zstandard are advertised only when their optional decoders
+    (``brotli``/``brotlicffi``, ``zstandard``) are installed.
+    """
+    codings = []
+    if find_spec("zstandard") is not None:
+        codings.append("zstd")
+    if find_spec("brotli") is not None or find_spec("brotlicffi") is not None:
+        codings.append("br")
+    return ", ".join(codings + ["gzip", "deflate"])
+
+
+def create_http_client(timeout: float = 30.0, limits: httpx.Limits = DEFAULT_LIMITS) -> httpx.AsyncClient:
+    """
+    Create an HTTP client suitable for sharing across many research queries.
+
+    Args:
+        timeout: Request timeout in seconds
+        limits: Connection pool limits
+
+    Returns:
+        AsyncClient with HTTP/2, keep-alive and compressed transfer enabled
+    """
+    return httpx.AsyncClient(
+        timeout=timeout,
+        limits=limits,
+        http2=True,
+        headers={"Accept-Encoding": accept_encoding()},
+    )
+
+
+def instrumented(source: str):
+    """
+    Decorator recording a profiling span for a ``search_*`` method.
+
+    The span is labelled with the source and records the number of results
+    and any error; bytes and cache hits are added by the request helpers.
+
+    Args:
+        source: Source identifier used as the span label
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs) -> SourceResult:
+            with metrics.stage("search", source=source) as span:
+                result = await method(self, *args, **kwargs)
+                span.add("results", len(result.results))
+                if result.error:
+                    span.set("error", result.error)
+                return result
+        return wrapper
+    return decorator
 
 
 class ResearchTools:
-    """Tools for collecting information from YouTube, Reddit, ArXiv, and Medium."""
+    """
+    Tools for collecting information from YouTube, Reddit, ArXiv, and Medium.
 
-    def __init__(self):
-        self.client = httpx.AsyncClient(timeout=30.0)
+    An instance owns a pooled HTTP client and can be used as an async
+    context manager, so a single instance can serve every query of an
+    interactive session or batch run while reusing warm connections.
+    """
 
-    async def search_youtube(self, query: str, max_results: int = 5) -> Dict[str, Any]:
+    def __init__(
+        self,
+        cache: Optional[ResponseCache] = None,
+        refresh: bool = False,
+        client: Optional[httpx.AsyncClient] = None,
+        per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+        reddit_base_url: str = REDDIT_BASE_URL,
+        arxiv_api_url: str = ARXIV_API_URL,
+        youtube_api_url: str = YOUTUBE_API_URL,
+        medium_feed_url: str = MEDIUM_FEED_URL,
+        youtube_api_key: Optional[str] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        corpus: Optional[ResearchCorpus] = None,
+        executor: Optional[PostProcessor] = None,
+        validators: Optional[ValidatorStore] = None,
+    ):
+        """
+        Args:
+            cache: Response cache to read from and write to (None disables caching)
+            refresh: Skip cache reads and refetch, still storing fresh responses
+            client: Shared HTTP client (created and owned by this instance if omitted)
+            per_host_limit: Maximum number of concurrent requests to one host
+            reddit_base_url: Base URL of the Reddit API
+            arxiv_api_url: URL of the ArXiv query API
+            youtube_api_url: Base URL of the YouTube Data API v3
+            medium_feed_url: Base URL of Medium's RSS feeds
+            youtube_api_key: YouTube Data API key (default: the YOUTUBE_API_KEY environment variable)
+            scheduler: Rate limiting and retry scheduler (default: the process-wide one)
+            corpus: Local corpus that every fetched item is written to (None disables it)
+            executor: Process pool for CPU-heavy post-processing (default: the process-wide one)
+            validators: Store of ETag / Last-Modified validators used to revalidate
+                repeated requests (None disables conditional requests)
+        """
+        self._owns_client = client is None
+        self.client = client or create_http_client()
+        self.cache = cache
+        self.refresh = refresh
+        self.per_host_limit = per_host_limit
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self.reddit_base_url = reddit_base_url.rstrip("/")
+        self.arxiv_api_url = arxiv_api_url
+        self.youtube_api_url = youtube_api_url.rstrip("/")
+        self.medium_feed_url = medium_feed_url.rstrip("/")
+        self.youtube_api_key = youtube_api_key or os.getenv("YOUTUBE_API_KEY")
+        self.validators = validators
+        self.scheduler = scheduler or get_request_scheduler()
+        self.corpus = corpus
+        self.executor = executor or get_default_executor()
+
+    async def __aenter__(self) -> "ResearchTools":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        """Return the semaphore limiting concurrent requests to the URL's host."""
+        parsed = httpx.URL(url)
+        host = f"{parsed.host}:{parsed.port or parsed.scheme}"
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+        return slot
+
+    @asynccontextmanager
+    async def _stream(self, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Open a streaming GET request whose body can be consumed incrementally."""
+        request = self.client.build_request("GET", url, **kwargs)
+        async with self._host_slot(url):
+            response = await self.scheduler.send(self.client, request, stream=True)
+            try:
+                yield response
+            finally:
+                await response.aclose()
+                metrics.record("bytes_downloaded", response.num_bytes_downloaded)
+
+    async def _conditional_chunks(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a GET response body, revalidating the previous response of the same URL.
+
+        Every source request goes through here. The ETag and Last-Modified
+        of each complete response are kept in the validator store (keyed by
+        the URL with its parameters) and sent back as If-None-Match /
+        If-Modified-Since. When the server answers 304 Not Modified the
+        stored body is replayed, so polling an unchanged topic costs a round
+        trip but no download or quota.
+        """
+        key = str(httpx.URL(url, params=params))
+        stored = self.validators.get(key) if self.validators is not None else None
+        headers = dict(headers or {})
+        if stored is not None:
+            etag, last_modified, _ = stored
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        async with self._stream(url, params=params, headers=headers) as response:
+            if response.status_code == 304 and stored is not None:
+                metrics.record("not_modified")
+                metrics.record("bytes_not_modified", len(stored[2]))
+                yield stored[2]
+                return
+            response.raise_for_status()
+
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            body = [] if self.validators is not None and (etag or last_modified) else None
+            async for chunk in response.aiter_bytes():
+                if body is not None:
+                    body.append(chunk)
+                yield chunk
+
+        # Only a body that was read to the end can be replayed later
+        if body is not None:
+            self.validators.set(key, etag, last_modified, b"".join(body))
+
+    async def _conditional_get(self, url: str, **kwargs) -> bytes:
+        """Read a whole body through _conditional_chunks."""
+        return b"".join([chunk async for chunk in self._conditional_chunks(url, **kwargs)])
+
+    def _cache_get(self, source: str, query: str, params: Dict[str, Any]) -> Optional[SourceResult]:
+        """Return a cached response unless caching is disabled or a refresh was requested."""
+        if self.cache is None or self.refresh:
+            return None
+        cached = self.cache.get(source, query, params)
+        metrics.record("cache_hits" if cached is not None else "cache_misses")
+        if isinstance(cached, dict):
+            # Entries read back from disk are plain JSON
+            cached = SourceResult.from_dict(source, cached)
+        return cached
+
+    def _cache_set(self, source: str, query: str, params: Dict[str, Any], result: SourceResult) -> None:
+        """Store a successful response in the cache."""
+        if self.cache is not None:
+            self.cache.set(source, query, params, result)
+
+    async def _corpus_add(
+        self, source: str, query: str, params: Dict[str, Any], results: List[ResearchItem]
+    ) -> None:
+        """Index freshly fetched results in the local corpus, tokenizing them off the event loop."""
+        if self.corpus is not None:
+            prepared = await self.executor.map_chunks(prepare_items, results)
+            self.corpus.record_search(source, query, results, prepared, params=params)
+
+    @instrumented("youtube")
+    async def search_youtube(self, query: str, max_results: int = 10, newest_first: bool = False) -> SourceResult:
         """
         Search YouTube for videos related to the query.
 
-        Note: This is a placeholder. In production, you would need:
-        - YouTube Data API v3 key
-        - Implement actual API calls using httpx
+        Uses the YouTube Data API v3 and requires an API key (YOUTUBE_API_KEY).
 
         Args:
             query: Search query
             max_results: Maximum number of results to return
+            newest_first: Order by upload date instead of relevance
 
         Returns:
-            Dictionary with search results
-        """
-        # Placeholder implementation
-        # In production, use: https://developers.google.com/youtube/v3/docs/search/list
-        return {
-            "source": "YouTube",
-            "query": query,
-            "results": [
-                {
-                    "title": f"Video about {query}",
-                    "description": "This is a placeholder. Implement YouTube Data API integration.",
-                    "url": "https://youtube.com/watch?v=example",
-                    "note": "Requires YouTube Data API v3 key - set YOUTUBE_API_KEY in .env"
-                }
-            ],
-            "total_results": max_results
-        }
-
-    async def search_reddit(self, query: str, subreddit: str = "all", limit: int = 10) -> Dict[str, Any]:
+            SourceResult with the search results
+        """
+        if not self.youtube_api_key:
+            return SourceResult(source="YouTube", error="YOUTUBE_API_KEY is not set")
+
+        cache_params = search_params("youtube", query, max_results, newest_first=newest_first)
+        cached = self._cache_get("youtube", query, cache_params)
+        if cached is not None:
+            return cached
+
+        try:
+            videos = [
+                video
+                async for video in self.iter_youtube(
+                    query,
+                    max_items=max_results,
+                    page_size=min(max_results, YOUTUBE_PAGE_SIZE),
+                    newest_first=newest_first,
+                )
+            ]
+
+            result = SourceResult(
+                source="YouTube",
+                query=query,
+                results=videos,
+                total_results=len(videos),
+            )
+            self._cache_set("youtube", query, cache_params, result)
+            await self._corpus_add("youtube", query, cache_params, videos)
+            return result
+        except Exception as e:
+            return SourceResult(source="YouTube", error=str(e))
+
+    def iter_youtube(
+        self,
+        query: str,
+        max_items: Optional[int] = None,
+        page_size: int = YOUTUBE_PAGE_SIZE,
+        newest_first: bool = False,
+    ) -> AsyncIterator[YouTubeVideo]:
+        """
+        Iterate over YouTube search results across pages.
+
+        Each page costs two requests: ``search.list`` for the matching
+        videos, then a single ``videos.list`` call for the statistics and
+        duration of every video on the page (up to 50 IDs per call). Pages
+        follow ``nextPageToken`` and are prefetched like Reddit's.
+
+        Args:
+            query: Search query
+            max_items: Maximum number of videos (None for every page)
+            page_size: Videos requested per page (at most 50)
+            newest_first: Order by upload date instead of relevance
+
+        Returns:
+            Async iterator of videos
+        """
+        # The key travels in a header so it never shows up in URLs or error messages
+        headers = {"X-Goog-Api-Key": self.youtube_api_key or ""}
+
+        async def fetch_page(page_token: Optional[str]):
+            params = {
+                "part": "snippet",
+                "type": "video",
+                "q": query,
+                "maxResults": page_size,
+            }
+            if newest_first:
+                params["order"] = "date"
+            if page_token:
+                params["pageToken"] = page_token
+
+            data = loads(await self._conditional_get(
+                f"{self.youtube_api_url}/search", params=params, headers=headers
+            ))
+
+            videos = {}
+            for item in data.get("items", []):
+                video_id = item.get("id", {}).get("videoId")
+                if not video_id:
+                    continue
+                snippet = item.get("snippet", {})
+                videos[video_id] = YouTubeVideo(
+                    title=snippet.get("title", ""),
+                    url=f"https://www.youtube.com/watch?v={video_id}",
+                    description=snippet.get("description", "")[:500],
+                    channel=snippet.get("channelTitle", ""),
+                    published=snippet.get("publishedAt", ""),
+                )
+
+            if videos:
+                stats = loads(await self._conditional_get(
+                    f"{self.youtube_api_url}/videos",
+                    params={"part": "statistics,contentDetails", "id": ",".join(videos)},
+                    headers=headers,
+                ))
+                for item in stats.get("items", []):
+                    video = videos.get(item.get("id"))
+                    if video is None:
+                        continue
+                    statistics = item.get("statistics", {})
+                    # Counts arrive as strings, and are omitted when the owner hides them
+                    video.view_count = int(statistics.get("viewCount", 0))
+                    video.like_count = int(statistics.get("likeCount", 0))
+                    video.comment_count = int(statistics.get("commentCount", 0))
+                    video.duration = item.get("contentDetails", {}).get("duration", "")
+
+            return list(videos.values()), data.get("nextPageToken")
+
+        return iter_pages(fetch_page, max_items=max_items)
+
+    @instrumented("reddit")
+    async def search_reddit(
+        self, query: str, subreddit: str = "all", limit: int = 10, newest_first: bool = False
+    ) -> SourceResult:
         """
         Search Reddit for posts related to the query.
 
@@ -52,52 +402,157 @@ class ResearchTools:
             query: Search query
             subreddit: Subreddit to search in (default: "all")
             limit: Maximum number of results
+            newest_first: Order by submission time instead of relevance
 
         Returns:
-            Dictionary with search results
+            SourceResult with the search results
         """
+        cache_params = search_params("reddit", query, limit, subreddit=subreddit, newest_first=newest_first)
+        cached = self._cache_get("reddit", query, cache_params)
+        if cached is not None:
+            return cached
+
         try:
-            # Reddit's public search API
-            url = f"https://www.reddit.com/r/{subreddit}/search.json"
+            results = [
+                post
+                async for post in self.iter_reddit(
+                    query,
+                    subreddit=subreddit,
+                    max_items=limit,
+                    page_size=min(limit, REDDIT_PAGE_SIZE),
+                    newest_first=newest_first,
+                )
+            ]
+
+            result = SourceResult(
+                source="Reddit",
+                query=query,
+                subreddit=subreddit,
+                results=results,
+                total_results=len(results),
+            )
+            self._cache_set("reddit", query, cache_params, result)
+            await self._corpus_add("reddit", query, cache_params, results)
+            return result
+        except Exception as e:
+            return SourceResult(source="Reddit", error=str(e))
+
+    def iter_reddit(
+        self,
+        query: str,
+        subreddit: str = "all",
+        max_items: Optional[int] = None,
+        page_size: int = REDDIT_PAGE_SIZE,
+        newest_first: bool = False,
+    ) -> AsyncIterator[RedditPost]:
+        """
+        Iterate over Reddit search results across pages.
+
+        Follows Reddit's ``after`` cursor, prefetching the next page while
+        the caller handles the current one. Iteration stops at
+        ``max_items`` or when the caller stops consuming.
+
+        Args:
+            query: Search query
+            subreddit: Subreddit to search in (default: "all")
+            max_items: Maximum number of posts (None for every page)
+            page_size: Posts requested per page (at most 100)
+            newest_first: Order by submission time instead of relevance
+
+        Returns:
+            Async iterator of posts
+        """
+        # Reddit's public search API
+        url = f"{self.reddit_base_url}/r/{subreddit}/search.json"
+        headers = {"User-Agent": "DeepResearch/0.1.0"}
+
+        async def fetch_page(after: Optional[str]):
             params = {
                 "q": query,
-                "limit": limit,
-                "sort": "relevance"
+                "limit": page_size,
+                "sort": "new" if newest_first else "relevance"
             }
-            headers = {"User-Agent": "DeepResearch/0.1.0"}
+            if subreddit != "all":
+                # Without it Reddit searches site-wide even under /r/{subreddit}
+                params["restrict_sr"] = 1
+            if after:
+                params["after"] = after
 
-            response = await self.client.get(url, params=params, headers=headers)
-            response.raise_for_status()
-            data = response.json()
+            data = loads(await self._conditional_get(url, params=params, headers=headers)).get("data", {})
 
-            results = []
-            for post in data.get("data", {}).get("children", []):
+            posts = []
+            for post in data.get("children", []):
                 post_data = post.get("data", {})
-                results.append({
-                    "title": post_data.get("title", ""),
-                    "score": post_data.get("score", 0),
-                    "url": f"https://reddit.com{post_data.get('permalink', '')}",
-                    "author": post_data.get("author", ""),
-                    "subreddit": post_data.get("subreddit", ""),
-                    "num_comments": post_data.get("num_comments", 0),
-                    "selftext": post_data.get("selftext", "")[:500]  # First 500 chars
-                })
-
-            return {
-                "source": "Reddit",
-                "query": query,
-                "subreddit": subreddit,
-                "results": results,
-                "total_results": len(results)
-            }
-        except Exception as e:
-            return {
-                "source": "Reddit",
-                "error": str(e),
-                "results": []
+                posts.append(RedditPost(
+                    title=post_data.get("title", ""),
+                    score=post_data.get("score", 0),
+                    url=f"https://reddit.com{post_data.get('permalink', '')}",
+                    author=post_data.get("author", ""),
+                    subreddit=post_data.get("subreddit", ""),
+                    num_comments=post_data.get("num_comments", 0),
+                    selftext=post_data.get("selftext", "")[:500],  # First 500 chars
+                ))
+            return posts, data.get("after")
+
+        return iter_pages(fetch_page, max_items=max_items)
+
+    def iter_arxiv(
+        self,
+        query: str,
+        max_items: Optional[int] = None,
+        page_size: int = ARXIV_PAGE_SIZE,
+        category: Optional[str] = None,
+        newest_first: bool = False,
+    ) -> AsyncIterator[ArxivPaper]:
+        """
+        Iterate over ArXiv search results across pages.
+
+        Advances ArXiv's ``start`` offset page by page, prefetching the next
+        page while the caller handles the current one. Each page's Atom feed
+        is parsed as it downloads.
+
+        Args:
+            query: Search query
+            max_items: Maximum number of papers (None for every page)
+            page_size: Papers requested per page
+            category: Restrict the search to one ArXiv category (e.g. "cs.LG")
+            newest_first: Order by submission date instead of relevance
+
+        Returns:
+            Async iterator of papers
+        """
+        search_query = f"all:{query}"
+        if category:
+            search_query += f" AND cat:{category}"
+
+        async def fetch_page(start: int):
+            params = {
+                "search_query": search_query,
+                "start": start,
+                "max_results": page_size,
+                "sortBy": "submittedDate" if newest_first else "relevance",
+                "sortOrder": "descending"
             }
 
-    async def search_arxiv(self, query: str, max_results: int = 10) -> Dict[str, Any]:
+            # Parse the Atom feed while it downloads instead of buffering the body;
+            # it is read to the end so its validators can be stored
+            chunks = self._conditional_chunks(self.arxiv_api_url, params=params)
+            entries = [entry async for entry in iter_arxiv_entries(chunks)]
+
+            # A short page means the result set is exhausted
+            next_start = start + page_size if len(entries) >= page_size else None
+            return entries, next_start
+
+        return iter_pages(fetch_page, first_cursor=0, max_items=max_items)
+
+    @instrumented("arxiv")
+    async def search_arxiv(
+        self,
+        query: str,
+        max_results: int = 10,
+        category: Optional[str] = None,
+        newest_first: bool = False,
+    ) -> SourceResult:
         """
         Search ArXiv for academic papers.
 
@@ -106,94 +561,142 @@ class ResearchTools:
         Args:
             query: Search query
             max_results: Maximum number of results
+            category: Restrict the search to one ArXiv category (e.g. "cs.LG")
+            newest_first: Order by submission date instead of relevance
 
         Returns:
-            Dictionary with search results
+            SourceResult with the search results
         """
-        try:
-            # ArXiv API endpoint
-            url = "https://export.arxiv.org/api/query"
-            params = {
-                "search_query": f"all:{query}",
-                "start": 0,
-                "max_results": max_results,
-                "sortBy": "relevance",
-                "sortOrder": "descending"
-            }
+        cache_params = search_params(
+            "arxiv", query, max_results, category=category, newest_first=newest_first
+        )
+        cached = self._cache_get("arxiv", query, cache_params)
+        if cached is not None:
+            return cached
 
-            response = await self.client.get(url, params=params)
-            response.raise_for_status()
+        try:
+            entries = [
+                entry
+                async for entry in self.iter_arxiv(
+                    query,
+                    max_items=max_results,
+                    page_size=min(max_results, ARXIV_PAGE_SIZE),
+                    category=category,
+                    newest_first=newest_first,
+                )
+            ]
 
-            # Parse XML response (simplified - in production use proper XML parser)
-            import re
-            content = response.text
-
-            # Extract entries using simple regex (for demo purposes)
-            entries = []
-            entry_pattern = r'<entry>(.*?)</entry>'
-            for entry_match in re.finditer(entry_pattern, content, re.DOTALL):
-                entry = entry_match.group(1)
-
-                title_match = re.search(r'<title>(.*?)</title>', entry, re.DOTALL)
-                summary_match = re.search(r'<summary>(.*?)</summary>', entry, re.DOTALL)
-                id_match = re.search(r'<id>(.*?)</id>', entry)
-                published_match = re.search(r'<published>(.*?)</published>', entry)
-
-                if title_match and summary_match:
-                    entries.append({
-                        "title": title_match.group(1).strip(),
-                        "summary": summary_match.group(1).strip()[:500],  # First 500 chars
-                        "url": id_match.group(1) if id_match else "",
-                        "published": published_match.group(1) if published_match else ""
-                    })
-
-            return {
-                "source": "ArXiv",
-                "query": query,
-                "results": entries,
-                "total_results": len(entries)
-            }
+            result = SourceResult(
+                source="ArXiv",
+                query=query,
+                results=entries,
+                total_results=len(entries),
+            )
+            self._cache_set("arxiv", query, cache_params, result)
+            await self._corpus_add("arxiv", query, cache_params, entries)
+            return result
         except Exception as e:
-            return {
-                "source": "ArXiv",
-                "error": str(e),
-                "results": []
-            }
+            return SourceResult(source="ArXiv", error=str(e))
 
-    async def search_medium(self, query: str, tag: str = None) -> Dict[str, Any]:
+    @instrumented("medium")
+    async def search_medium(self, query: str, tag: Optional[str] = None, max_results: int = 10) -> SourceResult:
         """
         Search Medium for articles.
 
-        Note: Medium doesn't have a free public API. This is a placeholder.
-        In production, you could:
-        - Use Medium's RSS feeds
-        - Web scraping (check Medium's ToS)
-        - Use third-party APIs
+        Medium has no public search API; this reads the RSS feed of the tag
+        derived from the query (``https://medium.com/feed/tag/<tag>``), which
+        lists the latest stories under that tag. No authentication is required.
 
         Args:
             query: Search query
-            tag: Optional tag to filter by
+            tag: Tag to read (default: derived from the query, see medium_tag)
+            max_results: Maximum number of results
 
         Returns:
-            Dictionary with search results
-        """
-        # Placeholder implementation
-        # Medium's public RSS feed for a tag: https://medium.com/feed/tag/{tag}
-        return {
-            "source": "Medium",
-            "query": query,
-            "tag": tag,
-            "results": [
-                {
-                    "title": f"Article about {query}",
-                    "description": "This is a placeholder. Medium doesn't have a free public API.",
-                    "url": "https://medium.com/example",
-                    "note": "Consider using Medium's RSS feeds or web scraping (check ToS)"
-                }
-            ],
-            "total_results": 1
-        }
+            SourceResult with the search results
+        """
+        tag = tag or medium_tag(query)
+        cache_params = search_params("medium", query, max_results, tag=tag)
+        cached = self._cache_get("medium", query, cache_params)
+        if cached is not None:
+            return cached
+
+        try:
+            # Read the whole feed (it is short) so its validators can be stored for the next poll
+            chunks = self._conditional_chunks(
+                f"{self.medium_feed_url}/tag/{tag}",
+                headers={"User-Agent": "DeepResearch/0.1.0"},
+            )
+            articles = [article async for article in iter_rss_items(chunks)][:max_results]
+
+            result = SourceResult(
+                source="Medium",
+                query=query,
+                tag=tag,
+                results=articles,
+                total_results=len(articles),
+            )
+            self._cache_set("medium", query, cache_params, result)
+            await self._corpus_add("medium", query, cache_params, articles)
+            return result
+        except Exception as e:
+            return SourceResult(source="Medium", tag=tag, error=str(e))
 
     async def close(self):
-        """Close the HTTP client."""
-        await self.client.aclose()
+        """Close the HTTP client if this instance created it."""
+        if self._owns_client:
+            await self.client.aclose()
+
+
+def medium_tag(query: str) -> str:
+    """
+    Turn a query into a Medium tag slug.
+
+    Args:
+        query: Search query, e.g. "Large Language Models"
+
+    Returns:
+        Lower-case, hyphen-separated slug, e.g. "large-language-models"
+    """
+    return re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-") or "technology"
+
+
+def search_params(
+    source: str,
+    query: str,
+    max_results: int = 10,
+    subreddit: str = "all",
+    category: Optional[str] = None,
+    tag: Optional[str] = None,
+    newest_first: bool = False,
+) -> Dict[str, Any]:
+    """
+    Request parameters that identify one search of a source, besides its query.
+
+    They key both the response cache and the corpus's search records, so a
+    subreddit, category, newest-first or differently sized search is never
+    taken for the default search of the same query.
+
+    Args:
+        source: Source identifier (e.g. "reddit")
+        query: Search query (Medium derives its default tag from it)
+        max_results: Maximum number of results
+        subreddit: Reddit subreddit
+        category: ArXiv category
+        tag: Medium tag (default: derived from the query, see medium_tag)
+        newest_first: Order by date instead of relevance (Reddit, ArXiv, YouTube)
+
+    Returns:
+        Parameters of the search
+    """
+    if source == "medium":
+        return {"tag": tag or medium_tag(query), "max_results": max_results}
+    if source == "reddit":
+        params: Dict[str, Any] = {"subreddit": subreddit, "limit": max_results}
+    else:
+        params = {"max_results": max_results}
+        if category:
+            params["category"] = category
+    if newest_first:
+        params["newest_first"] = True
+    return params
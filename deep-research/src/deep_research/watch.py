@@ -0,0 +1,488 @@
+"""``deep-research watch``: poll a list of topics on a schedule and analyze only what is new."""
+
+import argparse
+import asyncio
+import dataclasses
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .batch import read_queries
+from .cache import default_cache_dir, normalize_query
+from .context import DEFAULT_TOKEN_BUDGET, render_item
+from .corpus import item_key
+from .executor import configure_default_executor, get_default_executor
+from .main import (
+    REPORT_INSTRUCTIONS,
+    Translator,
+    add_llm_cache_arguments,
+    add_profile_arguments,
+    add_worker_arguments,
+    analyze_with_claude,
+    create_analysis_session,
+    create_research_tools,
+    create_translation_session,
+    research_query_sources,
+)
+from . import metrics
+from .records import ResearchItem, SourceResult, dumps
+from .session import AgentSession
+from .tools import ResearchTools
+
+
+def default_watch_path() -> Path:
+    """Default watch state file, under the cache directory."""
+    return default_cache_dir() / "watch.sqlite3"
+
+# How often each topic is polled, and the window each round of polls is spread over
+DEFAULT_INTERVAL_HOURS = 24.0
+DEFAULT_SPREAD_MINUTES = 30.0
+
+# Delay before a failed poll of a topic is retried
+RETRY_MINUTES = 15.0
+
+# Items not returned by any poll for this long are forgotten (and would count as new again)
+SEEN_RETENTION_DAYS = 90
+
+# Report format for a topic that has been polled before: only the new items are sent
+INCREMENTAL_INSTRUCTIONS = """
+上記は前回の確認（{since}）以降に新たに見つかったデータだけです。
+このトピックの最新動向として、新しい発見、注目すべき変化、これまでの状況から
+変わった点を日本語で簡潔にまとめてください。新しいデータに含まれない内容には触れないでください。
+"""
+
+
+def _format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+
+class WatchState:
+    """
+    What every watched topic has already seen, kept in SQLite.
+
+    Items are identified like corpus entries (canonical URL, or title) and
+    remembered per topic and source, so a poll can tell which of the
+    returned items appeared since the previous one. Topics are keyed by
+    their normalized query, which keeps the state valid when the topic
+    file is reordered or edited around them.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Args:
+            path: SQLite file holding the watch state (default: default_watch_path())
+        """
+        self.path = Path(path or default_watch_path())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS topics (
+                topic TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                last_polled REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS seen (
+                topic TEXT NOT NULL,
+                source TEXT NOT NULL,
+                key TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (topic, source, key)
+            );
+            CREATE INDEX IF NOT EXISTS seen_last_seen ON seen (last_seen);
+            """
+        )
+        self.conn.commit()
+
+    def last_polled(self, query: str) -> Optional[float]:
+        """
+        When a topic was last polled successfully.
+
+        Args:
+            query: Topic query
+
+        Returns:
+            Unix timestamp, or None if the topic has never been polled
+        """
+        row = self.conn.execute(
+            "SELECT last_polled FROM topics WHERE topic = ?", (normalize_query(query),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def unseen(self, query: str, source: str, items: List[ResearchItem]) -> List[ResearchItem]:
+        """
+        Filter items down to the ones the topic has not seen before.
+
+        Args:
+            query: Topic query
+            source: Source identifier
+            items: Items returned by the current poll
+
+        Returns:
+            New items, in their original order and without duplicates
+        """
+        seen = {
+            key
+            for (key,) in self.conn.execute(
+                "SELECT key FROM seen WHERE topic = ? AND source = ?",
+                (normalize_query(query), source),
+            )
+        }
+        new = []
+        for item in items:
+            key = item_key(item)
+            if key not in seen:
+                seen.add(key)
+                new.append(item)
+        return new
+
+    def mark_seen(self, query: str, results: Dict[str, SourceResult], polled_at: float) -> None:
+        """
+        Record a completed poll and every item it returned.
+
+        Sources that failed are skipped, so their items still count as new
+        on the next poll.
+
+        Args:
+            query: Topic query
+            results: Results of the poll, keyed by source
+            polled_at: Time the poll started
+        """
+        topic = normalize_query(query)
+        rows = [
+            (topic, source, item_key(item), polled_at, polled_at)
+            for source, data in results.items()
+            if not data.error
+            for item in data.results
+        ]
+        self.conn.executemany(
+            """
+            INSERT INTO seen VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (topic, source, key) DO UPDATE SET last_seen = excluded.last_seen
+            """,
+            rows,
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO topics VALUES (?, ?, ?)", (topic, query, polled_at)
+        )
+        self.conn.execute(
+            "DELETE FROM seen WHERE last_seen < ?",
+            (polled_at - SEEN_RETENTION_DAYS * 24 * 60 * 60,),
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+async def poll_topic(
+    record: Dict[str, Any],
+    tools: ResearchTools,
+    state: WatchState,
+    session: Optional[AgentSession],
+    translator: Optional[Translator] = None,
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+    echo: bool = True,
+    use_llm_cache: bool = True,
+) -> Dict[str, Any]:
+    """
+    Poll one topic and analyze the items that are new since its last poll.
+
+    The first poll of a topic produces a full report as the baseline;
+    later polls send Claude only the new items and ask for an update, and
+    skip the analysis entirely when nothing changed. The seen items are
+    recorded only after the analysis succeeded, so a failed poll is
+    retried with the same delta; a poll where every source failed is not
+    recorded at all and comes back with ``error`` set.
+
+    Args:
+        record: Topic record with ``id``, ``query`` and ``sources`` (see batch.read_queries)
+        tools: Long-lived ResearchTools; it should refetch rather than serve cached results
+        state: Watch state the delta is computed against
+        session: Warm analysis session (None to only report the new items)
+        translator: Warm session used to translate Japanese queries
+        token_budget: Approximate token budget for the new data in the prompt
+        echo: Print the new items and stream the analysis to stdout
+        use_llm_cache: Replay the report of an identical analysis from the completion cache
+
+    Returns:
+        Update record with the new items per source, source errors and the analysis
+    """
+    query = record["query"]
+    since = state.last_polled(query)
+    polled_at = time.time()
+    update: Dict[str, Any] = {"id": record["id"], "query": query, "polled_at": _format_time(polled_at)}
+
+    with metrics.stage("watch"):
+        # Newest first: new items rarely make it into the top results ranked by relevance
+        research_data = await research_query_sources(
+            query, sources=record["sources"], tools=tools, translator=translator, newest_first=True
+        )
+        delta: Dict[str, SourceResult] = {}
+        for source, data in research_data.items():
+            if data.error:
+                continue
+            new = state.unseen(query, source, data.results)
+            if new:
+                delta[source] = dataclasses.replace(data, results=new, total_results=len(new))
+
+        update["new"] = {source: len(data.results) for source, data in delta.items()}
+        errors = {source: data.error for source, data in research_data.items() if data.error}
+        if errors:
+            update["errors"] = errors
+        update["results"] = delta
+
+        if echo:
+            for source, error in errors.items():
+                print(f"⚠️  {research_data[source].source}: {error}")
+            if not delta:
+                print("✨ 新着なし")
+            for data in delta.values():
+                print(f"\n🆕 {data.source}: {len(data.results)}件")
+                for item in data.results:
+                    print(render_item(item))
+
+        if delta and session is not None:
+            if since is None:
+                instructions = REPORT_INSTRUCTIONS
+            else:
+                instructions = INCREMENTAL_INSTRUCTIONS.format(since=_format_time(since))
+            if echo:
+                print(f"\n{'='*60}")
+                print("🤖 AI分析（初回のため全件）" if since is None else "🤖 AI分析（新着分のみ）")
+                print('='*60)
+            # Each topic starts its own conversation on the warm session
+            await session.reset()
+            update["analysis"] = await analyze_with_claude(
+                query,
+                delta,
+                echo=echo,
+                token_budget=token_budget,
+                session=session,
+                instructions=instructions,
+                use_llm_cache=use_llm_cache,
+            )
+
+        if research_data and len(errors) == len(research_data):
+            # Nothing was seen: keep the previous poll as the baseline and let the caller retry
+            update["error"] = "every source failed"
+        else:
+            state.mark_seen(query, research_data, polled_at)
+    return update
+
+
+async def run_watch(
+    input_path: Path,
+    output_path: Path,
+    interval_hours: float = DEFAULT_INTERVAL_HOURS,
+    spread_minutes: float = DEFAULT_SPREAD_MINUTES,
+    once: bool = False,
+    analyze: bool = True,
+    use_cache: bool = True,
+    use_corpus: bool = True,
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+    state_path: Optional[Path] = None,
+    use_llm_cache: bool = True,
+) -> int:
+    """
+    Poll every topic in a JSONL file on a schedule, appending each update to a JSONL file.
+
+    Topics are polled one at a time. Each round of polls is spread evenly
+    over ``spread_minutes``, and consecutive polls are never closer than
+    that share even when several topics are overdue (e.g. after a
+    restart), so the upstream APIs never see a burst. Every topic is then
+    polled again ``interval_hours`` after its previous poll, which keeps
+    the stagger from round to round. The topic file is reread before each
+    poll, so topics can be added or removed while the watch is running.
+
+    Searches bypass the response cache (a cached answer would hide new
+    items) but are revalidated with conditional requests, so unchanged
+    sources cost a 304 rather than a download.
+
+    Args:
+        input_path: JSONL file of topics, in the batch input format
+        output_path: JSONL file receiving one update per poll
+        interval_hours: Time between two polls of the same topic
+        spread_minutes: Window each round of polls is spread over
+        once: Poll every topic once and return instead of running forever
+        analyze: Analyze the new items with Claude
+        use_cache: Revalidate with stored validators (and keep the response cache updated)
+        use_corpus: Write fetched items to the local research corpus
+        token_budget: Approximate token budget for the new data in each prompt
+        state_path: SQLite file holding the watch state (default: default_watch_path())
+        use_llm_cache: Replay the report of an identical analysis from the completion cache
+
+    Returns:
+        Number of polls performed
+    """
+    interval = interval_hours * 60 * 60
+    state = WatchState(state_path)
+    session = create_analysis_session() if analyze else None
+    translator = create_translation_session()
+    polls = 0
+    # Topics still to poll in --once mode
+    pending = {record["id"] for record in read_queries(input_path)} if once else None
+    retry_at: Dict[str, float] = {}
+    last_started = None
+
+    try:
+        async with create_research_tools(use_cache=use_cache, refresh=True, use_corpus=use_corpus) as tools:
+            with open(output_path, "a", encoding="utf-8") as out:
+                while True:
+                    topics = [
+                        record for record in read_queries(input_path)
+                        if pending is None or record["id"] in pending
+                    ]
+                    if not topics:
+                        if once:
+                            break
+                        print("⚠️  監視するトピックがありません。60秒後に再読み込みします。")
+                        await asyncio.sleep(60)
+                        continue
+
+                    now = time.time()
+                    gap = spread_minutes * 60 / len(topics)
+                    due = {}
+                    for index, record in enumerate(topics):
+                        last = state.last_polled(record["query"])
+                        # Topics never polled yet take evenly spaced slots in the first round
+                        due[record["id"]] = now + index * gap if last is None else last + interval
+                        due[record["id"]] = max(due[record["id"]], retry_at.get(record["id"], 0.0))
+                    record = min(topics, key=lambda record: due[record["id"]])
+                    start_at = due[record["id"]] if not once else now
+                    if last_started is not None:
+                        start_at = max(start_at, last_started + gap)
+
+                    if start_at > now:
+                        print(f"\n⏳ 次の確認: {record['query']}（{_format_time(start_at)}）")
+                        await asyncio.sleep(start_at - now)
+                        continue  # Reread the topic file before polling
+
+                    last_started = time.time()
+                    print(f"\n👀 確認中: {record['query']}")
+                    print("-" * 60)
+                    try:
+                        update = await poll_topic(
+                            record,
+                            tools,
+                            state,
+                            session,
+                            translator=translator,
+                            token_budget=token_budget,
+                            use_llm_cache=use_llm_cache,
+                        )
+                    except Exception as e:
+                        update = {"id": record["id"], "query": record["query"], "error": str(e)}
+                        print(f"❌ {record['id']}: {e}")
+                    if "error" in update:
+                        # The topic stays due; try again later rather than immediately
+                        retry_at[record["id"]] = time.time() + RETRY_MINUTES * 60
+                    if once:
+                        pending.discard(record["id"])
+                    out.write(dumps(update) + "\n")
+                    out.flush()
+                    polls += 1
+                    print("\n" + "-" * 60)
+    finally:
+        closing = [translator.close()] + ([session.close()] if session is not None else [])
+        await asyncio.gather(*closing, return_exceptions=True)
+        state.close()
+
+    return polls
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the parser for the ``watch`` subcommand.
+
+    Returns:
+        Configured ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="deep-research watch",
+        description="トピックを定期的に確認し、前回以降の新着だけを分析します",
+    )
+    parser.add_argument("input", type=Path, help="監視するトピックを1行1件で記述した JSONL ファイル（batch と同じ形式）")
+    parser.add_argument(
+        "-o", "--output",
+        type=Path,
+        default=None,
+        help="更新内容の出力先 JSONL（デフォルト: <input>.updates.jsonl）",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL_HOURS,
+        help=f"同じトピックを確認する間隔（時間、デフォルト: {DEFAULT_INTERVAL_HOURS:g}）",
+    )
+    parser.add_argument(
+        "--spread",
+        type=float,
+        default=DEFAULT_SPREAD_MINUTES,
+        help=f"1巡分の確認を分散させる時間幅（分、デフォルト: {DEFAULT_SPREAD_MINUTES:g}）",
+    )
+    parser.add_argument("--once", action="store_true", help="すべてのトピックを1回ずつ確認して終了する（cron 向け）")
+    parser.add_argument("--no-analyze", action="store_true", help="Claude による分析を行わず新着の一覧だけを出力する")
+    parser.add_argument("--no-cache", action="store_true", help="条件付きリクエストの検証情報とレスポンスキャッシュを使用しない")
+    parser.add_argument("--no-corpus", action="store_true", help="取得した結果をローカルコーパスに保存しない")
+    parser.add_argument(
+        "--state",
+        type=Path,
+        default=default_watch_path(),
+        help=f"既読状態の保存先（デフォルト: {default_watch_path()}）",
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=DEFAULT_TOKEN_BUDGET,
+        help=f"プロンプトに含める新着データのおおよそのトークン上限（デフォルト: {DEFAULT_TOKEN_BUDGET}）",
+    )
+    add_llm_cache_arguments(parser)
+    add_worker_arguments(parser)
+    add_profile_arguments(parser)
+    return parser
+
+
+def main(argv: Optional[list[str]] = None):
+    """
+    Entry point for ``deep-research watch``.
+
+    Args:
+        argv: Arguments following the subcommand name
+    """
+    args = build_parser().parse_args(argv)
+    output_path = args.output or args.input.with_suffix(".updates.jsonl")
+    if args.profile or args.profile_output:
+        metrics.enable_profiling()
+    if args.workers is not None:
+        configure_default_executor(args.workers)
+
+    mode = "1回のみ" if args.once else f"{args.interval:g}時間ごと"
+    print(f"👀 トピック監視: {args.input} → {output_path}（{mode}）")
+    try:
+        polls = asyncio.run(
+            run_watch(
+                args.input,
+                output_path,
+                interval_hours=args.interval,
+                spread_minutes=args.spread,
+                once=args.once,
+                analyze=not args.no_analyze,
+                use_cache=not args.no_cache,
+                use_corpus=not args.no_corpus,
+                token_budget=args.token_budget,
+                state_path=args.state,
+                use_llm_cache=not args.no_llm_cache,
+            )
+        )
+        print(f"\n🏁 完了: {polls} 件の確認")
+    except KeyboardInterrupt:
+        print("\n\n👋 監視を終了します。")
+    finally:
+        get_default_executor().close()
+    if metrics.get_profiler().enabled:
+        metrics.report(args.profile_output)